@@ -1,45 +1,85 @@
 """Support for VELUX KLF 200 devices."""
+import asyncio
 import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
 from homeassistant.const import CONF_HOST, CONF_PASSWORD, EVENT_HOMEASSISTANT_STOP
-from homeassistant.core import HomeAssistant
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
 from homeassistant.exceptions import ConfigEntryNotReady
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers.device_registry import DeviceEntry
 from homeassistant.helpers.typing import ConfigType
 from pyvlx import PyVLX
+from pyvlx.exception import PyVLXException
 
-from .const import DOMAIN, LOGGER, PLATFORMS
+from .const import (
+    CONF_STALE_NODE_AGE,
+    DEFAULT_STALE_NODE_AGE,
+    DOMAIN,
+    GATEWAY_PLATFORMS,
+    LOGGER,
+    NODE_PLATFORMS,
+    PLATFORMS,
+    SCENE_PLATFORMS,
+    SERVICE_DUMP_PROFILE,
+)
+from .coordinator import VeluxLimitationCoordinator
+from .dispatcher import VeluxCommandDispatcher
+from .heartbeat import VeluxIncrementalHeartbeat
+from .models import VeluxData
+from .node_index import VeluxNodeIndex
+from .pool import async_get_pool
+from .profiler import VeluxProfiler
+from .scheduler import VeluxCommandScheduler
+from .sessions import VeluxSessionTracker
+from .snapshot import VeluxSnapshot
+from .telemetry import VeluxTelemetry
+from .trace import VeluxTrace
+from .travel import VeluxTravelTimes
 
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up velux component from config entry."""
-
-    # Setup pyvlx module and connect to KLF200
-    pyvlx_args = {
-        "host": entry.data[CONF_HOST],
-        "password": entry.data[CONF_PASSWORD],
-    }
-    pyvlx: PyVLX = PyVLX(**pyvlx_args)
+@contextmanager
+def _timed_phase(timings: dict[str, float], phase: str) -> Iterator[None]:
+    """Record the duration of a setup phase."""
+    start = time.monotonic()
     try:
-        await pyvlx.connect()
-    except OSError as ex:
-        LOGGER.warning("Unable to connect to KLF200: %s", str(ex))
-        raise ConfigEntryNotReady from ex
+        yield
+    finally:
+        timings[phase] = time.monotonic() - start
+        LOGGER.debug("Setup phase %s took %.3f s", phase, timings[phase])
 
-    # Store pyvlx in hass data
-    hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = pyvlx
 
-    # Add bridge device to device registry
+# Seconds between connection attempts when setup was done from the snapshot
+RECONNECT_INTERVAL = 60
+
+
+@callback
+def _async_register_gateway(hass: HomeAssistant, entry: ConfigEntry, pyvlx: PyVLX) -> None:
+    """Add or update the bridge device in the device registry."""
     connections = set()
     mac_address = hass.data.get(dr.CONNECTION_NETWORK_MAC)
     if mac_address is not None:
         connections = {(dr.CONNECTION_NETWORK_MAC, mac_address)}
 
+    # Versions are unknown until the gateway was connected
+    versions = {}
+    if pyvlx.klf200.version is not None:
+        versions = {
+            "hw_version": pyvlx.klf200.version.hardwareversion,
+            "sw_version": pyvlx.klf200.version.softwareversion,
+        }
+
     device_registry = dr.async_get(hass)
     device_registry.async_get_or_create(
         config_entry_id=entry.entry_id,
@@ -48,41 +88,293 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         manufacturer="Velux",
         name=entry.unique_id,
         model="KLF200",
-        hw_version=pyvlx.klf200.version.hardwareversion,
-        sw_version=pyvlx.klf200.version.softwareversion,
+        **versions,
     )
 
-    # Load nodes (devices) and scenes from API
-    await pyvlx.load_nodes()
-    await pyvlx.load_scenes()
 
-    # Setup velux components
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+@callback
+def _async_register_services(hass: HomeAssistant) -> None:
+    """Register the services shared by all gateways."""
+    if hass.services.has_service(DOMAIN, SERVICE_DUMP_PROFILE):
+        return
+
+    @callback
+    def async_dump_profile(call: ServiceCall) -> ServiceResponse:
+        """Return the callback and command timings of every gateway."""
+        return {
+            data.profiler.name: data.profiler.as_dict()
+            for data in hass.data.get(DOMAIN, {}).values()
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DUMP_PROFILE,
+        async_dump_profile,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up velux component from config entry."""
+    timings: dict[str, float] = {}
+    setup_start = time.monotonic()
+
+    # Adopt the connection kept by a reload or the config flow, or setup
+    # pyvlx module and restore nodes and scenes of the last run
+    pyvlx_args = {
+        "host": entry.data[CONF_HOST],
+        "password": entry.data[CONF_PASSWORD],
+    }
+    pyvlx = async_get_pool(hass).async_adopt(**pyvlx_args)
+    adopted = pyvlx is not None
+    if pyvlx is None:
+        pyvlx = PyVLX(**pyvlx_args)
+    # Replaced before connecting, connect starts the heartbeat
+    heartbeat = VeluxIncrementalHeartbeat(
+        pyvlx,
+        interval=pyvlx.heartbeat.interval,
+        load_all_states=pyvlx.heartbeat.load_all_states,
+        stale_age=entry.options.get(CONF_STALE_NODE_AGE, DEFAULT_STALE_NODE_AGE),
+    )
+    pyvlx.heartbeat = heartbeat
+    heartbeat.track_reports()
+    if adopted:
+        # The pool stopped the heartbeat of the kept connection
+        heartbeat.start()
+    snapshot = VeluxSnapshot(hass, entry, pyvlx)
+    travel_times = VeluxTravelTimes(hass, entry)
+    # A reload adopts the connection with its tables, the connection of the
+    # config flow comes without them
+    adopted_tables = adopted and len(pyvlx.nodes) > 0
+    with _timed_phase(timings, "restore_snapshot"):
+        restored = not adopted_tables and await snapshot.async_restore()
+        await travel_times.async_load()
+    loaded = adopted_tables or restored
+
+    # Without a snapshot the gateway is needed to create any entity
+    if not loaded and not adopted:
+        try:
+            with _timed_phase(timings, "connect"):
+                await pyvlx.connect()
+        except OSError as ex:
+            LOGGER.warning("Unable to connect to KLF200: %s", str(ex))
+            heartbeat.untrack_reports()
+            raise ConfigEntryNotReady from ex
+
+    # Store pyvlx and the objects shared by the platforms in hass data
+    hass.data.setdefault(DOMAIN, {})
+    node_index = VeluxNodeIndex()
+    scheduler = VeluxCommandScheduler(hass)
+    if restored:
+        # Commands wait for the connection made by async_connect_and_reconcile
+        scheduler.async_hold()
+    session_tracker = VeluxSessionTracker(hass, pyvlx)
+    data = VeluxData(
+        pyvlx=pyvlx,
+        scheduler=scheduler,
+        session_tracker=session_tracker,
+        dispatcher=VeluxCommandDispatcher(hass, pyvlx, scheduler, session_tracker),
+        limitation_coordinator=VeluxLimitationCoordinator(
+            hass, entry, pyvlx, node_index
+        ),
+        heartbeat=heartbeat,
+        telemetry=VeluxTelemetry(hass, pyvlx, scheduler, session_tracker),
+        trace=VeluxTrace(pyvlx, session_tracker),
+        profiler=VeluxProfiler(entry.title),
+        snapshot=snapshot,
+        travel_times=travel_times,
+        node_index=node_index,
+        setup_timings=timings,
+    )
+    hass.data[DOMAIN][entry.entry_id] = data
+    data.session_tracker.start()
+    data.telemetry.start()
+    data.trace.start()
+
+    _async_register_gateway(hass, entry, pyvlx)
+    _async_register_services(hass)
+    # Platforms to unload again if another phase fails
+    set_up_platforms: list[str] = []
+
+    async def async_setup_gateway_platforms() -> None:
+        """Set up the platforms which only need the gateway."""
+        with _timed_phase(timings, "gateway_platforms"):
+            await hass.config_entries.async_forward_entry_setups(
+                entry, GATEWAY_PLATFORMS
+            )
+        set_up_platforms.extend(GATEWAY_PLATFORMS)
+
+    async def async_setup_node_platforms() -> None:
+        """Load nodes (devices) from API and set up their platforms."""
+        if not loaded:
+            with _timed_phase(timings, "load_nodes"):
+                await pyvlx.load_nodes()
+        # Classify the nodes once, platforms read their slice of the index
+        node_index.add_nodes(pyvlx.nodes)
+        # Learn travel times before the entities render the node updates
+        travel_times.async_track_nodes(node_index.velocity_nodes.values())
+        with _timed_phase(timings, "node_platforms"):
+            await hass.config_entries.async_forward_entry_setups(
+                entry, NODE_PLATFORMS
+            )
+        set_up_platforms.extend(NODE_PLATFORMS)
+
+    async def async_setup_scene_platforms() -> None:
+        """Load scenes from API and set up their platform."""
+        if not loaded:
+            with _timed_phase(timings, "load_scenes"):
+                await pyvlx.load_scenes()
+        with _timed_phase(timings, "scene_platforms"):
+            await hass.config_entries.async_forward_entry_setups(
+                entry, SCENE_PLATFORMS
+            )
+        set_up_platforms.extend(SCENE_PLATFORMS)
+
+    # Entities are added per platform as soon as their data is available,
+    # API calls are still serialized by pyvlx.
+    results = await asyncio.gather(
+        async_setup_gateway_platforms(),
+        async_setup_node_platforms(),
+        async_setup_scene_platforms(),
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        # Undo the phases which succeeded, the retry starts from scratch
+        await hass.config_entries.async_unload_platforms(entry, set_up_platforms)
+        travel_times.async_untrack_nodes()
+        await data.dispatcher.async_shutdown()
+        await scheduler.async_shutdown()
+        data.session_tracker.stop()
+        data.telemetry.stop()
+        data.trace.stop()
+        heartbeat.untrack_reports()
+        hass.data[DOMAIN].pop(entry.entry_id)
+        if not hass.data[DOMAIN]:
+            hass.services.async_remove(DOMAIN, SERVICE_DUMP_PROFILE)
+        if pyvlx.connection.connected:
+            await pyvlx.disconnect()
+        if not isinstance(errors[0], (OSError, PyVLXException)):
+            raise errors[0]
+        LOGGER.warning("Unable to set up KLF200: %s", str(errors[0]))
+        raise ConfigEntryNotReady from errors[0]
+    timings["total"] = time.monotonic() - setup_start
+    LOGGER.debug(
+        "Setup of %s finished in %.3f s with %s nodes and %s scenes%s",
+        entry.title,
+        timings["total"],
+        len(pyvlx.nodes),
+        len(pyvlx.scenes),
+        (
+            " from snapshot"
+            if restored
+            else " on adopted connection" if adopted_tables else ""
+        ),
+    )
+
+    # Keep last known positions for the next start
+    snapshot.async_track_nodes()
+    if not restored:
+        await snapshot.async_save()
+
+    async def async_connect_and_reconcile() -> None:
+        """Connect to the gateway and apply changes made since the snapshot."""
+        while True:
+            try:
+                if not pyvlx.connection.connected:
+                    with _timed_phase(timings, "connect"):
+                        await pyvlx.connect()
+                    _async_register_gateway(hass, entry, pyvlx)
+                # Commands were held, pyvlx would connect for each of them
+                scheduler.async_resume()
+                with _timed_phase(timings, "reconcile"):
+                    changed_tables = await snapshot.async_reconcile()
+                break
+            except (OSError, PyVLXException) as ex:
+                LOGGER.warning(
+                    "Unable to connect to KLF200, retrying in %s s: %s",
+                    RECONNECT_INTERVAL,
+                    str(ex),
+                )
+                await asyncio.sleep(RECONNECT_INTERVAL)
+
+        if changed_tables:
+            # Entities have to be recreated, reconciling read the new tables
+            LOGGER.info("Nodes or scenes of %s changed, reloading", entry.title)
+            await snapshot.async_save()
+            hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+            return
+        snapshot.async_schedule_save()
+        await data.limitation_coordinator.async_refresh()
+
+    # Refresh window limitations on gateway notifications and fetch them once
+    # in the background, setup does not wait for them
+    data.limitation_coordinator.start_event_updates()
+    if restored:
+        entry.async_create_background_task(
+            hass, async_connect_and_reconcile(), "velux connect and reconcile"
+        )
+    else:
+        entry.async_create_background_task(
+            hass,
+            data.limitation_coordinator.async_refresh(),
+            "velux limitation refresh",
+        )
 
     async def on_hass_stop(event):
         """Close connection when hass stops."""
         LOGGER.debug("Velux interface terminated")
         await pyvlx.disconnect()
 
-    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, on_hass_stop)
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, on_hass_stop)
+    )
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
 
     return True
 
 
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Reload the entry after its options were changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unloading the Velux platform."""
-    pyvlx: PyVLX = hass.data[DOMAIN][entry.entry_id]
+    data: VeluxData = hass.data[DOMAIN][entry.entry_id]
 
-    # Disconnect from KLF200
-    await pyvlx.disconnect()
+    # Unload velux platform components, the entry stays usable if one fails
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if not unload_ok:
+        return False
 
-    # Unload velux platform components
-    for component in PLATFORMS:
-        await hass.config_entries.async_forward_entry_unload(entry, component)
+    # Store last known positions and detach from the connection
+    data.snapshot.async_untrack_nodes()
+    data.travel_times.async_untrack_nodes()
+    await data.snapshot.async_save()
+    data.limitation_coordinator.stop_event_updates()
+    await data.dispatcher.async_shutdown()
+    await data.scheduler.async_shutdown()
+    data.session_tracker.stop()
+    data.telemetry.stop()
+    data.trace.stop()
+    data.heartbeat.untrack_reports()
 
+    # A reload adopts the connection and its tables instead of reconnecting
+    await async_get_pool(hass).async_release(
+        entry.data[CONF_HOST], entry.data[CONF_PASSWORD], data.pyvlx
+    )
+    hass.data[DOMAIN].pop(entry.entry_id)
+    if not hass.data[DOMAIN]:
+        hass.services.async_remove(DOMAIN, SERVICE_DUMP_PROFILE)
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Disconnect the kept connection of a removed entry."""
+    async_get_pool(hass).async_discard(entry.data[CONF_HOST])
+
+
 async def async_remove_config_entry_device(
     hass: HomeAssistant, config_entry: ConfigEntry, device_entry: DeviceEntry
 ) -> bool:
@@ -17,7 +17,7 @@ async def async_setup_entry(
 ) -> None:
     """Set up sensor(s) for Velux platform."""
     entities = []
-    pyvlx: PyVLX = hass.data[DOMAIN][entry.entry_id]
+    pyvlx: PyVLX = hass.data[DOMAIN][entry.entry_id].pyvlx
     entities.append(VeluxGatewayRestart(pyvlx, entry))
     async_add_entities(entities)
 
@@ -0,0 +1,54 @@
+"""Command options supported by the pyvlx node classes."""
+from __future__ import annotations
+
+import inspect
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from pyvlx import Node
+from pyvlx.opening_device import OpeningDevice
+
+
+@dataclass(frozen=True, slots=True)
+class VeluxNodeCapabilities:
+    """Options accepted by the command methods of a node."""
+
+    # Functional parameter carrying the velocity, None if it cannot be set
+    velocity_parameter: str | None = None
+    # Upper and lower curtain can be moved alone, as of dual roller shutters
+    curtains: bool = False
+    # Commands can be merged with other nodes into one multi-node frame
+    coalesce: bool = False
+
+
+def _accepts(method: Any, argument: str) -> bool:
+    """Return True if method takes argument."""
+    if method is None:
+        return False
+    return argument in inspect.signature(method).parameters
+
+
+@lru_cache(maxsize=None)
+def _get_type_capabilities(node_type: type[Node]) -> VeluxNodeCapabilities:
+    """Inspect the command methods of a node class once."""
+    set_position = getattr(node_type, "set_position", None)
+    curtains = _accepts(set_position, "curtain")
+    velocity_parameter = None
+    if _accepts(set_position, "velocity"):
+        # The curtains take the first two functional parameters
+        velocity_parameter = "fp3" if curtains else "fp1"
+    return VeluxNodeCapabilities(
+        velocity_parameter=velocity_parameter,
+        curtains=curtains,
+        # Blinds and dual roller shutters carry node specific functional
+        # parameters (orientation, curtain selection) in every command.
+        coalesce=issubclass(node_type, OpeningDevice)
+        and not hasattr(node_type, "set_orientation")
+        and not curtains,
+    )
+
+
+def get_node_capabilities(node: Node) -> VeluxNodeCapabilities:
+    """Return the capabilities of node."""
+    return _get_type_capabilities(type(node))
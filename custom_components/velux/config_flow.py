@@ -1,14 +1,21 @@
 """Config flow for Velux integration."""
 
+from contextlib import suppress
 from typing import Any
 
 from pyvlx import PyVLX, PyVLXException
-from pyvlx.discovery import VeluxDiscovery, VeluxHost
+from pyvlx.discovery import VeluxHost
 import voluptuous as vol
 
-from homeassistant.components import zeroconf
-from homeassistant.config_entries import ConfigEntryState, ConfigFlow, ConfigFlowResult
+from homeassistant.config_entries import (
+    ConfigEntry,
+    ConfigEntryState,
+    ConfigFlow,
+    ConfigFlowResult,
+    OptionsFlow,
+)
 from homeassistant.const import CONF_HOST, CONF_MAC, CONF_NAME, CONF_PASSWORD
+from homeassistant.core import HomeAssistant, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.device_registry import format_mac
 from homeassistant.helpers.selector import (
@@ -20,7 +27,16 @@ from homeassistant.helpers.service_info.dhcp import DhcpServiceInfo
 from homeassistant.helpers.service_info.zeroconf import ZeroconfServiceInfo
 
 
-from .const import DOMAIN, LOGGER
+from .const import (
+    CONF_STALE_NODE_AGE,
+    CONF_STATE_WRITE_INTERVAL,
+    DEFAULT_STALE_NODE_AGE,
+    DEFAULT_STATE_WRITE_INTERVAL,
+    DOMAIN,
+    LOGGER,
+)
+from .discovery import async_get_discovery
+from .pool import async_get_pool
 
 USER_SCHEMA = vol.Schema(
     {
@@ -30,20 +46,32 @@ USER_SCHEMA = vol.Schema(
 )
 
 
-async def _check_connection(host: str, password: str) -> dict[str, Any]:
-    """Check if we can connect to the Velux bridge."""
+async def _check_connection(
+    hass: HomeAssistant, host: str, password: str
+) -> dict[str, Any]:
+    """Check if we can connect to the Velux bridge.
+
+    Connecting logs in and reads the gateway version. The KLF200 is slow to
+    accept a new session, the connection is kept in the pool and the setup
+    of the entry loads the node and scene tables.
+    """
     pyvlx = PyVLX(host=host, password=password)
     try:
         await pyvlx.connect()
-        await pyvlx.disconnect()
     except (PyVLXException, ConnectionError) as err:
         LOGGER.debug("Cannot connect: %s", err)
-        return {"base": "cannot_connect"}
+        errors = {"base": "cannot_connect"}
     except Exception as err:  # noqa: BLE001
         LOGGER.exception("Unexpected exception: %s", err)
-        return {"base": "unknown"}
+        errors = {"base": "unknown"}
+    else:
+        await async_get_pool(hass).async_release(host, password, pyvlx)
+        return {}
 
-    return {}
+    # Closing the failed connection must not hide why it failed
+    with suppress(PyVLXException, OSError):
+        await pyvlx.disconnect()
+    return errors
 
 
 class VeluxConfigFlow(ConfigFlow, domain=DOMAIN):  # type: ignore
@@ -57,6 +85,12 @@ class VeluxConfigFlow(ConfigFlow, domain=DOMAIN):  # type: ignore
         self.discovery_data: dict[str, Any] = {}
         self.hosts: list[VeluxHost] = []
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return VeluxOptionsFlow()
+
     async def async_step_user(
         self, user_input: dict[str, str] | None = None
     ) -> ConfigFlowResult:
@@ -73,7 +107,7 @@ class VeluxConfigFlow(ConfigFlow, domain=DOMAIN):  # type: ignore
                             updates={CONF_HOST: host.ip_address}
                         )
             errors = await _check_connection(
-                user_input[CONF_HOST], user_input[CONF_PASSWORD]
+                self.hass, user_input[CONF_HOST], user_input[CONF_PASSWORD]
             )
             if not errors:
                 return self.async_create_entry(
@@ -81,11 +115,9 @@ class VeluxConfigFlow(ConfigFlow, domain=DOMAIN):  # type: ignore
                     data=user_input,
                 )
 
-        if not self.hosts:
-            aiozc = await zeroconf.async_get_async_instance(self.hass)
-            vd: VeluxDiscovery = VeluxDiscovery(zeroconf=aiozc)
-            if await vd.async_discover_hosts(expected_hosts=1):
-                self.hosts = vd.hosts  # type: ignore[assignment]
+        # Scanned at most once per TTL for all flows, merged with the
+        # gateways announced by DHCP and zeroconf
+        self.hosts = await async_get_discovery(self.hass).async_get_hosts()
 
         if self.hosts:
             data_schema = vol.Schema(
@@ -121,6 +153,9 @@ class VeluxConfigFlow(ConfigFlow, domain=DOMAIN):  # type: ignore
         """Handle discovery by zeroconf."""
         self.discovery_data[CONF_NAME] = discovery_info.hostname.replace(".local.", "")
         self.discovery_data[CONF_HOST] = discovery_info.host
+        async_get_discovery(self.hass).async_add_host(
+            self.discovery_data[CONF_NAME], self.discovery_data[CONF_HOST]
+        )
         await self.async_set_unique_id(self.discovery_data[CONF_NAME])
         self._abort_if_unique_id_configured(
             updates={CONF_HOST: self.discovery_data[CONF_HOST]}
@@ -147,6 +182,9 @@ class VeluxConfigFlow(ConfigFlow, domain=DOMAIN):  # type: ignore
         self.discovery_data[CONF_MAC] = format_mac(discovery_info.macaddress)
         self.discovery_data[CONF_NAME] = discovery_info.hostname.upper().replace("LAN_", "")
         LOGGER.debug(f"Discovered by DHCP with Info: {discovery_info}")
+        async_get_discovery(self.hass).async_add_host(
+            discovery_info.hostname.upper(), self.discovery_data[CONF_HOST]
+        )
         await self.async_set_unique_id(self.discovery_data[CONF_NAME])
         self._abort_if_unique_id_configured(
             updates={
@@ -180,7 +218,7 @@ class VeluxConfigFlow(ConfigFlow, domain=DOMAIN):  # type: ignore
         errors: dict[str, str] = {}
         if user_input is not None:
             errors = await _check_connection(
-                self.discovery_data[CONF_HOST], user_input[CONF_PASSWORD]
+                self.hass, self.discovery_data[CONF_HOST], user_input[CONF_PASSWORD]
             )
             if not errors:
                 return self.async_create_entry(
@@ -201,3 +239,34 @@ class VeluxConfigFlow(ConfigFlow, domain=DOMAIN):  # type: ignore
                 "host": self.discovery_data[CONF_HOST],
             },
         )
+
+
+class VeluxOptionsFlow(OptionsFlow):
+    """Handle velux options."""
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(data=user_input)
+
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_STATE_WRITE_INTERVAL,
+                        default=self.config_entry.options.get(
+                            CONF_STATE_WRITE_INTERVAL, DEFAULT_STATE_WRITE_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+                    vol.Required(
+                        CONF_STALE_NODE_AGE,
+                        default=self.config_entry.options.get(
+                            CONF_STALE_NODE_AGE, DEFAULT_STALE_NODE_AGE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                }
+            ),
+        )
@@ -3,17 +3,34 @@ from logging import getLogger
 
 from homeassistant.const import Platform
 
+ATTR_ETA = "eta"
+ATTR_TIMEOUT = "timeout"
 ATTR_VELOCITY = "velocity"
+ATTR_WAIT = "wait"
+CONF_STALE_NODE_AGE = "stale_node_age"
+CONF_STATE_WRITE_INTERVAL = "state_write_interval"
+# Seconds without report after which the heartbeat refreshes a node, 0 is off
+DEFAULT_STALE_NODE_AGE = 0
+# Seconds between state writes of a moving node
+DEFAULT_STATE_WRITE_INTERVAL = 1.0
 DOMAIN = "velux"
-PLATFORMS = [
+EVENT_COMMAND_COMPLETED = "velux_command_completed"
+# Platforms are forwarded as soon as the data they need has been loaded
+GATEWAY_PLATFORMS = [
     Platform.BUTTON,
+    Platform.SENSOR,
+]
+NODE_PLATFORMS = [
     Platform.COVER,
     Platform.LIGHT,
     Platform.NUMBER,
-    Platform.SCENE,
-    Platform.SENSOR,
     Platform.SWITCH,
 ]
+SCENE_PLATFORMS = [
+    Platform.SCENE,
+]
+PLATFORMS = GATEWAY_PLATFORMS + NODE_PLATFORMS + SCENE_PLATFORMS
+SERVICE_DUMP_PROFILE = "dump_profile"
 UPPER_COVER = "upper"
 LOWER_COVER = "lower"
 DUAL_COVER = "dual"
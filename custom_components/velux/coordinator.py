@@ -0,0 +1,210 @@
+"""Limitation coordinator shared by all Velux windows of a KLF200."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import timedelta
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from pyvlx import Parameter, Position, PyVLX
+from pyvlx.api.frames import (
+    FrameBase,
+    FrameCommandRunStatusNotification,
+    FrameNodeStatePositionChangedNotification,
+    FrameStatusRequestNotification,
+)
+from pyvlx.const import OperatingState, StatusId, StatusReply
+from pyvlx.exception import PyVLXException
+from pyvlx.opening_device import Window
+
+from .const import LOGGER
+from .node_index import VeluxNodeIndex
+
+# Limitations are refreshed on gateway notifications, polling is only a fallback.
+DEFAULT_SCAN_INTERVAL = timedelta(minutes=10)
+MAX_SCAN_INTERVAL = timedelta(hours=1)
+# Pause between two limitation requests of one sweep, gives user commands a chance.
+LIMITATION_REQUEST_SPACING = 0.5
+# Delay (seconds) between a notification and the limitation request, lets the
+# node settle and merges notifications of several windows into one refresh.
+LIMITATION_EVENT_DELAY = 2.0
+
+LIMITATION_STATUS_IDS = (StatusId.STATUS_RAIN, StatusId.STATUS_WIND)
+LIMITATION_STATUS_REPLIES = (
+    StatusReply.PARAMETER_LIMITED,
+    StatusReply.LIMITATION_BY_LOCAL_USER,
+    StatusReply.LIMITATION_BY_USER,
+    StatusReply.LIMITATION_BY_RAIN,
+    StatusReply.LIMITATION_BY_TIMER,
+    StatusReply.LIMITATION_BY_UPS,
+    StatusReply.LIMITATION_BY_UNKNOWN_DEVICE,
+    StatusReply.LIMITATION_BY_SAAC,
+    StatusReply.LIMITATION_BY_WIND,
+    StatusReply.LIMITATION_BY_MYSELF,
+    StatusReply.LIMITATION_BY_AUTOMATIC_CYCLE,
+    StatusReply.LIMITATION_BY_EMERGENCY,
+)
+
+
+@dataclass(frozen=True)
+class VeluxLimitation:
+    """Limitation of the main parameter of a window."""
+
+    min_value: int
+    max_value: int
+
+
+class VeluxLimitationCoordinator(DataUpdateCoordinator[dict[int, VeluxLimitation]]):
+    """Keep the limitations of all windows of one KLF200 up to date.
+
+    Limitations of single windows are refreshed when a notification of the
+    gateway implies a change (a movement ended, a rain or wind sensor acted).
+    A staggered sweep over all windows remains as a slow safety poll.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        pyvlx: PyVLX,
+        node_index: VeluxNodeIndex,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            LOGGER,
+            config_entry=entry,
+            name=f"{entry.unique_id} limitation",
+            update_interval=DEFAULT_SCAN_INTERVAL,
+        )
+        self.pyvlx: PyVLX = pyvlx
+        self.node_index: VeluxNodeIndex = node_index
+        self._moving: set[int] = set()
+        self._requested: set[int] = set()
+        self._request_handle: asyncio.TimerHandle | None = None
+        self._refresh_tasks: set[asyncio.Task[None]] = set()
+
+    async def _async_fetch(self, node: Window) -> VeluxLimitation | None:
+        """Request the limitation of a single window."""
+        try:
+            limitation = await node.get_limitation()
+        except PyVLXException:
+            LOGGER.error("Error fetch limitation data for cover %s", node.name)
+            return None
+        return VeluxLimitation(
+            min_value=limitation.min_value, max_value=limitation.max_value
+        )
+
+    async def _async_update_data(self) -> dict[int, VeluxLimitation]:
+        """Fetch limitations of all windows, one request at a time."""
+        if not self.pyvlx.get_connected():
+            raise UpdateFailed("KLF200 is not connected")
+
+        previous: dict[int, VeluxLimitation] = self.data or {}
+        limitations: dict[int, VeluxLimitation] = {}
+        for index, node in enumerate(list(self.node_index.windows.values())):
+            if index:
+                await asyncio.sleep(LIMITATION_REQUEST_SPACING)
+            limitation = await self._async_fetch(node)
+            if limitation is None:
+                limitation = previous.get(node.node_id)
+            if limitation is not None:
+                limitations[node.node_id] = limitation
+
+        # Back off while limitations stay the same, poll faster once they change.
+        if limitations == previous:
+            self.update_interval = min(self.update_interval * 2, MAX_SCAN_INTERVAL)
+        else:
+            self.update_interval = DEFAULT_SCAN_INTERVAL
+        return limitations
+
+    @callback
+    def start_event_updates(self) -> None:
+        """Listen to gateway notifications implying a limitation change."""
+        self.pyvlx.connection.register_frame_received_cb(self._async_frame_received)
+
+    @callback
+    def stop_event_updates(self) -> None:
+        """Stop listening to gateway notifications."""
+        self.pyvlx.connection.unregister_frame_received_cb(self._async_frame_received)
+        if self._request_handle is not None:
+            self._request_handle.cancel()
+            self._request_handle = None
+        self._requested.clear()
+        for task in self._refresh_tasks:
+            task.cancel()
+
+    async def _async_frame_received(self, frame: FrameBase) -> None:
+        """Check whether a frame implies a changed limitation of a window."""
+        if isinstance(frame, FrameNodeStatePositionChangedNotification):
+            node_id = frame.node_id
+            if (
+                frame.state == OperatingState.EXECUTING
+                or frame.remaining_time > 0
+            ):
+                self._moving.add(node_id)
+                return
+            position = Position(frame.current_position).position
+            target = Position(frame.target).position
+            stopped_short = (
+                position <= Parameter.MAX
+                and target <= Parameter.MAX
+                and position != target
+            )
+            if node_id in self._moving or stopped_short:
+                self._moving.discard(node_id)
+                self._async_request_limitation(node_id)
+        elif isinstance(frame, FrameStatusRequestNotification):
+            if (
+                frame.status_reply in LIMITATION_STATUS_REPLIES
+                or StatusId(frame.status_id) in LIMITATION_STATUS_IDS
+            ):
+                self._async_request_limitation(frame.node_id)
+        elif isinstance(frame, FrameCommandRunStatusNotification):
+            if frame.status_id is not None and (
+                StatusId(frame.status_id) in LIMITATION_STATUS_IDS
+            ):
+                self._async_request_limitation(frame.index_id)
+
+    @callback
+    def _async_request_limitation(self, node_id: int | None) -> None:
+        """Schedule a limitation request for a window."""
+        if node_id not in self.node_index.windows:
+            return
+        self._requested.add(node_id)
+        if self._request_handle is None:
+            self._request_handle = self.hass.loop.call_later(
+                LIMITATION_EVENT_DELAY, self._async_start_requested_refresh
+            )
+
+    @callback
+    def _async_start_requested_refresh(self) -> None:
+        """Start refreshing the windows requested since the last run."""
+        self._request_handle = None
+        node_ids, self._requested = self._requested, set()
+        # Cancelled when the entry is unloaded
+        task = self.config_entry.async_create_background_task(
+            self.hass,
+            self._async_refresh_nodes(node_ids),
+            "velux limitation event refresh",
+        )
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _async_refresh_nodes(self, node_ids: set[int]) -> None:
+        """Fetch limitations of some windows and publish them if changed."""
+        limitations = dict(self.data or {})
+        windows = self.node_index.windows
+        for index, node in enumerate(
+            [windows[node_id] for node_id in node_ids if node_id in windows]
+        ):
+            if index:
+                await asyncio.sleep(LIMITATION_REQUEST_SPACING)
+            limitation = await self._async_fetch(node)
+            if limitation is not None:
+                limitations[node.node_id] = limitation
+        if limitations != (self.data or {}):
+            LOGGER.debug("Limitation changed for nodes %s", sorted(node_ids))
+            self.async_set_updated_data(limitations)
@@ -2,11 +2,13 @@
 from __future__ import annotations
 
 import asyncio
-import inspect
 import logging
-from datetime import timedelta
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
 from typing import Any
 
+import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 from homeassistant.components.cover import (
     ATTR_POSITION,
@@ -21,15 +23,19 @@ from homeassistant.const import (
     SERVICE_OPEN_COVER,
     SERVICE_SET_COVER_POSITION,
 )
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import (
     AddEntitiesCallback,
     EntityPlatform,
     async_get_current_platform,
 )
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from pyvlx import Position, PyVLX
-from pyvlx.api.get_limitation import GetLimitation
+from homeassistant.helpers.event import async_call_later
+from pyvlx import Position
+from pyvlx.parameter import (
+    DualRollerShutterPosition,
+    IgnorePosition,
+    TargetPosition,
+)
 from pyvlx.exception import PyVLXException
 from pyvlx.opening_device import (
     Awning,
@@ -42,11 +48,57 @@ from pyvlx.opening_device import (
     Window,
 )
 
-from .const import ATTR_VELOCITY, DOMAIN, DUAL_COVER, LOWER_COVER, UPPER_COVER, LOGGER
+from .capabilities import VeluxNodeCapabilities, get_node_capabilities
+from .const import (
+    ATTR_ETA,
+    ATTR_TIMEOUT,
+    ATTR_VELOCITY,
+    ATTR_WAIT,
+    DOMAIN,
+    DUAL_COVER,
+    LOWER_COVER,
+    UPPER_COVER,
+    LOGGER,
+)
+from .coordinator import VeluxLimitation, VeluxLimitationCoordinator
+from .dispatcher import VeluxCommandDispatcher, velocity_parameter
+from .models import VeluxData
 from .node_entity import VeluxNodeEntity
+from .node_index import VeluxNodeIndex
+from .profiler import KIND_COORDINATOR_LISTENER
+from .scheduler import (
+    ALL_CHANNELS,
+    CHANNEL_FP1,
+    CHANNEL_FP2,
+    CHANNEL_FP3,
+    CHANNEL_MAIN,
+    PRIORITY_STOP,
+)
+from .sessions import (
+    COVER_SESSION_TIMEOUT,
+    TrackedCommandSend,
+    VeluxCommandSession,
+)
+from .travel import VeluxTravelPrediction
 
-PARALLEL_UPDATES = 1
-DEFAULT_SCAN_INTERVAL = timedelta(minutes=2)
+# Commands are paced by the per gateway dispatcher and scheduler.
+PARALLEL_UPDATES = 0
+# Minimum seconds between state writes of a predicted position.
+PREDICTION_REFRESH_INTERVAL = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class VeluxCoverState:
+    """State of a cover as rendered from its node."""
+
+    position: int
+    closed: bool
+    opening: bool
+    closing: bool
+    available: bool
+    tilt_position: int | None = None
+    # Expected end of a move with a predicted position
+    eta: datetime | None = None
 
 
 async def async_setup_entry(
@@ -54,24 +106,27 @@ async def async_setup_entry(
 ) -> None:
     """Set up cover(s) for Velux platform."""
     entities: list = []
-    pyvlx: PyVLX = hass.data[DOMAIN][entry.entry_id]
-    for node in pyvlx.nodes:
-        if isinstance(node, DualRollerShutter):
-            entities.append(VeluxDualRollerShutter(node, entry, subtype=DUAL_COVER))
-            LOGGER.debug("Cover added: %s_%s", node.name, DUAL_COVER)
-            entities.append(VeluxDualRollerShutter(node, entry, subtype=UPPER_COVER))
-            LOGGER.debug("Cover added: %s_%s", node.name, UPPER_COVER)
-            entities.append(VeluxDualRollerShutter(node, entry, subtype=LOWER_COVER))
-            LOGGER.debug("Cover added: %s_%s", node.name, LOWER_COVER)
-        elif isinstance(node, Window):
-            LOGGER.debug("Window will be added: %s", node.name)
-            entities.append(VeluxWindow(hass, node, entry))
-        elif isinstance(node, Blind):
-            LOGGER.debug("Blind will be added: %s", node.name)
-            entities.append(VeluxBlind(node, entry))
-        elif isinstance(node, (OpeningDevice, Blind)):
-            LOGGER.debug("Cover will be added: %s", node.name)
-            entities.append(VeluxCover(node, entry))
+    data: VeluxData = hass.data[DOMAIN][entry.entry_id]
+    node_index: VeluxNodeIndex = data.node_index
+    dispatcher: VeluxCommandDispatcher = data.dispatcher
+    for node in node_index.dual_roller_shutters.values():
+        listener = VeluxDualRollerShutterListener(node)
+        for subtype in (DUAL_COVER, UPPER_COVER, LOWER_COVER):
+            entities.append(
+                VeluxDualRollerShutter(node, entry, dispatcher, subtype, listener)
+            )
+            LOGGER.debug("Cover added: %s_%s", node.name, subtype)
+    for node in node_index.windows.values():
+        LOGGER.debug("Window will be added: %s", node.name)
+        entities.append(
+            VeluxWindow(node, entry, dispatcher, data.limitation_coordinator)
+        )
+    for node in node_index.blinds.values():
+        LOGGER.debug("Blind will be added: %s", node.name)
+        entities.append(VeluxBlind(node, entry, dispatcher))
+    for node in node_index.opening_devices.values():
+        LOGGER.debug("Cover will be added: %s", node.name)
+        entities.append(VeluxCover(node, entry, dispatcher))
     async_add_entities(entities)
 
     platform: EntityPlatform = async_get_current_platform()
@@ -80,7 +135,11 @@ async def async_setup_entry(
         {
             vol.Optional(ATTR_VELOCITY): vol.All(
                 vol.Coerce(int), vol.Range(min=0, max=100)
-            )
+            ),
+            vol.Optional(ATTR_WAIT, default=False): cv.boolean,
+            vol.Optional(ATTR_TIMEOUT): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=3600)
+            ),
         },
         "async_open_cover",
         [CoverEntityFeature.OPEN],
@@ -91,7 +150,11 @@ async def async_setup_entry(
         {
             vol.Optional(ATTR_VELOCITY): vol.All(
                 vol.Coerce(int), vol.Range(min=0, max=100)
-            )
+            ),
+            vol.Optional(ATTR_WAIT, default=False): cv.boolean,
+            vol.Optional(ATTR_TIMEOUT): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=3600)
+            ),
         },
         "async_close_cover",
         [CoverEntityFeature.CLOSE],
@@ -106,6 +169,10 @@ async def async_setup_entry(
             vol.Optional(ATTR_VELOCITY): vol.All(
                 vol.Coerce(int), vol.Range(min=0, max=100)
             ),
+            vol.Optional(ATTR_WAIT, default=False): cv.boolean,
+            vol.Optional(ATTR_TIMEOUT): vol.All(
+                vol.Coerce(float), vol.Range(min=0, max=3600)
+            ),
         },
         "async_set_cover_position",
         [CoverEntityFeature.SET_POSITION],
@@ -115,10 +182,17 @@ async def async_setup_entry(
 class VeluxCover(VeluxNodeEntity, CoverEntity):
     """Representation of a Velux cover."""
 
-    def __init__(self, node: OpeningDevice, entry: ConfigEntry) -> None:
+    def __init__(
+        self,
+        node: OpeningDevice,
+        entry: ConfigEntry,
+        dispatcher: VeluxCommandDispatcher,
+    ) -> None:
         """Initialize VeluxCover."""
         super().__init__(node, entry)
         self.node: OpeningDevice = node
+        self.dispatcher: VeluxCommandDispatcher = dispatcher
+        self.capabilities: VeluxNodeCapabilities = get_node_capabilities(node)
         if isinstance(node, Awning):
             self._attr_device_class = CoverDeviceClass.AWNING
         if isinstance(node, GarageDoor):
@@ -128,6 +202,7 @@ class VeluxCover(VeluxNodeEntity, CoverEntity):
         if isinstance(node, RollerShutter):
             self._attr_device_class = CoverDeviceClass.SHUTTER
         self.is_looping_while_moving: bool = False
+        self._unsub_prediction_refresh: CALLBACK_TYPE | None = None
 
     @property
     def supported_features(self) -> CoverEntityFeature:
@@ -139,107 +214,234 @@ class VeluxCover(VeluxNodeEntity, CoverEntity):
             | CoverEntityFeature.STOP
         )
 
+    def _render_tilt_position(self) -> int | None:
+        """Return the current tilt position in percent open."""
+        return None
+
+    def _render_state(self) -> VeluxCoverState:
+        """Return the state of the cover read from the node."""
+        # Moving nodes with a learned travel time report a predicted position
+        prediction: VeluxTravelPrediction | None = (
+            self.data.travel_times.async_predict(self.node)
+        )
+        if prediction is None:
+            position = self.node.get_position().position_percent
+        else:
+            position = prediction.position_percent
+        return VeluxCoverState(
+            position=100 - position,
+            closed=self.node.position.closed,
+            opening=self.node.is_opening,
+            closing=self.node.is_closing,
+            available=self.node.is_available,
+            tilt_position=self._render_tilt_position(),
+            eta=prediction.eta if prediction is not None else None,
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes, the eta only while it is predicted."""
+        eta = self.state_snapshot.eta
+        if eta is None:
+            return {}
+        return {ATTR_ETA: eta}
+
+    @callback
+    def _async_write_state_now(self) -> None:
+        """Write the state and keep refreshing a predicted position."""
+        super()._async_write_state_now()
+        self._async_schedule_prediction_refresh()
+
+    @callback
+    def _async_schedule_prediction_refresh(self) -> None:
+        """Render the state again later while the position is predicted."""
+        if self.state_snapshot.eta is None or self._unsub_prediction_refresh:
+            return
+        self._unsub_prediction_refresh = async_call_later(
+            self.hass,
+            max(self.state_write_interval, PREDICTION_REFRESH_INTERVAL),
+            self._async_refresh_prediction,
+        )
+
+    async def _async_refresh_prediction(self, _now: Any) -> None:
+        """Render the predicted position again."""
+        self._unsub_prediction_refresh = None
+        await self.after_update_callback(self.node)
+        self._async_schedule_prediction_refresh()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop refreshing a predicted position."""
+        await super().async_will_remove_from_hass()
+        if self._unsub_prediction_refresh is not None:
+            self._unsub_prediction_refresh()
+            self._unsub_prediction_refresh = None
+
     @property
     def current_cover_position(self) -> int:
         """Return the current position of the cover."""
-        return 100 - self.node.get_position().position_percent
+        return self.state_snapshot.position
 
     @property
     def is_closed(self) -> bool:
         """Return true if the cover is closed."""
-        return self.node.position.closed
+        return self.state_snapshot.closed
 
     @property
     def is_opening(self) -> bool:
         """Return if the cover is closing or not."""
-        return self.node.is_opening
+        return self.state_snapshot.opening
 
     @property
     def is_closing(self) -> bool:
         """Return if the cover is opening or not."""
-        return self.node.is_closing
+        return self.state_snapshot.closing
+
+    def is_moving(self) -> bool:
+        """Return True while the cover is moving."""
+        return self.node.is_moving()
 
     @property
     def available(self) -> bool:
         """Return entity availability."""
-        return self.node.is_available
+        return self.state_snapshot.available
 
     async def async_close_cover(self, **kwargs: Any) -> None:
         """Close the cover."""
-        close_args: dict[str, Any] = {"wait_for_completion": False}
-        if (
-            "velocity" in kwargs
-            and "velocity" in inspect.getfullargspec(self.node.close).args
-        ):
-            close_args["velocity"] = kwargs["velocity"]
-        await self.node.close(**close_args)
+        await self._async_move(
+            Position(position_percent=self.node.close_position_target), **kwargs
+        )
 
     async def async_open_cover(self, **kwargs: Any) -> None:
         """Open the cover."""
-        open_args: dict[str, Any] = {"wait_for_completion": False}
-        if (
-            "velocity" in kwargs
-            and "velocity" in inspect.getfullargspec(self.node.open).args
-        ):
-            open_args["velocity"] = kwargs["velocity"]
-        await self.node.open(**open_args)
+        await self._async_move(
+            Position(position_percent=self.node.open_position_target), **kwargs
+        )
 
     async def async_set_cover_position(self, **kwargs: Any) -> None:
         """Move the cover to a specific position."""
         if ATTR_POSITION in kwargs:
             position_percent: int = 100 - kwargs[ATTR_POSITION]
-            position: Position = Position(position_percent=position_percent)
-            set_pos_args: dict[str, Any] = {"wait_for_completion": False}
-            if (
-                "velocity" in kwargs
-                and "velocity" in inspect.getfullargspec(self.node.set_position).args
-            ):
-                set_pos_args["velocity"] = kwargs["velocity"]
-            await self.node.set_position(position, **set_pos_args)
+            await self._async_move(
+                Position(position_percent=position_percent), **kwargs
+            )
+
+    async def _async_move(self, target: Position, **kwargs: Any) -> None:
+        """Move the cover to target, wait if the service call asked for it."""
+        velocity: int | None = kwargs.get(ATTR_VELOCITY)
+        if self.capabilities.coalesce:
+            session = await self.dispatcher.async_set_position(
+                self.node, target, velocity
+            )
+        else:
+            session = await self._async_send_position(target, velocity)
+        await self._async_wait(session, **kwargs)
+
+    @property
+    def _channels(self) -> tuple[int, ...]:
+        """Return the channels set by the position commands of this cover."""
+        return (CHANNEL_MAIN,)
+
+    def _position_command(
+        self, position: Position, velocity: int | None
+    ) -> dict[str, Any]:
+        """Return the TrackedCommandSend arguments moving the node to position."""
+        return self._with_velocity({"parameter": position}, velocity)
+
+    def _with_velocity(
+        self, command: dict[str, Any], velocity: int | None
+    ) -> dict[str, Any]:
+        """Add the functional parameter setting velocity to command."""
+        name = self.capabilities.velocity_parameter
+        if name is not None:
+            parameter = velocity_parameter(self.node, velocity)
+            if parameter is not None:
+                command[name] = parameter
+        return command
+
+    def _position_sent(self, position: Position) -> None:
+        """Update the node once the gateway accepted a move to position."""
+
+    async def _async_send_position(
+        self, position: Position, velocity: int | None
+    ) -> VeluxCommandSession | None:
+        """Send a move to position and track the session it opens.
+
+        Returns None if the command was superseded before it was sent.
+        """
+        tracker = self.data.session_tracker
+        command = TrackedCommandSend(
+            pyvlx=self.node.pyvlx,
+            tracker=tracker,
+            node_id=self.node.node_id,
+            session_timeout=COVER_SESSION_TIMEOUT,
+            target=position,
+            wait_for_completion=False,
+            **self._position_command(position, velocity),
+        )
+
+        async def async_send() -> VeluxCommandSession | None:
+            await command.send()
+            self._position_sent(position)
+            await self.node.after_update()
+            return command.session
+
+        try:
+            await self.async_run_command(async_send, channels=self._channels)
+        except (OSError, PyVLXException):
+            if command.session is not None:
+                tracker.async_discard(command.session)
+            raise
+        return command.session
+
+    async def _async_wait(
+        self, session: VeluxCommandSession | None, **kwargs: Any
+    ) -> None:
+        """Wait for the end of session if the service call asked for it."""
+        if session is None or not kwargs.get(ATTR_WAIT):
+            return
+        timeout = kwargs.get(ATTR_TIMEOUT, COVER_SESSION_TIMEOUT)
+        try:
+            async with asyncio.timeout(timeout):
+                await asyncio.shield(session.future)
+        except TimeoutError:
+            LOGGER.debug("%s did not finish within %s s", self.name, timeout)
 
     async def async_stop_cover(self, **kwargs: Any) -> None:
         """Stop the cover."""
-        await self.node.stop(wait_for_completion=False)
+        # Stop jumps the queue and drops targets which were not sent yet
+        self.dispatcher.async_cancel(self.node)
+        await self.async_run_command(
+            partial(self.node.stop, wait_for_completion=False),
+            priority=PRIORITY_STOP,
+            channels=ALL_CHANNELS,
+        )
 
 
 class VeluxWindow(VeluxCover):
     """Representation of a Velux window."""
 
-    def __init__(self, hass: HomeAssistant, node: Window, entry: ConfigEntry) -> None:
+    def __init__(
+        self,
+        node: Window,
+        entry: ConfigEntry,
+        dispatcher: VeluxCommandDispatcher,
+        coordinator: VeluxLimitationCoordinator,
+    ) -> None:
         """Initialize Velux window."""
-        super().__init__(node, entry)
+        super().__init__(node, entry, dispatcher)
         self._attr_device_class = CoverDeviceClass.WINDOW
-        self._hass: HomeAssistant = hass
-        self._extra_attr_limitation_min: int | None = None
-        self._extra_attr_limitation_max: int | None = None
-
-        self.coordinator: DataUpdateCoordinator = DataUpdateCoordinator(
-            self._hass,
-            LOGGER,
-            name=self.unique_id,
-            update_method=self.async_update_limitation,
-            update_interval=DEFAULT_SCAN_INTERVAL,
-        )
-
-    async def async_init(self):
-        """Async initialize."""
-        return await self.coordinator.async_config_entry_first_refresh()
-
-    async def async_update_limitation(self):
-        """Get the updated status of the cover (limitations only)."""
-        try:
-            limitation: GetLimitation = await self.node.get_limitation()
-            self._extra_attr_limitation_min = limitation.min_value
-            self._extra_attr_limitation_max = limitation.max_value
-        except PyVLXException:
-            LOGGER.error("Error fetch limitation data for cover %s", self.name)
+        self.coordinator: VeluxLimitationCoordinator = coordinator
 
     @property
-    def extra_state_attributes(self) -> dict[str, int | None]:
+    def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
+        limitation: VeluxLimitation | None = None
+        if self.coordinator.data is not None:
+            limitation = self.coordinator.data.get(self.node.node_id)
         return {
-            "limitation_min": self._extra_attr_limitation_min,
-            "limitation_max": self._extra_attr_limitation_max,
+            **super().extra_state_attributes,
+            "limitation_min": limitation.min_value if limitation else None,
+            "limitation_max": limitation.max_value if limitation else None,
         }
 
     async def async_added_to_hass(self) -> None:
@@ -252,7 +454,8 @@ class VeluxWindow(VeluxCover):
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
-        self.async_write_ha_state()
+        with self.data.profiler.timed(KIND_COORDINATOR_LISTENER, type(self).__name__):
+            self.async_write_ha_state()
 
     async def async_update(self) -> None:
         """Update the entity.
@@ -262,6 +465,81 @@ class VeluxWindow(VeluxCover):
         await self.coordinator.async_request_refresh()
 
 
+class VeluxDualRollerShutterListener:
+    """Single updated callback of a dual roller shutter node.
+
+    The node is represented by a dual, an upper and a lower cover, only the
+    covers whose curtain changed are updated. The direction of each curtain
+    is taken from its own changes while the node is moving.
+    """
+
+    def __init__(self, node: DualRollerShutter) -> None:
+        """Initialize the listener."""
+        self.node: DualRollerShutter = node
+        self.entities: list[VeluxDualRollerShutter] = []
+        self._positions = self._read_positions()
+        self._available = node.is_available
+        # Covers whose curtain moved during the current movement of the node
+        self.opening: set[str] = set()
+        self.closing: set[str] = set()
+
+    def add(self, entity: VeluxDualRollerShutter) -> None:
+        """Pass node updates to entity."""
+        if not self.entities:
+            self.node.register_device_updated_cb(self.after_update_callback)
+        self.entities.append(entity)
+
+    def remove(self, entity: VeluxDualRollerShutter) -> None:
+        """Stop passing node updates to entity."""
+        self.entities.remove(entity)
+        if not self.entities:
+            self.node.unregister_device_updated_cb(self.after_update_callback)
+
+    def _read_positions(self) -> dict[str, int]:
+        """Return the raw position of the curtain(s) of each cover."""
+        return {
+            DUAL_COVER: self.node.position.position,
+            UPPER_COVER: self.node.position_upper_curtain.position,
+            LOWER_COVER: self.node.position_lower_curtain.position,
+        }
+
+    async def after_update_callback(self, device: DualRollerShutter) -> None:
+        """Update the covers affected by a node update."""
+        positions = self._read_positions()
+        previous, self._positions = self._positions, positions
+        changed = {
+            subtype
+            for subtype, position in positions.items()
+            if position != previous[subtype]
+        }
+        was_moving = self.opening | self.closing
+        if self.node.is_moving():
+            for subtype in changed:
+                if max(positions[subtype], previous[subtype]) > Position.MAX:
+                    continue
+                # Higher values are further closed
+                if positions[subtype] > previous[subtype]:
+                    self.opening.discard(subtype)
+                    self.closing.add(subtype)
+                else:
+                    self.closing.discard(subtype)
+                    self.opening.add(subtype)
+        else:
+            self.opening.clear()
+            self.closing.clear()
+        moving = self.opening | self.closing
+        available = self.node.is_available
+        available_changed = available != self._available
+        self._available = available
+        for entity in self.entities:
+            if (
+                available_changed
+                or entity.subtype in changed
+                or (entity.subtype in moving) != (entity.subtype in was_moving)
+            ):
+                await entity.after_update_callback(device)
+
+
 class VeluxDualRollerShutter(VeluxCover):
     """Representation of a Velux dual roller shutter."""
 
@@ -269,14 +547,72 @@ class VeluxDualRollerShutter(VeluxCover):
         self,
         node: DualRollerShutter,
         entry: ConfigEntry,
+        dispatcher: VeluxCommandDispatcher,
         subtype: str,
+        listener: VeluxDualRollerShutterListener,
     ) -> None:
         """Initialize Velux dual roller shutter."""
-        super().__init__(node, entry)
+        super().__init__(node, entry, dispatcher)
         self.node: DualRollerShutter = node
         self.subtype = subtype
+        self.listener: VeluxDualRollerShutterListener = listener
         self._attr_device_class = CoverDeviceClass.SHUTTER
 
+    @property
+    def _channels(self) -> tuple[int, ...]:
+        """Return the channels set by the position commands of this cover."""
+        if self.subtype == UPPER_COVER:
+            return (CHANNEL_FP1,)
+        if self.subtype == LOWER_COVER:
+            return (CHANNEL_FP2,)
+        return (CHANNEL_MAIN, CHANNEL_FP1, CHANNEL_FP2)
+
+    def _position_command(
+        self, position: Position, velocity: int | None
+    ) -> dict[str, Any]:
+        """Return the arguments moving the curtain(s) of this cover.
+
+        A single curtain is addressed by its functional parameter, the other
+        one keeps its target.
+        """
+        command: dict[str, Any]
+        if self.subtype == UPPER_COVER:
+            command = {
+                "parameter": DualRollerShutterPosition(),
+                "active_parameter": CHANNEL_FP1,
+                "parameter_id": CHANNEL_FP1,
+                "fp1": position,
+                "fp2": TargetPosition(),
+            }
+        elif self.subtype == LOWER_COVER:
+            command = {
+                "parameter": DualRollerShutterPosition(),
+                "active_parameter": CHANNEL_FP2,
+                "parameter_id": CHANNEL_FP2,
+                "fp1": TargetPosition(),
+                "fp2": position,
+            }
+        else:
+            command = {"parameter": position}
+        return self._with_velocity(command, velocity)
+
+    def _position_sent(self, position: Position) -> None:
+        """Store the target of the curtain(s) in the node."""
+        if self.subtype == UPPER_COVER:
+            self.node.position_upper_curtain = position
+        elif self.subtype == LOWER_COVER:
+            self.node.position_lower_curtain = position
+        else:
+            self.node.position = position
+
+    def _register_updated_cb(self) -> None:
+        """Receive node updates through the listener shared with the curtains."""
+        self.listener.add(self)
+
+    def _unregister_updated_cb(self) -> None:
+        """Stop receiving node updates."""
+        self.listener.remove(self)
+
     @property
     def unique_id(self) -> str:
         """Return the unique ID of this entity."""
@@ -294,61 +630,38 @@ class VeluxDualRollerShutter(VeluxCover):
             return self.node.name + "_" + self.subtype
         return self.node.name
 
-    @property
-    def current_cover_position(self) -> int:
-        """Return the current position of the cover."""
+    def _render_state(self) -> VeluxCoverState:
+        """Return the state of the curtain(s) of this cover."""
         if self.subtype == UPPER_COVER:
-            return 100 - self.node.position_upper_curtain.position_percent
-        if self.subtype == LOWER_COVER:
-            return 100 - self.node.position_lower_curtain.position_percent
-        return 100 - self.node.get_position().position_percent
-
-    async def async_close_cover(self, **kwargs: Any) -> None:
-        """Close the cover."""
-        close_args: dict[str, Any] = {"wait_for_completion": False}
-        if (
-            "velocity" in kwargs
-            and "velocity" in inspect.getfullargspec(self.node.close).args
-        ):
-            close_args["velocity"] = kwargs["velocity"]
-        if self.subtype is not None:
-            close_args["curtain"] = self.subtype
-        await self.node.close(**close_args)
-
-    async def async_open_cover(self, **kwargs: Any) -> None:
-        """Open the cover."""
-        open_args: dict[str, Any] = {"wait_for_completion": False}
-        if (
-            "velocity" in kwargs
-            and "velocity" in inspect.getfullargspec(self.node.open).args
-        ):
-            open_args["velocity"] = kwargs["velocity"]
-        if self.subtype is not None:
-            open_args["curtain"] = self.subtype
-        await self.node.open(**open_args)
+            curtain = self.node.position_upper_curtain
+        elif self.subtype == LOWER_COVER:
+            curtain = self.node.position_lower_curtain
+        else:
+            curtain = self.node.get_position()
+        return VeluxCoverState(
+            position=100 - curtain.position_percent,
+            closed=curtain.closed,
+            opening=self.subtype in self.listener.opening,
+            closing=self.subtype in self.listener.closing,
+            available=self.node.is_available,
+        )
 
-    async def async_set_cover_position(self, **kwargs: Any) -> None:
-        """Move the cover to a specific position."""
-        if ATTR_POSITION in kwargs:
-            position_percent: int = 100 - kwargs[ATTR_POSITION]
-            position: Position = Position(position_percent=position_percent)
-            set_pos_args: dict[str, Any] = {"wait_for_completion": False}
-            if (
-                "velocity" in kwargs
-                and "velocity" in inspect.getfullargspec(self.node.set_position).args
-            ):
-                set_pos_args["velocity"] = kwargs["velocity"]
-            if self.subtype is not None:
-                set_pos_args["curtain"] = self.subtype
-            await self.node.set_position(position, **set_pos_args)
+    def is_moving(self) -> bool:
+        """Return True while the curtain(s) of this cover are moving."""
+        return (
+            self.subtype in self.listener.opening
+            or self.subtype in self.listener.closing
+        )
 
 
 class VeluxBlind(VeluxCover):
     """Representation of a Velux blind."""
 
-    def __init__(self, node: Blind, entry: ConfigEntry) -> None:
+    def __init__(
+        self, node: Blind, entry: ConfigEntry, dispatcher: VeluxCommandDispatcher
+    ) -> None:
         """Initialize Velux blind."""
-        super().__init__(node, entry)
+        super().__init__(node, entry, dispatcher)
         self.node: Blind = node
         self._attr_device_class = CoverDeviceClass.BLIND
         self._is_blind = True
@@ -367,27 +680,63 @@ class VeluxBlind(VeluxCover):
             | CoverEntityFeature.STOP_TILT
         )
 
+    def _render_tilt_position(self) -> int | None:
+        """Return the current tilt position in percent open."""
+        return 100 - self.node.orientation.position_percent
+
+    def _position_command(
+        self, position: Position, velocity: int | None
+    ) -> dict[str, Any]:
+        """Return the arguments moving the blind, keeping the orientation."""
+        command = super()._position_command(position, velocity)
+        # Fully opening also opens the slats, as pyvlx does
+        if position == Position(position_percent=0):
+            command["fp3"] = Position(position_percent=0)
+        else:
+            command["fp3"] = IgnorePosition()
+        return command
+
+    def _position_sent(self, position: Position) -> None:
+        """Store the target position in the node."""
+        self.node.target_position = position
+        self.node.position = position
+
     @property
     def current_cover_tilt_position(self) -> int | None:
         """Return the current position of the cover."""
-        return 100 - self.node.orientation.position_percent
+        return self.state_snapshot.tilt_position
 
     async def async_close_cover_tilt(self, **kwargs: Any) -> None:
         """Close cover tilt."""
-        await self.node.close_orientation(wait_for_completion=False)
+        await self.async_run_command(
+            partial(self.node.close_orientation, wait_for_completion=False),
+            channels=(CHANNEL_FP3,),
+        )
 
     async def async_open_cover_tilt(self, **kwargs: Any) -> None:
         """Open cover tilt."""
-        await self.node.open_orientation(wait_for_completion=False)
+        await self.async_run_command(
+            partial(self.node.open_orientation, wait_for_completion=False),
+            channels=(CHANNEL_FP3,),
+        )
 
     async def async_stop_cover_tilt(self, **kwargs: Any) -> None:
         """Stop cover tilt."""
-        await self.node.stop_orientation(wait_for_completion=False)
+        await self.async_run_command(
+            partial(self.node.stop_orientation, wait_for_completion=False),
+            priority=PRIORITY_STOP,
+            channels=(CHANNEL_FP3,),
+        )
 
     async def async_set_cover_tilt_position(self, **kwargs: Any) -> None:
         """Move cover tilt to a specific position."""
         position_percent: int = 100 - kwargs[ATTR_TILT_POSITION]
         orientation: Position = Position(position_percent=position_percent)
-        await self.node.set_orientation(
-            orientation=orientation, wait_for_completion=False
+        await self.async_run_command(
+            partial(
+                self.node.set_orientation,
+                orientation=orientation,
+                wait_for_completion=False,
+            ),
+            channels=(CHANNEL_FP3,),
         )
@@ -0,0 +1,106 @@
+"""Diagnostics support for Velux."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+from pyvlx import Node, OpeningDevice, PyVLX
+
+from .const import DOMAIN
+from .models import VeluxData
+
+TO_REDACT = {CONF_PASSWORD}
+
+
+def _node_to_dict(node: Node) -> dict[str, Any]:
+    """Return the node table entry of a node."""
+    node_data: dict[str, Any] = {
+        "node_id": node.node_id,
+        "type": type(node).__name__,
+        "name": node.name,
+        "serial_number": node.serial_number,
+    }
+    if isinstance(node, OpeningDevice):
+        node_data["position"] = str(node.position)
+        node_data["target"] = str(node.target)
+        node_data["moving"] = node.is_moving()
+    return node_data
+
+
+def _gateway_to_dict(pyvlx: PyVLX) -> dict[str, Any]:
+    """Return versions and connection state of the gateway."""
+    klf200 = pyvlx.klf200
+    return {
+        "connected": pyvlx.connection.connected,
+        "connection_counter": pyvlx.connection.connection_counter,
+        "house_status_monitor_enabled": klf200.house_status_monitor_enabled,
+        "version": None if klf200.version is None else str(klf200.version),
+        "protocol_version": (
+            None if klf200.protocol_version is None else str(klf200.protocol_version)
+        ),
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data: VeluxData = hass.data[DOMAIN][entry.entry_id]
+    telemetry = data.telemetry
+    heartbeat = data.heartbeat
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "gateway": _gateway_to_dict(data.pyvlx),
+        "connection": {
+            "command_latency": {
+                "p50": telemetry.latency_percentile(50),
+                "p90": telemetry.latency_percentile(90),
+                "p99": telemetry.latency_percentile(99),
+                "samples": telemetry.latency_samples,
+            },
+            "session_run_time": {
+                "p50": telemetry.run_time_percentile(50),
+                "p90": telemetry.run_time_percentile(90),
+                "p99": telemetry.run_time_percentile(99),
+                "samples": telemetry.run_time_samples,
+            },
+            "frames_per_minute": telemetry.frames_per_minute,
+            "last_frame": (
+                None if telemetry.last_frame is None else telemetry.last_frame.isoformat()
+            ),
+            "queue_depth": telemetry.queue_depth,
+            "commands_in_flight": telemetry.commands_in_flight,
+            "timeouts": telemetry.timeouts,
+            "errors": telemetry.errors,
+            "superseded_commands": data.scheduler.superseded_commands,
+            "confirmation_latency": data.session_tracker.confirmation_latency,
+            "suppressed_state_writes": data.suppressed_state_writes,
+            "unchanged_state_updates": data.unchanged_state_updates,
+        },
+        "heartbeat": {
+            "stopped": heartbeat.stopped,
+            "interval": heartbeat.interval,
+            "adaptive": heartbeat.adaptive,
+            "current_interval": heartbeat.current_interval,
+            "interval_reason": heartbeat.interval_reason,
+            "load_all_states": heartbeat.load_all_states,
+            "stale_age": heartbeat.stale_age,
+            "refreshed_nodes": heartbeat.refreshed_nodes,
+            "stale_nodes": heartbeat.stale_nodes,
+        },
+        "setup_timings": data.setup_timings,
+        "travel_times": data.travel_times.travel_times,
+        "nodes": [_node_to_dict(node) for node in data.pyvlx.nodes],
+        "scenes": [
+            {"scene_id": scene.scene_id, "name": scene.name}
+            for scene in data.pyvlx.scenes
+        ],
+        "trace": data.trace.as_dict(),
+        "profile": data.profiler.as_dict(),
+    }
@@ -0,0 +1,83 @@
+"""KLF200 gateways found on the network, shared by the config flows."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from homeassistant.components import zeroconf
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.singleton import singleton
+from pyvlx.discovery import VeluxDiscovery, VeluxHost
+
+from .const import DOMAIN, LOGGER
+
+DATA_DISCOVERY = f"{DOMAIN}_discovery"
+# Seconds a found gateway and a scan finding gateways are reused
+DISCOVERY_TTL = 300
+# Seconds the scan collects answers of all gateways
+DISCOVERY_WAIT = 3
+# Seconds after which a scan without any answer gives up
+DISCOVERY_TIMEOUT = 10
+
+
+class VeluxDiscoveryCache:
+    """Collect gateways from mDNS scans and discovery flows.
+
+    A scan resolves every answering gateway in parallel and is repeated at
+    most once per DISCOVERY_TTL, a scan without answers is repeated on the
+    next request. Gateways announced by DHCP or zeroconf are added as the
+    discovery flows see them.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self._hass = hass
+        # Gateways by address with the time they were last seen
+        self._hosts: dict[str, tuple[VeluxHost, float]] = {}
+        self._scanned: float | None = None
+        self._lock = asyncio.Lock()
+
+    @callback
+    def async_add_host(self, hostname: str, ip_address: str) -> None:
+        """Remember a gateway seen by a discovery flow."""
+        self._hosts[ip_address] = (
+            VeluxHost(hostname=hostname, ip_address=ip_address),
+            time.monotonic(),
+        )
+
+    async def async_get_hosts(self) -> list[VeluxHost]:
+        """Return the gateways seen within DISCOVERY_TTL, scan if it expired."""
+        async with self._lock:
+            now = time.monotonic()
+            if self._scanned is None or now - self._scanned > DISCOVERY_TTL:
+                if await self._async_scan():
+                    self._scanned = now
+        expired = time.monotonic() - DISCOVERY_TTL
+        for ip_address, (_, seen) in list(self._hosts.items()):
+            if seen < expired:
+                del self._hosts[ip_address]
+        return [host for host, _ in self._hosts.values()]
+
+    async def _async_scan(self) -> bool:
+        """Browse for all gateways for DISCOVERY_WAIT seconds.
+
+        Return whether any gateway answered.
+        """
+        aiozc = await zeroconf.async_get_async_instance(self._hass)
+        discovery = VeluxDiscovery(zeroconf=aiozc)
+        if not await discovery.async_discover_hosts(
+            timeout=DISCOVERY_TIMEOUT, min_wait_time=DISCOVERY_WAIT
+        ):
+            LOGGER.debug("No KLF200 answered within %s s", DISCOVERY_TIMEOUT)
+            return False
+        for host in discovery.hosts:
+            self.async_add_host(host.hostname, host.ip_address)
+        LOGGER.debug("Discovered %s", [host.ip_address for host in discovery.hosts])
+        return True
+
+
+@callback
+@singleton(DATA_DISCOVERY)
+def async_get_discovery(hass: HomeAssistant) -> VeluxDiscoveryCache:
+    """Return the discovery cache shared by all flows."""
+    return VeluxDiscoveryCache(hass)
@@ -0,0 +1,294 @@
+"""Command dispatcher coalescing simultaneous cover commands per KLF200."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from functools import partial
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from pyvlx import Parameter, Position, PyVLX
+from pyvlx.api.frames import FrameCommandSendRequest
+from pyvlx.api.session_id import get_new_session_id
+from pyvlx.const import Velocity
+from pyvlx.exception import PyVLXException
+from pyvlx.opening_device import OpeningDevice
+
+from .capabilities import get_node_capabilities
+from .const import LOGGER
+from .scheduler import VeluxCommandScheduler
+from .sessions import (
+    COVER_SESSION_TIMEOUT,
+    TrackedCommandSend,
+    VeluxCommandSession,
+    VeluxSessionTracker,
+)
+
+# Commands arriving within this window (seconds) are sent together.
+COMMAND_COALESCE_WINDOW = 0.05
+# The KLF200 accepts at most 20 node ids in one GW_COMMAND_SEND_REQ.
+MAX_NODES_PER_COMMAND = 20
+
+
+def velocity_parameter(
+    node: OpeningDevice, velocity: Velocity | int | None
+) -> Parameter | None:
+    """Return the functional parameter setting velocity for node, as pyvlx does."""
+    if velocity is None and node.use_default_velocity:
+        velocity = node.default_velocity
+    if isinstance(velocity, Velocity):
+        if velocity is Velocity.SILENT:
+            return Parameter(raw=b"\x00\x00")
+        if velocity is not Velocity.DEFAULT:
+            return Parameter(raw=b"\xC8\x00")
+        return None
+    if isinstance(velocity, int):
+        return Position.from_percent(velocity)
+    return None
+
+
+class MultiNodeCommandSend(TrackedCommandSend):
+    """CommandSend addressing several nodes with one shared target."""
+
+    def __init__(
+        self,
+        pyvlx: PyVLX,
+        tracker: VeluxSessionTracker,
+        node_ids: list[int],
+        parameter: Parameter,
+        wait_for_completion: bool = False,
+        **functional_parameter: Any,
+    ) -> None:
+        """Initialize MultiNodeCommandSend."""
+        super().__init__(
+            pyvlx=pyvlx,
+            tracker=tracker,
+            node_id=node_ids[0],
+            parameter=parameter,
+            session_timeout=COVER_SESSION_TIMEOUT,
+            wait_for_completion=wait_for_completion,
+            **functional_parameter,
+        )
+        self.node_ids = node_ids
+
+    def request_frame(self) -> FrameCommandSendRequest:
+        """Construct initiating frame."""
+        self.session_id = get_new_session_id()
+        return self.track(
+            FrameCommandSendRequest(
+                node_ids=self.node_ids,
+                parameter=self.parameter,
+                active_parameter=self.active_parameter,
+                session_id=self.session_id,
+                **self.functional_parameter,
+            )
+        )
+
+
+@dataclass(eq=False)
+class _PendingCommand:
+    """Command waiting for the coalesce window to close."""
+
+    node: OpeningDevice
+    parameter: Parameter
+    functional_parameter: dict[str, Any]
+    # Session of the sent frame, None if the command was superseded
+    future: asyncio.Future[VeluxCommandSession | None]
+    # Set by a stop which arrived before the frame was sent
+    cancelled: bool = False
+
+    @property
+    def key(self) -> tuple:
+        """Return key of commands which can share one frame."""
+        return (
+            bytes(self.parameter),
+            tuple(
+                sorted(
+                    (name, bytes(value))
+                    for name, value in self.functional_parameter.items()
+                )
+            ),
+        )
+
+
+class VeluxCommandDispatcher:
+    """Collect position commands and send them as multi-node frames."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        pyvlx: PyVLX,
+        scheduler: VeluxCommandScheduler,
+        tracker: VeluxSessionTracker,
+    ) -> None:
+        """Initialize the dispatcher."""
+        self._hass = hass
+        self._pyvlx = pyvlx
+        self._scheduler = scheduler
+        self._tracker = tracker
+        self._pending: list[_PendingCommand] = []
+        # Commands handed to a flush task whose frame was not sent yet
+        self._flushing: list[_PendingCommand] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    async def async_set_position(
+        self,
+        node: OpeningDevice,
+        position: Position,
+        velocity: int | None = None,
+    ) -> VeluxCommandSession | None:
+        """Queue a position command and wait until the gateway accepted it.
+
+        Returns the session of the sent frame, or None if a newer command
+        for node replaced it.
+        """
+        functional_parameter: dict[str, Any] = {}
+        name = get_node_capabilities(node).velocity_parameter
+        parameter = None if name is None else velocity_parameter(node, velocity)
+        if parameter is not None:
+            functional_parameter[name] = parameter
+
+        future: asyncio.Future[VeluxCommandSession | None] = (
+            self._hass.loop.create_future()
+        )
+        self._pending.append(
+            _PendingCommand(node, position, functional_parameter, future)
+        )
+        if self._flush_handle is None:
+            self._flush_handle = self._hass.loop.call_later(
+                COMMAND_COALESCE_WINDOW, self._async_schedule_flush
+            )
+        return await future
+
+    @callback
+    def _async_schedule_flush(self) -> None:
+        """Hand the collected commands over to a flush task."""
+        self._flush_handle = None
+        pending, self._pending = self._pending, []
+        self._flushing.extend(pending)
+        self._hass.async_create_task(self._async_flush(pending))
+
+    async def _async_flush(self, pending: list[_PendingCommand]) -> None:
+        """Send collected commands, one frame per shared target."""
+        try:
+            await self._async_send_frames(pending)
+        finally:
+            self._flushing = [c for c in self._flushing if c not in pending]
+
+    async def _async_send_frames(self, pending: list[_PendingCommand]) -> None:
+        """Group collected commands by target and send the frames."""
+        # A newer command for a node replaces an older one from the same window.
+        latest: dict[int, _PendingCommand] = {}
+        for command in pending:
+            if command.cancelled:
+                continue
+            superseded = latest.pop(command.node.node_id, None)
+            if superseded is not None and not superseded.future.done():
+                superseded.future.set_result(None)
+            latest[command.node.node_id] = command
+
+        groups: dict[tuple, list[_PendingCommand]] = {}
+        for command in latest.values():
+            groups.setdefault(command.key, []).append(command)
+
+        frames = [
+            group[start : start + MAX_NODES_PER_COMMAND]
+            for group in groups.values()
+            for start in range(0, len(group), MAX_NODES_PER_COMMAND)
+        ]
+        results = await asyncio.gather(
+            *(
+                self._scheduler.async_run(
+                    partial(self._async_send, commands),
+                    node_ids=[command.node.node_id for command in commands],
+                    drop_nodes=partial(self._async_drop, commands),
+                )
+                for commands in frames
+            ),
+            return_exceptions=True,
+        )
+        # Frames superseded in the scheduler by newer commands were not sent
+        for commands, result in zip(frames, results):
+            for command in commands:
+                if command.future.done():
+                    continue
+                if isinstance(result, Exception):
+                    command.future.set_exception(result)
+                else:
+                    command.future.set_result(None)
+
+    @callback
+    def _async_drop(
+        self, commands: list[_PendingCommand], node_ids: frozenset[int]
+    ) -> None:
+        """Skip the commands of a queued frame whose nodes got newer commands."""
+        for command in commands:
+            if command.node.node_id in node_ids:
+                command.cancelled = True
+                if not command.future.done():
+                    command.future.set_result(None)
+
+    async def _async_send(
+        self, commands: list[_PendingCommand]
+    ) -> VeluxCommandSession | None:
+        """Send one frame for commands sharing target and velocity."""
+        self._flushing = [c for c in self._flushing if c not in commands]
+        commands = [command for command in commands if not command.cancelled]
+        if not commands:
+            return None
+        first = commands[0]
+        LOGGER.debug(
+            "Sending %s to nodes %s",
+            first.parameter,
+            [command.node.node_id for command in commands],
+        )
+        frame_command = MultiNodeCommandSend(
+            pyvlx=self._pyvlx,
+            tracker=self._tracker,
+            node_ids=[command.node.node_id for command in commands],
+            parameter=first.parameter,
+            **first.functional_parameter,
+        )
+        try:
+            await frame_command.send()
+        except (OSError, PyVLXException) as err:
+            if frame_command.session is not None:
+                self._tracker.async_discard(frame_command.session)
+            for command in commands:
+                if not command.future.done():
+                    command.future.set_exception(err)
+            return None
+        for command in commands:
+            if not command.future.done():
+                command.future.set_result(frame_command.session)
+        for command in commands:
+            await command.node.after_update()
+        return frame_command.session
+
+    @callback
+    def async_cancel(self, node: OpeningDevice) -> None:
+        """Drop a command for node which has not been sent yet."""
+        for command in [c for c in self._pending if c.node.node_id == node.node_id]:
+            self._pending.remove(command)
+            if not command.future.done():
+                command.future.set_result(None)
+        # Frames of a running flush skip cancelled commands
+        for command in self._flushing:
+            if command.node.node_id == node.node_id:
+                command.cancelled = True
+                if not command.future.done():
+                    command.future.set_result(None)
+
+    async def async_shutdown(self) -> None:
+        """Drop commands which have not been sent yet."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        pending, self._pending = self._pending, []
+        for command in self._flushing:
+            command.cancelled = True
+        for command in pending + self._flushing:
+            if not command.future.done():
+                command.future.set_exception(
+                    PyVLXException("Connection to KLF200 closed")
+                )
@@ -0,0 +1,309 @@
+"""Heartbeat of the KLF200 which refreshes nodes that stopped reporting."""
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from collections.abc import Awaitable, Callable, Iterable
+
+from pyvlx import (
+    Blind,
+    Intensity,
+    LighteningDevice,
+    OnOffSwitch,
+    OpeningDevice,
+    Parameter,
+    Position,
+    PyVLX,
+)
+from pyvlx.api import GetState
+from pyvlx.api.frames import (
+    FrameBase,
+    FrameCommandRunStatusNotification,
+    FrameGetAllNodesInformationNotification,
+    FrameNodeStatePositionChangedNotification,
+    FrameSessionFinishedNotification,
+    FrameStatusRequestConfirmation,
+    FrameStatusRequestNotification,
+    FrameStatusRequestRequest,
+)
+from pyvlx.api.session_id import get_new_session_id
+from pyvlx.api.status_request import StatusRequest
+from pyvlx.const import NodeParameter
+from pyvlx.exception import PyVLXException
+from pyvlx.heartbeat import Heartbeat
+from pyvlx.node import Node
+from pyvlx.opening_device import DualRollerShutter
+from pyvlx.parameter import SwitchParameter
+
+from .const import LOGGER
+
+# Nodes asked for their status with one request, the KLF200 accepts 20.
+STATUS_REQUEST_BATCH_SIZE = 5
+# Stale nodes refreshed per heartbeat, older ones are asked first.
+STALE_REFRESH_LIMIT = 10
+# Seconds between status requests to give user commands a chance.
+STATUS_REQUEST_PAUSE = 0.5
+# Bounds in seconds of the adaptive interval, same as the interval number.
+ADAPTIVE_MIN_INTERVAL = 30
+ADAPTIVE_MAX_INTERVAL = 600
+# Factor the adaptive interval grows by while the gateway pushes frames.
+ADAPTIVE_STRETCH_FACTOR = 2
+# Seconds without pushed frame after which the adaptive interval is reset.
+QUIET_PERIOD = 1800
+
+REASON_FIXED = "fixed"
+REASON_ERROR = "error"
+REASON_RECONNECT = "reconnect"
+REASON_QUIET = "quiet"
+REASON_ACTIVE = "active"
+REASON_STEADY = "steady"
+
+PulseCallbackType = Callable[[], Awaitable[None]]
+
+
+class MultiNodeStatusRequest(StatusRequest):
+    """Status request for several nodes in one session."""
+
+    def __init__(self, pyvlx: PyVLX, node_ids: list[int]) -> None:
+        """Initialize MultiNodeStatusRequest."""
+        super().__init__(pyvlx=pyvlx, node_id=node_ids[0])
+        self.node_ids = node_ids
+        self.notification_frames: list[FrameStatusRequestNotification] = []
+
+    async def handle_frame(self, frame: FrameBase) -> bool:
+        """Collect the notifications until the session is finished."""
+        if (
+            isinstance(frame, FrameStatusRequestConfirmation)
+            and frame.session_id == self.session_id
+        ):
+            return False
+        if (
+            isinstance(frame, FrameStatusRequestNotification)
+            and frame.session_id == self.session_id
+        ):
+            self.notification_frames.append(frame)
+            self.notification_frame = frame
+            return False
+        if (
+            isinstance(frame, FrameSessionFinishedNotification)
+            and frame.session_id == self.session_id
+        ):
+            self.success = True
+            return True
+        return False
+
+    def request_frame(self) -> FrameStatusRequestRequest:
+        """Construct initiating frame."""
+        self.session_id = get_new_session_id()
+        return FrameStatusRequestRequest(
+            session_id=self.session_id, node_ids=self.node_ids
+        )
+
+
+class VeluxIncrementalHeartbeat(Heartbeat):
+    """Heartbeat which only asks nodes for their status if they went quiet.
+
+    With load_all_states every node is refreshed on each pulse. Otherwise
+    Blind and DualRollerShutter nodes are refreshed, whose functional
+    parameters are not reported by the house status monitor, and with a
+    stale_age the nodes which did not report for that many seconds.
+
+    In adaptive mode the interval grows beyond the configured one while the
+    house status monitor pushes frames, and falls back after failed pulses,
+    reconnects or when the gateway was quiet for QUIET_PERIOD.
+    """
+
+    def __init__(
+        self,
+        pyvlx: PyVLX,
+        interval: int = 30,
+        load_all_states: bool = True,
+        stale_age: float = 0,
+        adaptive: bool = False,
+    ) -> None:
+        """Initialize the heartbeat."""
+        super().__init__(pyvlx, interval=interval, load_all_states=load_all_states)
+        self.stale_age = stale_age
+        # Monotonic time of the last frame reporting the state per node_id
+        self.last_report: dict[int, float] = {}
+        # Nodes asked for their status by the last pulse
+        self.refreshed_nodes: int | None = None
+        self.stale_nodes: int | None = None
+        self.adaptive = adaptive
+        # Seconds until the next pulse and why they were chosen
+        self.current_interval: float = interval
+        self.interval_reason = REASON_FIXED
+        self._last_push: float | None = None
+        self._adapted_at: float | None = None
+        self._pulse_failed = False
+        self._reconnected = False
+        self._pulse_cbs: list[PulseCallbackType] = []
+
+    def register_pulse_cb(self, callback: PulseCallbackType) -> None:
+        """Register callback which is called when the next pulse is planned."""
+        self._pulse_cbs.append(callback)
+
+    def unregister_pulse_cb(self, callback: PulseCallbackType) -> None:
+        """Unregister pulse callback."""
+        self._pulse_cbs.remove(callback)
+
+    def track_reports(self) -> None:
+        """Follow the frames and connection changes of the gateway."""
+        self.pyvlx.connection.register_frame_received_cb(self._frame_received)
+        self.pyvlx.connection.register_connection_opened_cb(self._connection_changed)
+        self.pyvlx.connection.register_connection_closed_cb(self._connection_changed)
+
+    def untrack_reports(self) -> None:
+        """Stop following the gateway."""
+        self.pyvlx.connection.unregister_frame_received_cb(self._frame_received)
+        self.pyvlx.connection.unregister_connection_opened_cb(
+            self._connection_changed
+        )
+        self.pyvlx.connection.unregister_connection_closed_cb(
+            self._connection_changed
+        )
+
+    def _connection_changed(self) -> None:
+        """Check the connection soon after it was opened or closed.
+
+        pyvlx calls the callback once more to schedule a returned coroutine,
+        a plain function runs once and leaves no coroutine unawaited.
+        """
+        self._reconnected = True
+
+    async def _frame_received(self, frame: FrameBase) -> None:
+        """Record the time a node reported and apply status notifications."""
+        if isinstance(
+            frame,
+            (
+                FrameGetAllNodesInformationNotification,
+                FrameNodeStatePositionChangedNotification,
+                FrameStatusRequestNotification,
+            ),
+        ):
+            self.last_report[frame.node_id] = time.monotonic()
+            if isinstance(frame, FrameNodeStatePositionChangedNotification):
+                self._last_push = time.monotonic()
+        elif isinstance(frame, FrameCommandRunStatusNotification):
+            self.last_report[frame.index_id] = time.monotonic()
+        if isinstance(frame, FrameStatusRequestNotification):
+            await self._apply_status(frame)
+
+    async def _apply_status(self, frame: FrameStatusRequestNotification) -> None:
+        """Update the main parameter of nodes not handled by pyvlx."""
+        if frame.node_id not in self.pyvlx.nodes:
+            return
+        node = self.pyvlx.nodes[frame.node_id]
+        # pyvlx itself applies the status of Blind and DualRollerShutter nodes
+        if isinstance(node, (Blind, DualRollerShutter)):
+            return
+        parameter = frame.parameter_data.get(NodeParameter(0))
+        if parameter is None or int.from_bytes(parameter.raw, "big") > Parameter.MAX:
+            return
+        if isinstance(node, OpeningDevice):
+            node.position = Position(parameter)
+        elif isinstance(node, LighteningDevice):
+            node.intensity = Intensity(parameter)
+        elif isinstance(node, OnOffSwitch):
+            node.parameter = SwitchParameter(parameter)
+        else:
+            return
+        await node.after_update()
+
+    def _stale_nodes(self, nodes: Iterable[Node]) -> list[Node]:
+        """Return the nodes without report within stale_age, oldest first."""
+        deadline = time.monotonic() - self.stale_age
+        stale = [
+            node
+            for node in nodes
+            if self.last_report.get(node.node_id, -math.inf) < deadline
+        ]
+        stale.sort(key=lambda node: self.last_report.get(node.node_id, -math.inf))
+        return stale
+
+    def _adapt_interval(self) -> None:
+        """Choose the seconds until the next pulse."""
+        now = time.monotonic()
+        if not self.adaptive:
+            interval, reason = self.interval, REASON_FIXED
+        elif self._pulse_failed:
+            interval, reason = ADAPTIVE_MIN_INTERVAL, REASON_ERROR
+        elif self._reconnected:
+            interval, reason = ADAPTIVE_MIN_INTERVAL, REASON_RECONNECT
+        elif (
+            not self.pyvlx.klf200.house_status_monitor_enabled
+            or self._last_push is None
+            or now - self._last_push > QUIET_PERIOD
+        ):
+            interval, reason = self.interval, REASON_QUIET
+        elif self._adapted_at is not None and self._last_push > self._adapted_at:
+            interval = min(
+                max(self.current_interval, self.interval) * ADAPTIVE_STRETCH_FACTOR,
+                ADAPTIVE_MAX_INTERVAL,
+            )
+            reason = REASON_ACTIVE
+        else:
+            interval = max(self.current_interval, self.interval)
+            reason = REASON_STEADY
+        self._reconnected = False
+        self._adapted_at = now
+        if (interval, reason) != (self.current_interval, self.interval_reason):
+            LOGGER.debug("Heartbeat interval %s s (%s)", interval, reason)
+        self.current_interval = interval
+        self.interval_reason = reason
+
+    async def _run(self) -> None:
+        """Pulse after the chosen interval and inform the listeners."""
+        while True:
+            self._adapt_interval()
+            for callback in self._pulse_cbs:
+                await callback()
+            await asyncio.sleep(self.current_interval)
+            try:
+                await self.pulse()
+            except (OSError, PyVLXException) as err:
+                LOGGER.debug("Heartbeat pulse failed: %s", err)
+                self._pulse_failed = True
+            else:
+                self._pulse_failed = False
+
+    async def pulse(self) -> None:
+        """Send get state request and refresh the nodes which are due."""
+        get_state = GetState(pyvlx=self.pyvlx)
+        await get_state.do_api_call()
+        if not get_state.success:
+            raise PyVLXException("Unable to send get state.")
+
+        if self.load_all_states:
+            due = list(self.pyvlx.nodes)
+            self.stale_nodes = None
+        else:
+            # House status monitor delivers wrong values for FP1 to FP3
+            due = [
+                node
+                for node in self.pyvlx.nodes
+                if isinstance(node, (Blind, DualRollerShutter))
+            ]
+            if self.stale_age > 0:
+                stale = self._stale_nodes(
+                    node for node in self.pyvlx.nodes if node not in due
+                )
+                due.extend(stale[:STALE_REFRESH_LIMIT])
+                self.stale_nodes = len(stale)
+            else:
+                self.stale_nodes = None
+
+        node_ids = [node.node_id for node in due]
+        for start in range(0, len(node_ids), STATUS_REQUEST_BATCH_SIZE):
+            batch = node_ids[start : start + STATUS_REQUEST_BATCH_SIZE]
+            status_request = MultiNodeStatusRequest(self.pyvlx, batch)
+            await status_request.do_api_call()
+            if not status_request.success:
+                LOGGER.debug("Status request for nodes %s not finished", batch)
+            # give user requests a chance
+            await asyncio.sleep(STATUS_REQUEST_PAUSE)
+        self.refreshed_nodes = len(node_ids)
+        LOGGER.debug(
+            "Heartbeat refreshed %s nodes, %s stale", len(node_ids), self.stale_nodes
+        )
@@ -2,20 +2,31 @@
 from __future__ import annotations
 
 import logging
+from dataclasses import dataclass
 from typing import Any
 
 from homeassistant.components.light import ATTR_BRIGHTNESS, ColorMode, LightEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from pyvlx import Intensity, LighteningDevice, PyVLX
+from pyvlx import Intensity, Parameter
 from pyvlx.node import Node
 
 from .const import DOMAIN
 from .node_entity import VeluxNodeEntity
+from .node_index import VeluxNodeIndex
 
 _LOGGER = logging.getLogger(__name__)
-PARALLEL_UPDATES = 1
+# Commands are paced by the per gateway scheduler.
+PARALLEL_UPDATES = 0
+
+
+@dataclass(frozen=True, slots=True)
+class VeluxLightState:
+    """State of a light as rendered from its node."""
+
+    brightness: int
+    is_on: bool
 
 
 async def async_setup_entry(
@@ -23,11 +34,10 @@ async def async_setup_entry(
 ) -> None:
     """Set up light(s) for Velux platform."""
     entities = []
-    pyvlx: PyVLX = hass.data[DOMAIN][entry.entry_id]
-    for node in pyvlx.nodes:
-        if isinstance(node, LighteningDevice):
-            _LOGGER.debug("Light will be added: %s", node.name)
-            entities.append(VeluxLight(node, entry))
+    node_index: VeluxNodeIndex = hass.data[DOMAIN][entry.entry_id].node_index
+    for node in node_index.lights.values():
+        _LOGGER.debug("Light will be added: %s", node.name)
+        entities.append(VeluxLight(node, entry))
     async_add_entities(entities)
 
 
@@ -41,27 +51,58 @@ class VeluxLight(VeluxNodeEntity, LightEntity):
     _attr_supported_color_modes = {ColorMode.BRIGHTNESS}
     _attr_color_mode = ColorMode.BRIGHTNESS
 
+    def _render_state(self) -> VeluxLightState:
+        """Return the state of the light read from the node."""
+        return self._state_from_intensity(self.node.intensity)
+
+    @staticmethod
+    def _state_from_intensity(intensity: Intensity) -> VeluxLightState:
+        """Return the state of a light at intensity."""
+        return VeluxLightState(
+            brightness=int((100 - intensity.intensity_percent) * 255 / 100),
+            is_on=not intensity.off and intensity.known,
+        )
+
     @property
     def brightness(self) -> int:
         """Return the current brightness."""
-        return int((100 - self.node.intensity.intensity_percent) * 255 / 100)
+        return self.state_snapshot.brightness
 
     @property
     def is_on(self) -> bool:
         """Return true if light is on."""
-        return not self.node.intensity.off and self.node.intensity.known
+        return self.state_snapshot.is_on
+
+    def _apply_parameter(self, parameter: Parameter) -> None:
+        """Store a confirmed intensity in the node."""
+        self.node.intensity = Intensity(parameter)
+
+    def _approaches_target(
+        self,
+        snapshot: VeluxLightState,
+        reported: VeluxLightState,
+        target: VeluxLightState,
+    ) -> bool:
+        """Return True if the brightness lies between reported and target."""
+        low, high = sorted((reported.brightness, target.brightness))
+        return low <= snapshot.brightness <= high
+
+    async def _async_set_intensity(self, intensity: Intensity) -> None:
+        """Send intensity and show it until the gateway confirms it."""
+        await self.async_send_optimistic(
+            intensity, self._state_from_intensity(intensity)
+        )
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Instruct the light to turn on."""
         if ATTR_BRIGHTNESS in kwargs:
             intensity_percent = int(100 - kwargs[ATTR_BRIGHTNESS] / 255 * 100)
-            await self.node.set_intensity(
-                Intensity(intensity_percent=intensity_percent),
-                wait_for_completion=True,
+            await self._async_set_intensity(
+                Intensity(intensity_percent=intensity_percent)
             )
         else:
-            await self.node.turn_on(wait_for_completion=True)
+            await self._async_set_intensity(Intensity(intensity_percent=0))
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Instruct the light to turn off."""
-        await self.node.turn_off(wait_for_completion=True)
+        await self._async_set_intensity(Intensity(intensity_percent=100))
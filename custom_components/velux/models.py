@@ -0,0 +1,42 @@
+"""Runtime data of the Velux integration."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from pyvlx import PyVLX
+
+from .coordinator import VeluxLimitationCoordinator
+from .dispatcher import VeluxCommandDispatcher
+from .heartbeat import VeluxIncrementalHeartbeat
+from .node_index import VeluxNodeIndex
+from .profiler import VeluxProfiler
+from .scheduler import VeluxCommandScheduler
+from .sessions import VeluxSessionTracker
+from .snapshot import VeluxSnapshot
+from .telemetry import VeluxTelemetry
+from .trace import VeluxTrace
+from .travel import VeluxTravelTimes
+
+
+@dataclass
+class VeluxData:
+    """Objects shared by all platforms of one KLF200 config entry."""
+
+    pyvlx: PyVLX
+    scheduler: VeluxCommandScheduler
+    session_tracker: VeluxSessionTracker
+    dispatcher: VeluxCommandDispatcher
+    limitation_coordinator: VeluxLimitationCoordinator
+    heartbeat: VeluxIncrementalHeartbeat
+    telemetry: VeluxTelemetry
+    trace: VeluxTrace
+    profiler: VeluxProfiler
+    snapshot: VeluxSnapshot
+    travel_times: VeluxTravelTimes
+    node_index: VeluxNodeIndex = field(default_factory=VeluxNodeIndex)
+    # Duration in seconds of each phase of async_setup_entry
+    setup_timings: dict[str, float] = field(default_factory=dict)
+    # State writes of moving nodes skipped by the entity throttle
+    suppressed_state_writes: int = 0
+    # Node updates which did not change the state of their entity
+    unchanged_state_updates: int = 0
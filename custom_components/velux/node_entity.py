@@ -1,12 +1,25 @@
 """Generic Velux Entity."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
+from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import callback
+from homeassistant.core import CALLBACK_TYPE, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import Entity
-from pyvlx import Node
+from homeassistant.helpers.event import async_call_later
+from pyvlx import Node, Parameter
+from pyvlx.exception import PyVLXException
 
-from .const import DOMAIN
+from .const import CONF_STATE_WRITE_INTERVAL, DEFAULT_STATE_WRITE_INTERVAL, DOMAIN
+from .models import VeluxData
+from .profiler import KIND_COMMAND, KIND_UPDATE_CALLBACK
+from .scheduler import CHANNEL_MAIN, PRIORITY_COMMAND
+from .sessions import TrackedCommandSend, VeluxCommandSession
 
 
 class VeluxNodeEntity(Entity):
@@ -17,6 +30,7 @@ class VeluxNodeEntity(Entity):
     def __init__(self, node: Node, entry: ConfigEntry) -> None:
         """Initialize the Velux device."""
         self.node: Node = node
+        self.entry: ConfigEntry = entry
         self._attr_unique_id = (
             node.serial_number
             if node.serial_number
@@ -28,16 +42,203 @@ class VeluxNodeEntity(Entity):
             name=self._attr_name,
             via_device=(DOMAIN, str(entry.unique_id)),
         )
+        # Minimum seconds between state writes while the node is moving,
+        # 0 writes every update
+        self.state_write_interval: float = entry.options.get(
+            CONF_STATE_WRITE_INTERVAL, DEFAULT_STATE_WRITE_INTERVAL
+        )
+        self.suppressed_state_writes: int = 0
+        self.unchanged_state_updates: int = 0
+        self._state_snapshot: Any = None
+        # Session whose confirmation the optimistic state is waiting for and
+        # the last state the node reported on the way to its target
+        self._pending_session: VeluxCommandSession | None = None
+        self._pending_reported: Any = None
+        self._last_state_write: float = 0.0
+        self._was_moving: bool = False
+        self._unsub_delayed_write: CALLBACK_TYPE | None = None
+
+    @property
+    def data(self) -> VeluxData:
+        """Return the objects shared by the entities of the gateway."""
+        return self.hass.data[DOMAIN][self.entry.entry_id]
+
+    async def async_run_command(
+        self,
+        job: Callable[[], Awaitable[VeluxCommandSession | None]],
+        priority: int = PRIORITY_COMMAND,
+        channels: tuple[int, ...] = (CHANNEL_MAIN,),
+    ) -> None:
+        """Run a command setting channels of the node through the scheduler."""
+        with self.data.profiler.timed(KIND_COMMAND, type(self).__name__):
+            await self.data.scheduler.async_run(
+                job,
+                node_ids=(self.node.node_id,),
+                priority=priority,
+                channels=channels,
+            )
+
+    async def async_send_optimistic(self, parameter: Parameter, optimistic: Any) -> None:
+        """Send parameter to the node without waiting for the node.
+
+        Returns once the gateway accepted the command and shows the optimistic
+        state until the session is finished. The node state is then set to
+        the target, or rolled back if the session failed.
+        """
+        command = TrackedCommandSend(
+            pyvlx=self.node.pyvlx,
+            tracker=self.data.session_tracker,
+            node_id=self.node.node_id,
+            parameter=parameter,
+            wait_for_completion=False,
+        )
+
+        async def async_send() -> VeluxCommandSession | None:
+            await command.send()
+            return command.session
+
+        try:
+            await self.async_run_command(async_send)
+        except (OSError, PyVLXException):
+            if command.session is not None:
+                self.data.session_tracker.async_discard(command.session)
+            raise
+        session = command.session
+        if session is None:
+            # Superseded by a newer command before it was sent
+            return
+        self._pending_session = session
+        self._pending_reported = self.state_snapshot
+        self._state_snapshot = optimistic
+        self._async_write_state_now()
+        session.future.add_done_callback(partial(self._async_settle, session))
+
+    @callback
+    def _async_settle(
+        self, session: VeluxCommandSession, future: asyncio.Future[bool]
+    ) -> None:
+        """Replace the optimistic state once the session is finished."""
+        if self._pending_session is not session:
+            return
+        self._pending_session = None
+        if future.result() and session.reached_target(self.node.node_id):
+            self._apply_parameter(session.target)
+        snapshot = self._render_state()
+        if snapshot != self._state_snapshot:
+            self._state_snapshot = snapshot
+            self._async_write_state_now()
+
+    def _apply_parameter(self, parameter: Parameter) -> None:
+        """Store a confirmed parameter in the node."""
+
+    def _approaches_target(self, snapshot: Any, reported: Any, target: Any) -> bool:
+        """Return True if snapshot is on the way from reported to target."""
+        return snapshot == target
+
+    def is_moving(self) -> bool:
+        """Return True while the node reports intermediate states."""
+        return False
+
+    def _render_state(self) -> Any:
+        """Return an immutable snapshot of the state read from the node.
+
+        State properties read the snapshot instead of the node, updates which
+        render an equal snapshot are not written.
+        """
+        return None
+
+    def _register_updated_cb(self) -> None:
+        """Receive updates of the node."""
+        self.node.register_device_updated_cb(self.after_update_callback)
+
+    def _unregister_updated_cb(self) -> None:
+        """Stop receiving updates of the node."""
+        self.node.unregister_device_updated_cb(self.after_update_callback)
+
+    @property
+    def state_snapshot(self) -> Any:
+        """Return the last rendered state."""
+        if self._state_snapshot is None:
+            self._state_snapshot = self._render_state()
+        return self._state_snapshot
 
     @callback
     async def after_update_callback(self, device):
         """Call after device was updated."""
+        with self.data.profiler.timed(KIND_UPDATE_CALLBACK, type(self).__name__):
+            self._async_process_update()
+
+    @callback
+    def _async_process_update(self) -> None:
+        """Render the updated node and write the state if it changed."""
+        available = self.node.is_available
+        available_changed = available != self._attr_available
+        self._attr_available = available
+        snapshot = self._render_state()
+        if self._pending_session is not None:
+            # Intermediate states towards the optimistic target are settled by
+            # the finished session, anything else replaces the target
+            if not available_changed and self._approaches_target(
+                snapshot, self._pending_reported, self._state_snapshot
+            ):
+                self._pending_reported = snapshot
+                return
+            self._pending_session = None
+        if (
+            not available_changed
+            and snapshot is not None
+            and snapshot == self._state_snapshot
+        ):
+            self.unchanged_state_updates += 1
+            self.data.unchanged_state_updates += 1
+            self.data.telemetry.async_schedule_publish()
+            return
+        self._state_snapshot = snapshot
+        moving = self.is_moving()
+        transition = moving != self._was_moving
+        self._was_moving = moving
+        # Start and stop of a movement are written immediately
+        if transition or not moving or self.state_write_interval <= 0:
+            self._async_write_state_now()
+            return
+        delay = self._last_state_write + self.state_write_interval - time.monotonic()
+        if delay <= 0:
+            self._async_write_state_now()
+            return
+        self.suppressed_state_writes += 1
+        self.data.suppressed_state_writes += 1
+        self.data.telemetry.async_schedule_publish()
+        # Make sure the latest intermediate state is written eventually
+        if self._unsub_delayed_write is None:
+            self._unsub_delayed_write = async_call_later(
+                self.hass, delay, self._async_delayed_write
+            )
+
+    @callback
+    def _async_delayed_write(self, _now: Any) -> None:
+        """Write the state deferred by the throttle."""
+        self._unsub_delayed_write = None
+        self._async_write_state_now()
+
+    @callback
+    def _async_write_state_now(self) -> None:
+        """Write the state and restart the throttle interval."""
+        if self._unsub_delayed_write is not None:
+            self._unsub_delayed_write()
+            self._unsub_delayed_write = None
+        self._last_state_write = time.monotonic()
         self.async_write_ha_state()
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks to update hass after device was changed."""
-        self.node.register_device_updated_cb(self.after_update_callback)
+        self._attr_available = self.node.is_available
+        self._state_snapshot = self._render_state()
+        self._register_updated_cb()
 
     async def async_will_remove_from_hass(self) -> None:
         """Unregister callbacks to update hass after device was changed."""
-        self.node.unregister_device_updated_cb(self.after_update_callback)
+        self._unregister_updated_cb()
+        self._pending_session = None
+        if self._unsub_delayed_write is not None:
+            self._unsub_delayed_write()
+            self._unsub_delayed_write = None
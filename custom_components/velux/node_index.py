@@ -0,0 +1,67 @@
+"""Index of the KLF200 nodes by the capabilities the platforms need."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+from pyvlx import LighteningDevice, Node, OnOffSwitch
+from pyvlx.opening_device import Blind, DualRollerShutter, OpeningDevice, Window
+
+from .capabilities import get_node_capabilities
+
+
+class VeluxNodeIndex:
+    """Nodes of one gateway sorted into the slices read by the platforms.
+
+    Every node is classified once when the entry is set up, platforms only
+    iterate over their slice. Nodes added to or removed from the gateway
+    change its tables, the entry is then reloaded and the index rebuilt.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self.windows: dict[int, Window] = {}
+        self.blinds: dict[int, Blind] = {}
+        self.dual_roller_shutters: dict[int, DualRollerShutter] = {}
+        # Opening devices without a more specific slice (awnings, shutters, ...)
+        self.opening_devices: dict[int, OpeningDevice] = {}
+        self.lights: dict[int, LighteningDevice] = {}
+        self.switches: dict[int, OnOffSwitch] = {}
+        # Opening devices supporting a default velocity
+        self.velocity_nodes: dict[int, OpeningDevice] = {}
+        self._node_ids: set[int] = set()
+
+    def __contains__(self, node_id: int) -> bool:
+        """Return True if a node with node_id is indexed."""
+        return node_id in self._node_ids
+
+    def __len__(self) -> int:
+        """Return number of indexed nodes."""
+        return len(self._node_ids)
+
+    def add_nodes(self, nodes: Iterable[Node]) -> None:
+        """Classify nodes and add them to their slices."""
+        for node in nodes:
+            self._add(node)
+
+    def _add(self, node: Node) -> None:
+        """Classify node and add it to its slices."""
+        slices: list[dict[int, Any]] = []
+        if isinstance(node, OpeningDevice):
+            if get_node_capabilities(node).curtains:
+                slices.append(self.dual_roller_shutters)
+            else:
+                slices.append(self.velocity_nodes)
+                if isinstance(node, Window):
+                    slices.append(self.windows)
+                elif isinstance(node, Blind):
+                    slices.append(self.blinds)
+                else:
+                    slices.append(self.opening_devices)
+        elif isinstance(node, LighteningDevice):
+            slices.append(self.lights)
+        elif isinstance(node, OnOffSwitch):
+            slices.append(self.switches)
+        for node_slice in slices:
+            node_slice[node.node_id] = node
+        self._node_ids.add(node.node_id)
@@ -11,9 +11,10 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from pyvlx import PyVLX
-from pyvlx.opening_device import Blind, DualRollerShutter, OpeningDevice
+from pyvlx.opening_device import Blind, OpeningDevice
 
 from .const import DOMAIN
+from .models import VeluxData
 
 PARALLEL_UPDATES = 1
 
@@ -23,14 +24,13 @@ async def async_setup_entry(
 ) -> None:
     """Set up cover(s) for Velux platform."""
     entities: list = []
-    pyvlx: PyVLX = hass.data[DOMAIN][entry.entry_id]
-    entities.append(VeluxHeartbeatInterval(pyvlx, entry))
-    for node in pyvlx.nodes:
-        if isinstance(node, Blind):
-            entities.append(VeluxOpenOrientation(node, entry))
-            entities.append(VeluxCloseOrientation(node, entry))
-        if isinstance(node, OpeningDevice) and not isinstance(node, DualRollerShutter):
-            entities.append(VeluxDefaultVelocity(node, entry))
+    data: VeluxData = hass.data[DOMAIN][entry.entry_id]
+    entities.append(VeluxHeartbeatInterval(data.pyvlx, entry))
+    for node in data.node_index.blinds.values():
+        entities.append(VeluxOpenOrientation(node, entry))
+        entities.append(VeluxCloseOrientation(node, entry))
+    for node in data.node_index.velocity_nodes.values():
+        entities.append(VeluxDefaultVelocity(node, entry))
     async_add_entities(entities)
 
 
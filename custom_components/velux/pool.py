@@ -0,0 +1,111 @@
+"""Live KLF200 connections kept across config entry reloads."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.singleton import singleton
+from pyvlx import PyVLX
+
+from .const import DOMAIN, LOGGER
+
+DATA_POOL = f"{DOMAIN}_pool"
+# Seconds a released connection waits for a setup to adopt it, the setup
+# follows a reload or the config flow immediately
+POOL_TTL = 30
+
+
+@dataclass
+class _PooledConnection:
+    """Connected PyVLX waiting to be adopted."""
+
+    pyvlx: PyVLX
+    password: str
+    unsub_expire: CALLBACK_TYPE
+
+
+class VeluxConnectionPool:
+    """Keep the connection of an unloaded entry for the next setup per host.
+
+    Disconnecting reboots the KLF200 and a new session needs the TLS
+    handshake, the login and the node and scene tables again. A reload
+    adopts the connection with its tables instead, the first setup of an
+    entry adopts the connection validated by the config flow. Connections
+    which are not adopted within POOL_TTL are disconnected.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the pool."""
+        self._hass = hass
+        self._connections: dict[str, _PooledConnection] = {}
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_stop)
+
+    async def async_release(self, host: str, password: str, pyvlx: PyVLX) -> None:
+        """Keep pyvlx for the next setup of host, disconnect it if it is closed."""
+        self.async_discard(host)
+        if not pyvlx.connection.connected:
+            await pyvlx.disconnect()
+            return
+        # The adopting setup starts a heartbeat with its own options
+        await pyvlx.heartbeat.stop()
+        self._connections[host] = _PooledConnection(
+            pyvlx=pyvlx,
+            password=password,
+            unsub_expire=async_call_later(
+                self._hass, POOL_TTL, partial(self._async_expire, host)
+            ),
+        )
+        LOGGER.debug("Keeping connection to %s for %s s", host, POOL_TTL)
+
+    @callback
+    def async_adopt(self, host: str, password: str) -> PyVLX | None:
+        """Return the kept connection of host if it is still usable."""
+        pooled = self._connections.pop(host, None)
+        if pooled is None:
+            return None
+        pooled.unsub_expire()
+        if pooled.password != password or not pooled.pyvlx.connection.connected:
+            self._async_disconnect(pooled.pyvlx)
+            return None
+        LOGGER.debug("Adopting connection to %s", host)
+        return pooled.pyvlx
+
+    @callback
+    def async_discard(self, host: str) -> None:
+        """Disconnect the kept connection of host."""
+        pooled = self._connections.pop(host, None)
+        if pooled is None:
+            return
+        pooled.unsub_expire()
+        self._async_disconnect(pooled.pyvlx)
+
+    @callback
+    def _async_expire(self, host: str, _now: datetime) -> None:
+        """Disconnect the kept connection of host which was not adopted."""
+        LOGGER.debug("Connection to %s was not adopted", host)
+        self.async_discard(host)
+
+    @callback
+    def _async_disconnect(self, pyvlx: PyVLX) -> None:
+        """Disconnect pyvlx in the background."""
+        self._hass.async_create_background_task(
+            pyvlx.disconnect(), "velux pooled connection disconnect"
+        )
+
+    async def _async_stop(self, _event: Event) -> None:
+        """Disconnect every kept connection when hass stops."""
+        connections, self._connections = self._connections, {}
+        for pooled in connections.values():
+            pooled.unsub_expire()
+            await pooled.pyvlx.disconnect()
+
+
+@callback
+@singleton(DATA_POOL)
+def async_get_pool(hass: HomeAssistant) -> VeluxConnectionPool:
+    """Return the connection pool shared by all entries."""
+    return VeluxConnectionPool(hass)
@@ -0,0 +1,96 @@
+"""Timing of the callbacks and commands of the Velux entities."""
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from .const import LOGGER
+
+KIND_UPDATE_CALLBACK = "update_callback"
+KIND_COORDINATOR_LISTENER = "coordinator_listener"
+KIND_COMMAND = "command"
+# Seconds a callback may block the event loop before a warning is logged
+SLOW_THRESHOLDS = {
+    KIND_UPDATE_CALLBACK: 0.05,
+    KIND_COORDINATOR_LISTENER: 0.05,
+}
+# Minimum seconds between two warnings about the same callback
+SLOW_WARNING_INTERVAL = 300
+
+
+@dataclass(slots=True)
+class _Timing:
+    """Aggregated durations of one callback of one entity type."""
+
+    calls: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    slow: int = 0
+
+
+class VeluxProfiler:
+    """Count calls and aggregate durations per kind and entity type."""
+
+    def __init__(self, name: str) -> None:
+        """Initialize the profiler."""
+        self.name = name
+        self._timings: dict[tuple[str, str], _Timing] = {}
+        self._last_warning: dict[tuple[str, str], float] = {}
+
+    @contextmanager
+    def timed(self, kind: str, name: str) -> Iterator[None]:
+        """Record the duration of the block as a call of kind by name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, start)
+
+    def record(self, kind: str, name: str, start: float) -> None:
+        """Record a call of kind by name which started at perf_counter start."""
+        duration = time.perf_counter() - start
+        key = (kind, name)
+        timing = self._timings.get(key)
+        if timing is None:
+            timing = self._timings[key] = _Timing()
+        timing.calls += 1
+        timing.total += duration
+        if duration > timing.max:
+            timing.max = duration
+        threshold = SLOW_THRESHOLDS.get(kind)
+        if threshold is None or duration <= threshold:
+            return
+        timing.slow += 1
+        now = time.monotonic()
+        last_warning = self._last_warning.get(key)
+        if last_warning is not None and now - last_warning < SLOW_WARNING_INTERVAL:
+            return
+        self._last_warning[key] = now
+        LOGGER.warning(
+            "%s of %s on %s took %.3f s, %s of %s calls were slower than %s s",
+            kind,
+            name,
+            self.name,
+            duration,
+            timing.slow,
+            timing.calls,
+            threshold,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the figures per kind, the most expensive entity type first."""
+        profile: dict[str, Any] = {}
+        for (kind, name), timing in sorted(
+            self._timings.items(), key=lambda item: item[1].total, reverse=True
+        ):
+            profile.setdefault(kind, {})[name] = {
+                "calls": timing.calls,
+                "total_ms": round(timing.total * 1000, 3),
+                "mean_ms": round(timing.total / timing.calls * 1000, 3),
+                "max_ms": round(timing.max * 1000, 3),
+                "slow_calls": timing.slow,
+            }
+        return profile
@@ -1,4 +1,5 @@
 """Support for VELUX scenes."""
+from functools import partial
 from typing import Any
 
 from homeassistant.components.scene import Scene
@@ -9,26 +10,31 @@ from pyvlx import PyVLX
 from pyvlx import Scene as PyvlxScene
 
 from .const import DOMAIN, LOGGER
+from .models import VeluxData
+from .scheduler import VeluxCommandScheduler
 
-PARALLEL_UPDATES = 1
+# Commands are paced by the per gateway scheduler.
+PARALLEL_UPDATES = 0
 
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     """Set up the scenes for Velux platform."""
-    pyvlx: PyVLX = hass.data[DOMAIN][entry.entry_id]
-    entities = [VeluxScene(scene) for scene in pyvlx.scenes]
+    data: VeluxData = hass.data[DOMAIN][entry.entry_id]
+    pyvlx: PyVLX = data.pyvlx
+    entities = [VeluxScene(scene, data.scheduler) for scene in pyvlx.scenes]
     async_add_entities(entities)
 
 
 class VeluxScene(Scene):
     """Representation of a Velux scene."""
 
-    def __init__(self, scene: PyvlxScene) -> None:
+    def __init__(self, scene: PyvlxScene, scheduler: VeluxCommandScheduler) -> None:
         """Init velux scene."""
         LOGGER.info("Adding Velux scene: %s", scene)
         self.scene: PyvlxScene = scene
+        self.scheduler: VeluxCommandScheduler = scheduler
 
     @property
     def name(self) -> str:
@@ -42,4 +48,6 @@ class VeluxScene(Scene):
 
     async def async_activate(self, **kwargs: Any) -> None:
         """Activate the scene."""
-        await self.scene.run(wait_for_completion=False)
+        await self.scheduler.async_run(
+            partial(self.scene.run, wait_for_completion=False)
+        )
@@ -0,0 +1,276 @@
+"""Priority scheduler for the commands sent to one KLF200."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass, field
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from pyvlx.exception import PyVLXException
+
+from .sessions import VeluxCommandSession
+
+# Stop commands are started before everything else.
+PRIORITY_STOP = 0
+PRIORITY_COMMAND = 1
+# Sessions open at the same time, the KLF200 rejects commands beyond them.
+SESSION_LIMIT = 4
+# Seconds a command waits while held before it fails.
+HOLD_TIMEOUT = 10
+# Parameters of a node as numbered by the KLF200, the main parameter and the
+# functional parameters 1 to 3.
+CHANNEL_MAIN = 0
+CHANNEL_FP1 = 1
+CHANNEL_FP2 = 2
+CHANNEL_FP3 = 3
+ALL_CHANNELS = (CHANNEL_MAIN, CHANNEL_FP1, CHANNEL_FP2, CHANNEL_FP3)
+
+
+@dataclass(order=True)
+class _ScheduledCommand:
+    """Command waiting for a free session."""
+
+    priority: int
+    sequence: int
+    node_ids: frozenset[int] = field(compare=False)
+    # Node and channel pairs set by the command
+    targets: frozenset[tuple[int, int]] = field(compare=False)
+    job: Callable[[], Awaitable[VeluxCommandSession | None]] = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+    superseded: bool = field(default=False, compare=False)
+    # Called with the nodes a newer command took over, the job skips them
+    drop_nodes: Callable[[frozenset[int]], None] | None = field(
+        default=None, compare=False
+    )
+    # Fails the command if it is still held after HOLD_TIMEOUT
+    expire_handle: asyncio.TimerHandle | None = field(default=None, compare=False)
+
+
+class VeluxCommandScheduler:
+    """Order the commands of all platforms of a gateway.
+
+    Commands run by priority and arrival. A queued command is dropped when a
+    newer command of the same kind sets all of its channels of all of its
+    nodes, a stop drops the moves it covers. Commands accepting drop_nodes
+    lose the nodes a newer command covers. Commands for different nodes
+    run concurrently up to SESSION_LIMIT, a job returning the session of its
+    command keeps its slot until the session is finished.
+    """
+
+    def __init__(self, hass: HomeAssistant, session_limit: int = SESSION_LIMIT) -> None:
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._session_limit = session_limit
+        self._queue: list[_ScheduledCommand] = []
+        self._sequence = itertools.count()
+        self._running = 0
+        # Sessions of finished jobs which the gateway still runs
+        self._open_sessions = 0
+        self._running_nodes: Counter[int] = Counter()
+        self.superseded_commands = 0
+        # Commands whose job raised, e.g. rejected by the gateway
+        self.failed_commands = 0
+        # Commands stay queued while held, e.g. until the gateway is connected
+        self._held = False
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    @property
+    def queue_depth(self) -> int:
+        """Return number of commands waiting for a session."""
+        return sum(not command.superseded for command in self._queue)
+
+    @property
+    def running(self) -> int:
+        """Return number of commands in flight."""
+        return self._running
+
+    @property
+    def open_sessions(self) -> int:
+        """Return number of sessions started by the commands and not finished."""
+        return self._open_sessions
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for changes of the queued and running commands."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove update listener."""
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def async_hold(self) -> None:
+        """Keep new commands queued until async_resume, for HOLD_TIMEOUT at most."""
+        self._held = True
+
+    @callback
+    def async_resume(self) -> None:
+        """Start the commands queued while held."""
+        self._held = False
+        self._async_start_next()
+
+    async def async_run(
+        self,
+        job: Callable[[], Awaitable[VeluxCommandSession | None]],
+        node_ids: Iterable[int] = (),
+        priority: int = PRIORITY_COMMAND,
+        channels: Iterable[int] = (CHANNEL_MAIN,),
+        drop_nodes: Callable[[frozenset[int]], None] | None = None,
+    ) -> None:
+        """Run job once it is its turn, returns early if it was superseded.
+
+        channels are the parameters job sets on each of node_ids. drop_nodes
+        is called with the nodes of job superseded by a newer command.
+        """
+        node_ids = frozenset(node_ids)
+        channels = tuple(channels)
+        command = _ScheduledCommand(
+            priority=priority,
+            sequence=next(self._sequence),
+            node_ids=node_ids,
+            targets=frozenset(
+                (node_id, channel) for node_id in node_ids for channel in channels
+            ),
+            job=job,
+            future=self._hass.loop.create_future(),
+            drop_nodes=drop_nodes,
+        )
+        if self._held:
+            command.expire_handle = self._hass.loop.call_later(
+                HOLD_TIMEOUT, self._async_expire, command
+            )
+        if command.targets:
+            self._async_supersede(command)
+        heapq.heappush(self._queue, command)
+        self._async_start_next()
+        try:
+            await command.future
+        finally:
+            if command.expire_handle is not None:
+                command.expire_handle.cancel()
+
+    @callback
+    def _async_supersede(self, command: _ScheduledCommand) -> None:
+        """Drop the queued commands and nodes whose targets command sets."""
+        for queued in self._queue:
+            if (
+                queued.superseded
+                or not queued.targets
+                # Moves never drop a stop
+                or (
+                    queued.priority == PRIORITY_STOP
+                    and command.priority != PRIORITY_STOP
+                )
+            ):
+                continue
+            if queued.targets <= command.targets:
+                queued.superseded = True
+                self.superseded_commands += 1
+                queued.future.set_result(None)
+                continue
+            if queued.drop_nodes is None:
+                continue
+            covered = frozenset(
+                node_id
+                for node_id in queued.node_ids
+                if all(
+                    target in command.targets
+                    for target in queued.targets
+                    if target[0] == node_id
+                )
+            )
+            if covered:
+                queued.node_ids -= covered
+                queued.targets = frozenset(
+                    target for target in queued.targets if target[0] not in covered
+                )
+                queued.drop_nodes(covered)
+
+    @callback
+    def _async_start_next(self) -> None:
+        """Start queued commands while sessions are free."""
+        deferred: list[_ScheduledCommand] = []
+        # Nodes of deferred commands, later commands must not overtake them
+        deferred_nodes: set[int] = set()
+        while (
+            self._queue
+            and not self._held
+            and self._running + self._open_sessions < self._session_limit
+        ):
+            command = heapq.heappop(self._queue)
+            if command.superseded:
+                continue
+            # Commands for a node run one after the other, stop does not wait
+            if command.priority != PRIORITY_STOP and any(
+                self._running_nodes[node_id] or node_id in deferred_nodes
+                for node_id in command.node_ids
+            ):
+                deferred.append(command)
+                deferred_nodes.update(command.node_ids)
+                continue
+            self._running += 1
+            self._running_nodes.update(command.node_ids)
+            self._hass.async_create_task(self._async_execute(command))
+        for command in deferred:
+            heapq.heappush(self._queue, command)
+        for update_callback in self._listeners:
+            update_callback()
+
+    @callback
+    def _async_expire(self, command: _ScheduledCommand) -> None:
+        """Fail a command which is still held, e.g. the gateway is unreachable."""
+        if not self._held or command.future.done():
+            return
+        # Skipped like a superseded command when it is popped
+        command.superseded = True
+        command.future.set_exception(
+            HomeAssistantError(f"KLF200 not connected within {HOLD_TIMEOUT} s")
+        )
+        for update_callback in self._listeners:
+            update_callback()
+
+    async def _async_execute(self, command: _ScheduledCommand) -> None:
+        """Run a command and start the next one."""
+        session: VeluxCommandSession | None = None
+        try:
+            result = await command.job()
+            # Other jobs, e.g. the commands of pyvlx, return their own results
+            if isinstance(result, VeluxCommandSession):
+                session = result
+        except Exception as err:  # pylint: disable=broad-except
+            self.failed_commands += 1
+            if not command.future.done():
+                command.future.set_exception(err)
+        else:
+            if not command.future.done():
+                command.future.set_result(None)
+        finally:
+            self._running -= 1
+            self._running_nodes.subtract(command.node_ids)
+            # Further commands of the node may replace the session right away
+            if session is not None and not session.future.done():
+                self._open_sessions += 1
+                session.future.add_done_callback(self._async_session_finished)
+            self._async_start_next()
+
+    @callback
+    def _async_session_finished(self, future: asyncio.Future[bool]) -> None:
+        """Free the slot of a finished, failed or timed out session."""
+        self._open_sessions -= 1
+        self._async_start_next()
+
+    async def async_shutdown(self) -> None:
+        """Drop commands which have not been started yet."""
+        queue, self._queue = self._queue, []
+        for command in queue:
+            if not command.future.done():
+                command.future.set_exception(
+                    PyVLXException("Connection to KLF200 closed")
+                )
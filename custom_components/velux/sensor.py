@@ -1,7 +1,15 @@
 """Support for VELUX sensors."""
+from datetime import datetime
+from typing import Any
+
 from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorDeviceClass
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import UnitOfTime
 from homeassistant.core import callback, HomeAssistant
 from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
@@ -9,6 +17,8 @@ from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from pyvlx import PyVLX
 
 from .const import DOMAIN
+from .models import VeluxData
+from .profiler import KIND_UPDATE_CALLBACK, VeluxProfiler
 
 
 async def async_setup_entry(
@@ -16,18 +26,34 @@ async def async_setup_entry(
 ) -> None:
     """Set up sensor(s) for Velux platform."""
     entities = []
-    pyvlx: PyVLX = hass.data[DOMAIN][entry.entry_id]
-    entities.append(VeluxConnectionCounter(pyvlx, entry))
-    entities.append(VeluxConnectionState(pyvlx, entry))
+    data: VeluxData = hass.data[DOMAIN][entry.entry_id]
+    pyvlx: PyVLX = data.pyvlx
+    entities.append(VeluxConnectionCounter(pyvlx, entry, data.profiler))
+    entities.append(VeluxConnectionState(pyvlx, entry, data.profiler))
+    entities.append(VeluxSuppressedStateWrites(data, entry))
+    entities.append(VeluxUnchangedStateUpdates(data, entry))
+    entities.append(VeluxHeartbeatRefreshedNodes(data, entry))
+    entities.append(VeluxCommandLatency(data, entry))
+    entities.append(VeluxFramesPerMinute(data, entry))
+    entities.append(VeluxCommandQueueDepth(data, entry))
+    entities.append(VeluxCommandsInFlight(data, entry))
+    entities.append(VeluxCommandTimeouts(data, entry))
+    entities.append(VeluxCommandErrors(data, entry))
+    entities.append(VeluxLastFrame(data, entry))
     async_add_entities(entities)
 
 
 class VeluxConnectionCounter(SensorEntity):
     """Representation of a Velux number."""
 
-    def __init__(self, pyvlx: PyVLX, entry: ConfigEntry) -> None:
+    _attr_should_poll = False
+
+    def __init__(
+        self, pyvlx: PyVLX, entry: ConfigEntry, profiler: VeluxProfiler
+    ) -> None:
         """Initialize the cover."""
         self.pyvlx: PyVLX = pyvlx
+        self.profiler = profiler
         self._attr_unique_id = f"{entry.unique_id}_connection_counter"
         self._attr_name = "Connection Counter"
         self._attr_device_info = DeviceInfo(
@@ -39,13 +65,228 @@ class VeluxConnectionCounter(SensorEntity):
         """Return true if connected."""
         return self.pyvlx.connection.connection_counter
 
+    @callback
+    async def after_update_callback(self):
+        """Call after the connection was opened or closed."""
+        with self.profiler.timed(KIND_UPDATE_CALLBACK, type(self).__name__):
+            self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Register callbacks to update hass after the connection changed."""
+        self.pyvlx.connection.register_connection_opened_cb(self.after_update_callback)
+        self.pyvlx.connection.register_connection_closed_cb(self.after_update_callback)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister callbacks to update hass after the connection changed."""
+        self.pyvlx.connection.unregister_connection_opened_cb(self.after_update_callback)
+        self.pyvlx.connection.unregister_connection_closed_cb(self.after_update_callback)
+
+
+class VeluxHeartbeatRefreshedNodes(SensorEntity):
+    """Number of nodes asked for their status by the last heartbeat."""
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(self, data: VeluxData, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        self.data: VeluxData = data
+        self._attr_unique_id = f"{entry.unique_id}_heartbeat_refreshed_nodes"
+        self._attr_name = "Heartbeat Refreshed Nodes"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, str(entry.unique_id))},
+        )
+
+    @property
+    def native_value(self) -> int | None:
+        """Return number of nodes refreshed by the last heartbeat."""
+        return self.data.heartbeat.refreshed_nodes
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return stale nodes and the interval chosen for the next heartbeat."""
+        return {
+            "stale_nodes": self.data.heartbeat.stale_nodes,
+            "interval": self.data.heartbeat.current_interval,
+            "interval_reason": self.data.heartbeat.interval_reason,
+        }
+
+    @callback
+    async def after_pulse_callback(self) -> None:
+        """Call after the heartbeat pulsed."""
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Register callback to update hass after each heartbeat."""
+        self.data.heartbeat.register_pulse_cb(self.after_pulse_callback)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister callback to update hass after each heartbeat."""
+        self.data.heartbeat.unregister_pulse_cb(self.after_pulse_callback)
+
+
+class VeluxTelemetrySensor(SensorEntity):
+    """Base class of the gateway figures pushed by VeluxTelemetry."""
+
+    _attr_should_poll = False
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _key: str
+
+    def __init__(self, data: VeluxData, entry: ConfigEntry) -> None:
+        """Initialize the sensor."""
+        self.data: VeluxData = data
+        self._attr_unique_id = f"{entry.unique_id}_{self._key}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, str(entry.unique_id))},
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Register callback to update hass when the figures were updated."""
+        self.async_on_remove(
+            self.data.telemetry.async_add_listener(self.async_write_ha_state)
+        )
+
+
+class VeluxSuppressedStateWrites(VeluxTelemetrySensor):
+    """Number of node state writes skipped while nodes were moving.
+
+    Published with the telemetry, writing the counter on every skipped write
+    would defeat it.
+    """
+
+    _key = "suppressed_state_writes"
+    _attr_name = "Suppressed State Writes"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self) -> int:
+        """Return number of suppressed state writes."""
+        return self.data.suppressed_state_writes
+
+
+class VeluxUnchangedStateUpdates(VeluxTelemetrySensor):
+    """Number of node updates which did not change the entity state."""
+
+    _key = "unchanged_state_updates"
+    _attr_name = "Unchanged State Updates"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self) -> int:
+        """Return number of node updates without state change."""
+        return self.data.unchanged_state_updates
+
+
+class VeluxCommandLatency(VeluxTelemetrySensor):
+    """Median round trip time of the last commands."""
+
+    _key = "command_latency"
+    _attr_name = "Command Latency"
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.SECONDS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self) -> float | None:
+        """Return median round trip time."""
+        return self.data.telemetry.latency_percentile(50)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return upper percentiles and number of samples."""
+        return {
+            "p90": self.data.telemetry.latency_percentile(90),
+            "p99": self.data.telemetry.latency_percentile(99),
+            "samples": self.data.telemetry.latency_samples,
+        }
+
+
+class VeluxFramesPerMinute(VeluxTelemetrySensor):
+    """Frames received from the gateway within the last minute."""
+
+    _key = "frames_per_minute"
+    _attr_name = "Frames per Minute"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self) -> int:
+        """Return number of frames received within the last minute."""
+        return self.data.telemetry.frames_per_minute
+
+
+class VeluxCommandQueueDepth(VeluxTelemetrySensor):
+    """Commands waiting for a free session."""
+
+    _key = "command_queue_depth"
+    _attr_name = "Command Queue Depth"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self) -> int:
+        """Return number of queued commands."""
+        return self.data.telemetry.queue_depth
+
+
+class VeluxCommandsInFlight(VeluxTelemetrySensor):
+    """Commands being sent to the gateway."""
+
+    _key = "commands_in_flight"
+    _attr_name = "Commands in Flight"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    @property
+    def native_value(self) -> int:
+        """Return number of running commands."""
+        return self.data.telemetry.commands_in_flight
+
+
+class VeluxCommandTimeouts(VeluxTelemetrySensor):
+    """Command sessions which were not finished in time."""
+
+    _key = "command_timeouts"
+    _attr_name = "Command Timeouts"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self) -> int:
+        """Return number of timed out sessions."""
+        return self.data.telemetry.timeouts
+
+
+class VeluxCommandErrors(VeluxTelemetrySensor):
+    """Commands which could not be sent."""
+
+    _key = "command_errors"
+    _attr_name = "Command Errors"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+
+    @property
+    def native_value(self) -> int:
+        """Return number of failed commands."""
+        return self.data.telemetry.errors
+
+
+class VeluxLastFrame(VeluxTelemetrySensor):
+    """Time the last frame was received from the gateway."""
+
+    _key = "last_frame"
+    _attr_name = "Last Frame"
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Return time of the last received frame."""
+        return self.data.telemetry.last_frame
+
 
 class VeluxConnectionState(BinarySensorEntity):
     """Representation of a Velux state."""
 
-    def __init__(self, pyvlx: PyVLX, entry: ConfigEntry):
+    def __init__(self, pyvlx: PyVLX, entry: ConfigEntry, profiler: VeluxProfiler):
         """Initialize the cover."""
         self.pyvlx: PyVLX = pyvlx
+        self.profiler = profiler
         self._attr_unique_id = f"{entry.unique_id}_connection_state"
         self._attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
         self._attr_name = "Connection State"
@@ -61,7 +302,8 @@ class VeluxConnectionState(BinarySensorEntity):
     @callback
     async def after_update_callback(self):
         """Call after device was updated."""
-        self.async_write_ha_state()
+        with self.profiler.timed(KIND_UPDATE_CALLBACK, type(self).__name__):
+            self.async_write_ha_state()
 
     async def async_added_to_hass(self) -> None:
         """Register callbacks to update hass after device was changed."""
@@ -0,0 +1,274 @@
+"""Tracking of KLF200 command sessions from request to completion."""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from pyvlx import Parameter, Position, PyVLX
+from pyvlx.api.command_send import CommandSend
+from pyvlx.api.frames import (
+    FrameBase,
+    FrameCommandRunStatusNotification,
+    FrameCommandSendConfirmation,
+    FrameCommandSendRequest,
+    FrameSessionFinishedNotification,
+)
+
+from .const import EVENT_COMMAND_COMPLETED, LOGGER
+
+# Seconds after which a session without finished notification is failed.
+SESSION_TIMEOUT = 30
+# Covers may take minutes for a full move.
+COVER_SESSION_TIMEOUT = 300
+# Weight of the latest confirmation in the per node latency average.
+LATENCY_SMOOTHING = 0.3
+
+STATUS_COMPLETED = "completed"
+STATUS_FAILED = "failed"
+STATUS_TIMEOUT = "timeout"
+STATUS_CANCELLED = "cancelled"
+
+
+def _to_percent(value: int | None) -> int | None:
+    """Return a parameter value in percent as used by HA, 100 is open/on."""
+    if value is None or value > Parameter.MAX:
+        return None
+    parameter = Parameter(value.to_bytes(2, "big"))
+    return 100 - Position(parameter=parameter).position_percent
+
+
+@dataclass
+class VeluxCommandSession:
+    """Command session of the KLF200."""
+
+    session_id: int
+    node_ids: tuple[int, ...]
+    target: Parameter
+    future: asyncio.Future[bool]
+    timeout: float
+    # Node parameter set to target, the main parameter or a functional one
+    parameter_id: int = 0
+    started: float = field(default_factory=time.monotonic)
+    # Time the gateway answered the request
+    confirmed: float | None = None
+    finished: float | None = None
+    status: str | None = None
+    # Last value of parameter_id reported per node by the run status
+    # notifications
+    reached: dict[int, int] = field(default_factory=dict)
+    timeout_handle: asyncio.TimerHandle | None = None
+
+    @property
+    def duration(self) -> float | None:
+        """Return seconds from request to session finished."""
+        if self.finished is None:
+            return None
+        return self.finished - self.started
+
+    @property
+    def confirmation_latency(self) -> float | None:
+        """Return seconds from request to the answer of the gateway."""
+        if self.confirmed is None:
+            return None
+        return self.confirmed - self.started
+
+    @property
+    def run_time(self) -> float | None:
+        """Return seconds from the answer of the gateway to session finished."""
+        if self.confirmed is None or self.finished is None:
+            return None
+        return self.finished - self.confirmed
+
+    def reached_target(self, node_id: int) -> bool:
+        """Return False if node reported a value other than the target."""
+        value = self.reached.get(node_id)
+        return value is None or value == int.from_bytes(self.target.raw, "big")
+
+
+class TrackedCommandSend(CommandSend):
+    """CommandSend whose session is followed by a VeluxSessionTracker."""
+
+    def __init__(
+        self,
+        pyvlx: PyVLX,
+        tracker: VeluxSessionTracker,
+        node_id: int,
+        parameter: Parameter,
+        session_timeout: float = SESSION_TIMEOUT,
+        target: Parameter | None = None,
+        parameter_id: int = 0,
+        **kwargs: Any,
+    ) -> None:
+        """Initialize TrackedCommandSend.
+
+        target is the value sent for parameter_id, the main parameter by
+        default, e.g. the position of a curtain carried in a functional
+        parameter.
+        """
+        super().__init__(pyvlx=pyvlx, node_id=node_id, parameter=parameter, **kwargs)
+        self.tracker = tracker
+        self.session_timeout = session_timeout
+        self.target = parameter if target is None else target
+        self.parameter_id = parameter_id
+        self.session: VeluxCommandSession | None = None
+
+    def track(self, frame: FrameCommandSendRequest) -> FrameCommandSendRequest:
+        """Start tracking the session of frame."""
+        assert self.session_id is not None
+        self.session = self.tracker.async_track(
+            self.session_id,
+            tuple(frame.node_ids),
+            self.target,
+            self.session_timeout,
+            self.parameter_id,
+        )
+        return frame
+
+    def request_frame(self) -> FrameCommandSendRequest:
+        """Construct initiating frame and start tracking its session."""
+        return self.track(super().request_frame())
+
+
+class VeluxSessionTracker:
+    """Follow command sessions by the notifications of the gateway.
+
+    Finished sessions fire EVENT_COMMAND_COMPLETED once per node.
+    """
+
+    def __init__(self, hass: HomeAssistant, pyvlx: PyVLX) -> None:
+        """Initialize the tracker."""
+        self._hass = hass
+        self._pyvlx = pyvlx
+        self._sessions: dict[int, VeluxCommandSession] = {}
+        # Smoothed seconds from request to confirmation per node
+        self.confirmation_latency: dict[int, float] = {}
+        self._listeners: list[Callable[[VeluxCommandSession], None]] = []
+
+    @callback
+    def async_add_listener(
+        self, finished_callback: Callable[[VeluxCommandSession], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for finished sessions."""
+        self._listeners.append(finished_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove finished listener."""
+            self._listeners.remove(finished_callback)
+
+        return remove_listener
+
+    @callback
+    def start(self) -> None:
+        """Start following the frames of the gateway."""
+        self._pyvlx.connection.register_frame_received_cb(self._async_frame_received)
+
+    @callback
+    def stop(self) -> None:
+        """Stop following frames and cancel the open sessions."""
+        self._pyvlx.connection.unregister_frame_received_cb(self._async_frame_received)
+        for session in list(self._sessions.values()):
+            self._async_finish(session, STATUS_CANCELLED)
+
+    @callback
+    def async_track(
+        self,
+        session_id: int,
+        node_ids: tuple[int, ...],
+        target: Parameter,
+        timeout: float = SESSION_TIMEOUT,
+        parameter_id: int = 0,
+    ) -> VeluxCommandSession:
+        """Start tracking a session before its request is sent."""
+        session = VeluxCommandSession(
+            session_id=session_id,
+            node_ids=node_ids,
+            target=target,
+            future=self._hass.loop.create_future(),
+            timeout=timeout,
+            parameter_id=parameter_id,
+        )
+        session.timeout_handle = self._hass.loop.call_later(
+            timeout, self._async_finish, session, STATUS_TIMEOUT
+        )
+        self._sessions[session_id] = session
+        return session
+
+    @callback
+    def async_discard(self, session: VeluxCommandSession) -> None:
+        """Stop tracking a session whose request was not accepted."""
+        self._async_finish(session, STATUS_CANCELLED)
+
+    async def _async_frame_received(self, frame: FrameBase) -> None:
+        """Update sessions from confirmation, run status and finished frames."""
+        if isinstance(frame, FrameCommandSendConfirmation):
+            session = self._sessions.get(frame.session_id)
+            if session is not None and session.confirmed is None:
+                session.confirmed = time.monotonic()
+        elif isinstance(frame, FrameCommandRunStatusNotification):
+            session = self._sessions.get(frame.session_id)
+            if session is not None and frame.node_parameter == session.parameter_id:
+                session.reached[frame.index_id] = frame.parameter_value
+        elif isinstance(frame, FrameSessionFinishedNotification):
+            session = self._sessions.get(frame.session_id)
+            if session is not None:
+                self._async_finish(session, STATUS_COMPLETED)
+
+    @callback
+    def _async_finish(self, session: VeluxCommandSession, status: str) -> None:
+        """Close a session, record the latency and fire the events."""
+        if session.status is not None:
+            return
+        self._sessions.pop(session.session_id, None)
+        if session.timeout_handle is not None:
+            session.timeout_handle.cancel()
+        session.finished = time.monotonic()
+        session.status = status
+        duration = session.finished - session.started
+        confirmation_latency = session.confirmation_latency
+
+        for node_id in session.node_ids:
+            node_status = status
+            if status == STATUS_COMPLETED and not session.reached_target(node_id):
+                node_status = STATUS_FAILED
+            if confirmation_latency is not None:
+                latency = self.confirmation_latency.get(node_id)
+                self.confirmation_latency[node_id] = (
+                    confirmation_latency
+                    if latency is None
+                    else latency
+                    + LATENCY_SMOOTHING * (confirmation_latency - latency)
+                )
+            if status == STATUS_CANCELLED:
+                continue
+            self._hass.bus.async_fire(
+                EVENT_COMMAND_COMPLETED,
+                {
+                    "node_id": node_id,
+                    "name": (
+                        self._pyvlx.nodes[node_id].name
+                        if node_id in self._pyvlx.nodes
+                        else None
+                    ),
+                    "session_id": session.session_id,
+                    "target": _to_percent(int.from_bytes(session.target.raw, "big")),
+                    "reached": _to_percent(session.reached.get(node_id)),
+                    "duration": round(duration, 3),
+                    "status": node_status,
+                },
+            )
+        LOGGER.debug(
+            "Session %s for nodes %s %s after %.3f s",
+            session.session_id,
+            session.node_ids,
+            status,
+            duration,
+        )
+        for finished_callback in self._listeners:
+            finished_callback(session)
+        if not session.future.done():
+            session.future.set_result(status == STATUS_COMPLETED)
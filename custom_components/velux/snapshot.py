@@ -0,0 +1,248 @@
+"""Persistent snapshot of the KLF200 node and scene tables."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from pyvlx import (
+    Awning,
+    Blade,
+    Blind,
+    GarageDoor,
+    Gate,
+    Light,
+    Node,
+    OnOffSwitch,
+    OpeningDevice,
+    Parameter,
+    Position,
+    PyVLX,
+    RollerShutter,
+    Scene,
+    Window,
+)
+from pyvlx.api import GetAllNodesInformation, GetSceneList
+from pyvlx.exception import PyVLXException
+from pyvlx.node_helper import convert_frame_to_node
+from pyvlx.opening_device import DualRollerShutter
+
+from .const import DOMAIN, LOGGER
+
+STORAGE_VERSION = 1
+# Seconds to wait after a node update before the snapshot is written.
+SAVE_DELAY = 60
+
+NODE_TYPES: dict[str, type[Node]] = {
+    node_type.__name__: node_type
+    for node_type in (
+        Awning,
+        Blade,
+        Blind,
+        DualRollerShutter,
+        GarageDoor,
+        Gate,
+        Light,
+        OnOffSwitch,
+        RollerShutter,
+        Window,
+    )
+}
+
+
+class VeluxSnapshot:
+    """Store nodes, scenes and last known positions of a KLF200."""
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, pyvlx: PyVLX) -> None:
+        """Initialize the snapshot."""
+        self.pyvlx: PyVLX = pyvlx
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}"
+        )
+        self._tracked: list[Node] = []
+
+    async def async_restore(self) -> bool:
+        """Create nodes and scenes from the stored snapshot.
+
+        Returns False if there is no usable snapshot.
+        """
+        data = await self._store.async_load()
+        if not data or not data.get("nodes"):
+            return False
+        for node_data in data["nodes"]:
+            try:
+                node = self._node_from_dict(node_data)
+            except PyVLXException as err:
+                # Reconciling finds the node missing and reloads the tables
+                LOGGER.warning(
+                    "Ignoring stored node %s: %s", node_data.get("node_id"), err
+                )
+                continue
+            if node is not None:
+                self.pyvlx.nodes.add(node)
+        for scene_data in data.get("scenes", []):
+            self.pyvlx.scenes.add(
+                Scene(
+                    pyvlx=self.pyvlx,
+                    scene_id=scene_data["scene_id"],
+                    name=scene_data["name"],
+                )
+            )
+        LOGGER.debug(
+            "Restored %s nodes and %s scenes from snapshot",
+            len(self.pyvlx.nodes),
+            len(self.pyvlx.scenes),
+        )
+        return len(self.pyvlx.nodes) > 0
+
+    def _node_from_dict(self, node_data: dict[str, Any]) -> Node | None:
+        """Create a pyvlx node from its stored representation."""
+        node_type = NODE_TYPES.get(node_data["type"])
+        if node_type is None:
+            return None
+        kwargs: dict[str, Any] = {
+            "pyvlx": self.pyvlx,
+            "node_id": node_data["node_id"],
+            "name": node_data["name"],
+            "serial_number": node_data["serial_number"],
+        }
+        if issubclass(node_type, OpeningDevice) and "position" in node_data:
+            kwargs["position_parameter"] = Parameter(
+                raw=bytes.fromhex(node_data["position"])
+            )
+        if node_type is Window:
+            kwargs["rain_sensor"] = node_data.get("rain_sensor", False)
+        return node_type(**kwargs)
+
+    @staticmethod
+    def _node_to_dict(node: Node) -> dict[str, Any]:
+        """Return the stored representation of a node."""
+        node_data: dict[str, Any] = {
+            "node_id": node.node_id,
+            "type": type(node).__name__,
+            "name": node.name,
+            "serial_number": node.serial_number,
+        }
+        if isinstance(node, OpeningDevice):
+            node_data["position"] = node.position.raw.hex()
+        if isinstance(node, Window):
+            node_data["rain_sensor"] = node.rain_sensor
+        return node_data
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the snapshot of the current tables."""
+        return {
+            "nodes": [
+                self._node_to_dict(node)
+                for node in self.pyvlx.nodes
+                if type(node).__name__ in NODE_TYPES
+            ],
+            "scenes": [
+                {"scene_id": scene.scene_id, "name": scene.name}
+                for scene in self.pyvlx.scenes
+            ],
+        }
+
+    @callback
+    def async_schedule_save(self) -> None:
+        """Write the snapshot after SAVE_DELAY seconds."""
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Write the snapshot now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def _async_node_updated(self, node: Node) -> None:
+        """Keep the last known positions in the snapshot."""
+        self.async_schedule_save()
+
+    @callback
+    def async_track_nodes(self) -> None:
+        """Save the snapshot after node updates."""
+        self.async_untrack_nodes()
+        self._tracked = list(self.pyvlx.nodes)
+        for node in self._tracked:
+            node.register_device_updated_cb(self._async_node_updated)
+
+    @callback
+    def async_untrack_nodes(self) -> None:
+        """Stop saving the snapshot after node updates."""
+        for node in self._tracked:
+            node.unregister_device_updated_cb(self._async_node_updated)
+        self._tracked = []
+
+    async def async_reconcile(self) -> bool:
+        """Apply differences between the gateway and the restored tables.
+
+        Positions of known nodes and names of known scenes are updated in
+        place. Returns True if scenes were added or removed, or nodes were
+        added, removed or changed their type, name or serial number, which
+        requires new entities. The tables are then replaced by the ones
+        just read from the gateway.
+        """
+        get_all_nodes_information = GetAllNodesInformation(pyvlx=self.pyvlx)
+        await get_all_nodes_information.do_api_call()
+        if not get_all_nodes_information.success:
+            raise PyVLXException("Unable to retrieve node information")
+
+        changed_tables = False
+        fresh_nodes: list[Node] = []
+        for frame in get_all_nodes_information.notification_frames:
+            fresh = convert_frame_to_node(self.pyvlx, frame)
+            if fresh is None:
+                continue
+            fresh_nodes.append(fresh)
+            if fresh.node_id not in self.pyvlx.nodes:
+                changed_tables = True
+                continue
+            node = self.pyvlx.nodes[fresh.node_id]
+            if (
+                type(node) is not type(fresh)
+                or node.name != fresh.name
+                or node.serial_number != fresh.serial_number
+            ):
+                changed_tables = True
+                continue
+            if isinstance(node, OpeningDevice) and isinstance(fresh, OpeningDevice):
+                position = Position(parameter=fresh.position)
+                if position.position <= Parameter.MAX and node.position != position:
+                    node.position = position
+                    await node.after_update()
+        if {node.node_id for node in self.pyvlx.nodes} != {
+            node.node_id for node in fresh_nodes
+        }:
+            changed_tables = True
+
+        get_scene_list = GetSceneList(pyvlx=self.pyvlx)
+        await get_scene_list.do_api_call()
+        if not get_scene_list.success:
+            raise PyVLXException("Unable to retrieve scene information")
+        scene_ids = {scene.scene_id for scene in self.pyvlx.scenes}
+        if {scene_id for scene_id, _ in get_scene_list.scenes} != scene_ids:
+            changed_tables = True
+        for scene_id, name in get_scene_list.scenes:
+            if scene_id in scene_ids:
+                self.pyvlx.scenes[scene_id].name = name
+
+        if changed_tables:
+            self._discard_nodes(list(self.pyvlx.nodes))
+            self.pyvlx.nodes.clear()
+            for node in fresh_nodes:
+                self.pyvlx.nodes.add(node)
+            self.pyvlx.scenes.clear()
+            for scene_id, name in get_scene_list.scenes:
+                self.pyvlx.scenes.add(
+                    Scene(pyvlx=self.pyvlx, scene_id=scene_id, name=name)
+                )
+        else:
+            # The fresh nodes were only used for comparison
+            self._discard_nodes(fresh_nodes)
+        return changed_tables
+
+    def _discard_nodes(self, nodes: list[Node]) -> None:
+        """Unregister the connection callbacks nodes registered when created."""
+        for node in nodes:
+            self.pyvlx.connection.unregister_connection_opened_cb(node.after_update)
+            self.pyvlx.connection.unregister_connection_closed_cb(node.after_update)
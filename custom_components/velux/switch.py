@@ -9,13 +9,16 @@ from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.restore_state import RestoreEntity
-from pyvlx import OnOffSwitch, OpeningDevice, PyVLX
-from pyvlx.opening_device import DualRollerShutter
+from pyvlx import OnOffSwitch, OpeningDevice, Parameter, PyVLX
+from pyvlx.parameter import SwitchParameter, SwitchParameterOff, SwitchParameterOn
 
 from .const import DOMAIN, LOGGER
+from .heartbeat import VeluxIncrementalHeartbeat
+from .models import VeluxData
 from .node_entity import VeluxNodeEntity
 
-PARALLEL_UPDATES = 1
+# Commands are paced by the per gateway scheduler.
+PARALLEL_UPDATES = 0
 
 
 async def async_setup_entry(
@@ -23,16 +26,17 @@ async def async_setup_entry(
 ) -> None:
     """Set up sensor(s) for Velux platform."""
     entities: list = []
-    pyvlx: PyVLX = hass.data[DOMAIN][entry.entry_id]
+    data: VeluxData = hass.data[DOMAIN][entry.entry_id]
+    pyvlx: PyVLX = data.pyvlx
     entities.append(VeluxHouseStatusMonitor(pyvlx, entry))
     entities.append(VeluxHeartbeat(pyvlx, entry))
     entities.append(VeluxHeartbeatLoadAllStates(pyvlx, entry))
-    for node in pyvlx.nodes:
-        if isinstance(node, OnOffSwitch):
-            LOGGER.debug("Switch will be added: %s", node.name)
-            entities.append(VeluxSwitch(node, entry))
-        if isinstance(node, OpeningDevice) and not isinstance(node, DualRollerShutter):
-            entities.append(VeluxDefaultVelocityUsedSwitch(node))
+    entities.append(VeluxHeartbeatAdaptiveInterval(data.heartbeat, entry))
+    for node in data.node_index.switches.values():
+        LOGGER.debug("Switch will be added: %s", node.name)
+        entities.append(VeluxSwitch(node, entry))
+    for node in data.node_index.velocity_nodes.values():
+        entities.append(VeluxDefaultVelocityUsedSwitch(node))
     async_add_entities(entities)
 
 
@@ -45,18 +49,26 @@ class VeluxSwitch(VeluxNodeEntity, SwitchEntity):
         """Initialize the switch."""
         super().__init__(node, entry)
 
+    def _render_state(self) -> bool:
+        """Return the state of the switch read from the node."""
+        return self.node.is_on()
+
     @property
     def is_on(self) -> bool:
         """Return true if on."""
-        return self.node.is_on()
+        return self.state_snapshot
+
+    def _apply_parameter(self, parameter: Parameter) -> None:
+        """Store a confirmed switch state in the node."""
+        self.node.parameter = SwitchParameter(parameter)
 
     async def async_turn_on(self) -> None:
         """Turn the switch on."""
-        await self.node.set_on()
+        await self.async_send_optimistic(SwitchParameterOn(), True)
 
     async def async_turn_off(self) -> None:
         """Turn the switch off."""
-        await self.node.set_off()
+        await self.async_send_optimistic(SwitchParameterOff(), False)
 
 
 class VeluxDefaultVelocityUsedSwitch(SwitchEntity, RestoreEntity):
@@ -182,3 +194,37 @@ class VeluxHeartbeatLoadAllStates(SwitchEntity):
     def turn_off(self, **kwargs: Any) -> None:
         """Turn the switch off."""
         self.pyvlx.heartbeat.load_all_states = False
+
+
+class VeluxHeartbeatAdaptiveInterval(SwitchEntity, RestoreEntity):
+    """Representation of a VeluxHeartbeatAdaptiveInterval switch."""
+
+    def __init__(self, heartbeat: VeluxIncrementalHeartbeat, entry: ConfigEntry) -> None:
+        """Initialize the switch."""
+        self.heartbeat = heartbeat
+        self._attr_unique_id = f"{entry.unique_id}_heartbeat_adaptive_interval"
+        self._attr_entity_category = EntityCategory.CONFIG
+        self._attr_device_class = SwitchDeviceClass.SWITCH
+        self._attr_name = "Adaptive Heartbeat Interval"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, str(entry.unique_id))},
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Restore state from last state."""
+        await super().async_added_to_hass()
+        last_state = await self.async_get_last_state()
+        self.heartbeat.adaptive = last_state is not None and last_state.state == "on"
+
+    @property
+    def is_on(self) -> bool:
+        """Return true if on."""
+        return self.heartbeat.adaptive
+
+    def turn_on(self, **kwargs: Any) -> None:
+        """Turn the switch on."""
+        self.heartbeat.adaptive = True
+
+    def turn_off(self, **kwargs: Any) -> None:
+        """Turn the switch off."""
+        self.heartbeat.adaptive = False
@@ -0,0 +1,183 @@
+"""Rolling performance figures of one KLF200."""
+from __future__ import annotations
+
+import math
+import time
+from collections import deque
+from datetime import datetime
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+from pyvlx import PyVLX
+from pyvlx.api.frames import FrameBase
+
+from .scheduler import VeluxCommandScheduler
+from .sessions import (
+    STATUS_COMPLETED,
+    STATUS_TIMEOUT,
+    VeluxCommandSession,
+    VeluxSessionTracker,
+)
+
+# Round trip times and run times of the last commands kept for the percentiles.
+LATENCY_SAMPLES = 200
+# Seconds of received frames counted for the frame rate.
+FRAME_WINDOW = 60
+# Seconds between two updates of the listeners, changes are collected.
+PUBLISH_INTERVAL = 10
+
+
+def _percentile(samples: list[float], percent: float) -> float | None:
+    """Return the nearest rank percentile of sorted samples."""
+    if not samples:
+        return None
+    rank = max(math.ceil(percent / 100 * len(samples)), 1)
+    return samples[rank - 1]
+
+
+class VeluxTelemetry:
+    """Collect command, queue and frame figures of a gateway.
+
+    Figures are kept in bounded rolling windows. Listeners are informed at
+    most once per PUBLISH_INTERVAL, and again until the frame rate decayed.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        pyvlx: PyVLX,
+        scheduler: VeluxCommandScheduler,
+        tracker: VeluxSessionTracker,
+    ) -> None:
+        """Initialize the telemetry."""
+        self._hass = hass
+        self._pyvlx = pyvlx
+        self._scheduler = scheduler
+        self._tracker = tracker
+        # Seconds from request to confirmation, the load of the gateway
+        self._latencies: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        # Seconds from confirmation to session finished, the travel of nodes
+        self._run_times: deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        # Frames received per second as [second, count]
+        self._frame_counts: deque[list[int]] = deque(maxlen=FRAME_WINDOW)
+        self.last_frame: datetime | None = None
+        self.timeouts = 0
+        self._listeners: list[CALLBACK_TYPE] = []
+        self._unsub: list[CALLBACK_TYPE] = []
+        self._unsub_publish: CALLBACK_TYPE | None = None
+
+    @callback
+    def start(self) -> None:
+        """Start collecting the figures."""
+        self._pyvlx.connection.register_frame_received_cb(self._async_frame_received)
+        self._unsub = [
+            self._scheduler.async_add_listener(self.async_schedule_publish),
+            self._tracker.async_add_listener(self._async_session_finished),
+        ]
+
+    @callback
+    def stop(self) -> None:
+        """Stop collecting the figures."""
+        self._pyvlx.connection.unregister_frame_received_cb(self._async_frame_received)
+        for unsub in self._unsub:
+            unsub()
+        self._unsub = []
+        if self._unsub_publish is not None:
+            self._unsub_publish()
+            self._unsub_publish = None
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for updated figures."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            """Remove update listener."""
+            self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @property
+    def queue_depth(self) -> int:
+        """Return number of commands waiting for a session."""
+        return self._scheduler.queue_depth
+
+    @property
+    def commands_in_flight(self) -> int:
+        """Return number of commands being sent."""
+        return self._scheduler.running
+
+    @property
+    def errors(self) -> int:
+        """Return number of commands which failed to be sent."""
+        return self._scheduler.failed_commands
+
+    @property
+    def latency_samples(self) -> int:
+        """Return number of round trip times in the window."""
+        return len(self._latencies)
+
+    def latency_percentile(self, percent: float) -> float | None:
+        """Return a percentile of the command round trip times in seconds."""
+        value = _percentile(sorted(self._latencies), percent)
+        return None if value is None else round(value, 3)
+
+    @property
+    def run_time_samples(self) -> int:
+        """Return number of session run times in the window."""
+        return len(self._run_times)
+
+    def run_time_percentile(self, percent: float) -> float | None:
+        """Return a percentile of the session run times in seconds."""
+        value = _percentile(sorted(self._run_times), percent)
+        return None if value is None else round(value, 3)
+
+    @property
+    def frames_per_minute(self) -> int:
+        """Return number of frames received within the last minute."""
+        oldest = int(time.monotonic()) - FRAME_WINDOW
+        return sum(count for second, count in self._frame_counts if second > oldest)
+
+    async def _async_frame_received(self, frame: FrameBase) -> None:
+        """Count a received frame."""
+        second = int(time.monotonic())
+        if self._frame_counts and self._frame_counts[-1][0] == second:
+            self._frame_counts[-1][1] += 1
+        else:
+            self._frame_counts.append([second, 1])
+        self.last_frame = dt_util.utcnow()
+        self.async_schedule_publish()
+
+    @callback
+    def _async_session_finished(self, session: VeluxCommandSession) -> None:
+        """Record the round trip time, run time or timeout of a session."""
+        latency = session.confirmation_latency
+        if latency is None and session.status != STATUS_TIMEOUT:
+            return
+        if latency is not None:
+            self._latencies.append(latency)
+        if session.status == STATUS_COMPLETED and session.run_time is not None:
+            self._run_times.append(session.run_time)
+        elif session.status == STATUS_TIMEOUT:
+            self.timeouts += 1
+        self.async_schedule_publish()
+
+    @callback
+    def async_schedule_publish(self) -> None:
+        """Inform the listeners after PUBLISH_INTERVAL."""
+        if self._unsub_publish is None:
+            self._unsub_publish = async_call_later(
+                self._hass, PUBLISH_INTERVAL, self._async_publish
+            )
+
+    @callback
+    def _async_publish(self, _now: datetime) -> None:
+        """Inform the listeners about the current figures."""
+        self._unsub_publish = None
+        for update_callback in self._listeners:
+            update_callback()
+        # Keep publishing until the frame rate is back to zero
+        if self.frames_per_minute:
+            self.async_schedule_publish()
@@ -0,0 +1,87 @@
+"""Ring buffer of the recent frames and commands of a KLF200."""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, callback
+from pyvlx import PyVLX
+from pyvlx.api.frames import FrameBase
+
+from .sessions import VeluxCommandSession, VeluxSessionTracker
+
+# Entries kept, the oldest is dropped first.
+TRACE_SIZE = 500
+
+KIND_FRAME = "frame"
+KIND_COMMAND = "command"
+# Field names of the entries, in order
+TRACE_FIELDS = ("time", "kind", "name", "session_id", "node_ids", "latency")
+
+TraceEntry = tuple[float, str, str, int | None, tuple[int, ...], float | None]
+
+
+class VeluxTrace:
+    """Keep the last TRACE_SIZE received frames and finished commands.
+
+    Entries are tuples in the order of TRACE_FIELDS, frame and status names
+    are shared strings so an entry costs little more than the tuple.
+    """
+
+    def __init__(self, pyvlx: PyVLX, tracker: VeluxSessionTracker) -> None:
+        """Initialize the trace."""
+        self._pyvlx = pyvlx
+        self._tracker = tracker
+        self._entries: deque[TraceEntry] = deque(maxlen=TRACE_SIZE)
+        self._unsub: CALLBACK_TYPE | None = None
+
+    @callback
+    def start(self) -> None:
+        """Start recording frames and commands."""
+        self._pyvlx.connection.register_frame_received_cb(self._async_frame_received)
+        self._unsub = self._tracker.async_add_listener(self._async_session_finished)
+
+    @callback
+    def stop(self) -> None:
+        """Stop recording."""
+        self._pyvlx.connection.unregister_frame_received_cb(self._async_frame_received)
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    async def _async_frame_received(self, frame: FrameBase) -> None:
+        """Record a received frame."""
+        node_id = getattr(frame, "node_id", getattr(frame, "index_id", None))
+        self._entries.append(
+            (
+                round(time.time(), 3),
+                KIND_FRAME,
+                type(frame).__name__,
+                getattr(frame, "session_id", None),
+                () if node_id is None else (node_id,),
+                None,
+            )
+        )
+
+    @callback
+    def _async_session_finished(self, session: VeluxCommandSession) -> None:
+        """Record a finished command session."""
+        duration = session.duration
+        self._entries.append(
+            (
+                round(time.time(), 3),
+                KIND_COMMAND,
+                str(session.status),
+                session.session_id,
+                session.node_ids,
+                None if duration is None else round(duration, 3),
+            )
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the entries for diagnostics."""
+        return {
+            "fields": list(TRACE_FIELDS),
+            "entries": [list(entry) for entry in self._entries],
+        }
@@ -0,0 +1,153 @@
+"""Learned travel times of opening devices and predicted positions."""
+from __future__ import annotations
+
+import math
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+from pyvlx import Parameter
+from pyvlx.opening_device import OpeningDevice
+
+from .const import DOMAIN, LOGGER
+
+STORAGE_VERSION = 1
+# Seconds to wait after a learned travel time before it is written.
+SAVE_DELAY = 60
+# Moves shorter than this (percent) are too imprecise to learn from.
+MIN_LEARN_DISTANCE = 20
+# Weight of the latest move in the learned travel time.
+LEARN_SMOOTHING = 0.3
+
+
+@dataclass(frozen=True, slots=True)
+class VeluxTravelPrediction:
+    """Predicted position of a moving node."""
+
+    position_percent: int
+    eta: datetime
+
+
+@dataclass(slots=True)
+class _Move:
+    """Movement of a node observed from its updates."""
+
+    start_time: float
+    start_percent: int
+    # Last reported position the prediction starts from
+    anchor_time: float
+    anchor_wall: datetime
+    anchor_percent: int
+
+
+class VeluxTravelTimes:
+    """Learn the full travel time of each node from the moves it reports.
+
+    Travel times are kept per node_id in HA storage. While a node moves,
+    its position is interpolated from the last reported position.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the travel times."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.travel_times"
+        )
+        # Seconds for a move from 0 % to 100 % per node_id
+        self.travel_times: dict[int, float] = {}
+        self._moves: dict[int, _Move] = {}
+        self._tracked: list[OpeningDevice] = []
+
+    async def async_load(self) -> None:
+        """Load the learned travel times."""
+        data = await self._store.async_load()
+        if data:
+            self.travel_times = {
+                int(node_id): travel_time
+                for node_id, travel_time in data.get("travel_times", {}).items()
+            }
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the learned travel times to store."""
+        return {
+            "travel_times": {
+                str(node_id): travel_time
+                for node_id, travel_time in self.travel_times.items()
+            }
+        }
+
+    @callback
+    def async_track_nodes(self, nodes: Iterable[OpeningDevice]) -> None:
+        """Learn from the updates of nodes."""
+        self.async_untrack_nodes()
+        self._tracked = list(nodes)
+        for node in self._tracked:
+            node.register_device_updated_cb(self._async_node_updated)
+
+    @callback
+    def async_untrack_nodes(self) -> None:
+        """Stop learning from node updates."""
+        for node in self._tracked:
+            node.unregister_device_updated_cb(self._async_node_updated)
+        self._tracked = []
+        self._moves = {}
+
+    async def _async_node_updated(self, node: OpeningDevice) -> None:
+        """Follow start, progress and end of a move."""
+        now = time.monotonic()
+        percent = node.position.position_percent
+        move = self._moves.get(node.node_id)
+        if node.is_moving():
+            if move is None:
+                self._moves[node.node_id] = _Move(
+                    now, percent, now, dt_util.utcnow(), percent
+                )
+            elif percent != move.anchor_percent:
+                move.anchor_time = now
+                move.anchor_wall = dt_util.utcnow()
+                move.anchor_percent = percent
+            return
+        if move is None:
+            return
+        del self._moves[node.node_id]
+        distance = abs(percent - move.start_percent)
+        if distance < MIN_LEARN_DISTANCE:
+            return
+        observed = (now - move.start_time) * 100 / distance
+        travel_time = self.travel_times.get(node.node_id)
+        if travel_time is not None:
+            observed = travel_time + LEARN_SMOOTHING * (observed - travel_time)
+        self.travel_times[node.node_id] = observed
+        LOGGER.debug("Travel time of %s learned as %.1f s", node.name, observed)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_predict(self, node: OpeningDevice) -> VeluxTravelPrediction | None:
+        """Return the interpolated position of a moving node."""
+        move = self._moves.get(node.node_id)
+        travel_time = self.travel_times.get(node.node_id)
+        if (
+            move is None
+            or travel_time is None
+            or not node.is_moving()
+            or node.target.position > Parameter.MAX
+        ):
+            return None
+        target = node.target.position_percent
+        distance = target - move.anchor_percent
+        travelled = (time.monotonic() - move.anchor_time) * 100 / travel_time
+        if travelled >= abs(distance):
+            position = target
+        else:
+            position = move.anchor_percent + int(math.copysign(travelled, distance))
+        return VeluxTravelPrediction(
+            position_percent=position,
+            eta=move.anchor_wall
+            + timedelta(seconds=round(abs(distance) * travel_time / 100)),
+        )
@@ -0,0 +1 @@
+"""Development tools of the Velux integration."""
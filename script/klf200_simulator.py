@@ -0,0 +1,626 @@
+"""Local stand-in for a KLF200 gateway.
+
+Speaks enough of the KLF200 API for PyVLX to connect, load nodes and scenes,
+send commands, request node states and limitations. Nodes move with a travel
+time and report their positions like the house status monitor does. Latency
+and lost frames can be injected to exercise the integration without hardware.
+
+    python script/klf200_simulator.py --nodes 200 --latency 0.05 --loss 0.01
+
+PyVLX always connects to port 51200, add the host running the simulator as
+gateway. Without --certfile a self signed certificate is created with the
+openssl command line tool.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import ssl
+import subprocess
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from pyvlx import Parameter
+from pyvlx.api.frames import (
+    FrameActivateSceneConfirmation,
+    FrameBase,
+    FrameCommandRunStatusNotification,
+    FrameCommandSendConfirmation,
+    FrameGetAllNodesInformationConfirmation,
+    FrameGetAllNodesInformationFinishedNotification,
+    FrameGetAllNodesInformationNotification,
+    FrameGetLimitationStatusConfirmation,
+    FrameGetLimitationStatusNotification,
+    FrameGetProtocolVersionConfirmation,
+    FrameGetSceneListConfirmation,
+    FrameGetSceneListNotification,
+    FrameGetStateConfirmation,
+    FrameGetVersionConfirmation,
+    FrameHouseStatusMonitorDisableConfirmation,
+    FrameHouseStatusMonitorEnableConfirmation,
+    FrameNodeStatePositionChangedNotification,
+    FramePasswordEnterConfirmation,
+    FramePasswordEnterRequest,
+    FrameGatewayRebootConfirmation,
+    FrameSessionFinishedNotification,
+    FrameSetUTCConfirmation,
+    FrameStatusRequestConfirmation,
+    FrameStatusRequestNotification,
+)
+from pyvlx.api.frames.frame_activate_scene import ActivateSceneConfirmationStatus
+from pyvlx.api.frames.frame_command_send import CommandSendConfirmationStatus
+from pyvlx.api.frames.frame_helper import extract_from_frame
+from pyvlx.api.frames.frame_password_enter import PasswordEnterConfirmationStatus
+from pyvlx.api.frames.frame_status_request import StatusRequestStatus
+from pyvlx.const import (
+    Command,
+    GatewayState,
+    GatewaySubState,
+    NodeParameter,
+    NodeTypeWithSubtype,
+    OperatingState,
+    Originator,
+    RunStatus,
+    StatusReply,
+    StatusType,
+)
+from pyvlx.exception import PyVLXException
+from pyvlx.slip import get_next_slip, is_slip, slip_pack
+
+_LOGGER = logging.getLogger("klf200_simulator")
+
+PORT = 51200
+# Node IDs are a single byte, the KLF200 supports 200 nodes.
+MAX_NODES = 200
+# Seconds between two position reports of a moving node.
+REPORT_INTERVAL = 1.0
+# Raw parameter values of the KLF200
+POSITION_MAX = Parameter.MAX
+POSITION_CURRENT = 0xD200
+POSITION_IGNORE = 0xD400
+
+NODE_TYPES = (
+    NodeTypeWithSubtype.WINDOW_OPENER_WITH_RAIN_SENSOR,
+    NodeTypeWithSubtype.ROLLER_SHUTTER,
+    NodeTypeWithSubtype.WINDOW_OPENER,
+    NodeTypeWithSubtype.EXTERIOR_VENETIAN_BLIND,
+    NodeTypeWithSubtype.ROLLER_SHUTTER,
+    NodeTypeWithSubtype.DUAL_ROLLER_SHUTTER,
+    NodeTypeWithSubtype.HORIZONTAL_AWNING,
+    NodeTypeWithSubtype.LIGHT,
+    NodeTypeWithSubtype.ON_OFF_SWITCH,
+)
+# Types which switch at once instead of moving
+INSTANT_TYPES = (NodeTypeWithSubtype.LIGHT, NodeTypeWithSubtype.ON_OFF_SWITCH)
+
+
+def _raw(value: int) -> Parameter:
+    """Return a parameter from a raw value."""
+    return Parameter(value.to_bytes(2, "big"))
+
+
+class RawFrame(FrameBase):
+    """Frame with a prepared payload, for frames pyvlx cannot serialize."""
+
+    def __init__(self, command: Command, payload: bytes) -> None:
+        """Init Frame."""
+        super().__init__(command)
+        self.payload = payload
+
+    def get_payload(self) -> bytes:
+        """Return Payload."""
+        return self.payload
+
+
+@dataclass
+class SimulatedNode:
+    """Actuator known by the simulated gateway."""
+
+    node_id: int
+    name: str
+    node_type: NodeTypeWithSubtype
+    serial_number: str
+    travel_time: float
+    position: int = POSITION_MAX
+    target: int = POSITION_MAX
+    orientation: int = 0
+    min_limit: int = 0
+    max_limit: int = POSITION_MAX
+    task: asyncio.Task[None] | None = field(default=None, repr=False)
+
+    @property
+    def state(self) -> OperatingState:
+        """Return the operating state reported for the node."""
+        return OperatingState.EXECUTING if self.task else OperatingState.DONE
+
+    @property
+    def remaining_time(self) -> int:
+        """Return seconds until the node reaches its target."""
+        return round(abs(self.target - self.position) / POSITION_MAX * self.travel_time)
+
+
+@dataclass
+class SimulatedScene:
+    """Scene moving several nodes to their targets."""
+
+    scene_id: int
+    name: str
+    targets: dict[int, int]
+
+
+class SimulatedGateway:
+    """State and behaviour of the simulated KLF200."""
+
+    def __init__(
+        self,
+        password: str,
+        nodes: int,
+        scenes: int,
+        latency: float,
+        jitter: float,
+        loss: float,
+        travel_time: float,
+        seed: int | None = None,
+        session_limit: int = 0,
+    ) -> None:
+        """Create the nodes and scenes of the gateway."""
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        # Command sessions run at the same time, further commands are rejected
+        self.session_limit = session_limit
+        self.active_sessions = 0
+        self.house_status_monitor = False
+        self._random = random.Random(seed)
+        self._clients: set[SimulatedConnection] = set()
+        self.nodes: dict[int, SimulatedNode] = {}
+        for node_id in range(min(nodes, MAX_NODES)):
+            node_type = NODE_TYPES[node_id % len(NODE_TYPES)]
+            self.nodes[node_id] = SimulatedNode(
+                node_id=node_id,
+                name=f"{node_type.name.replace('_', ' ').title()} {node_id}",
+                node_type=node_type,
+                serial_number=":".join(
+                    f"{byte:02x}" for byte in (0x53, 0x49, 0, 0, 0, 0, 0, node_id)
+                ),
+                travel_time=travel_time * self._random.uniform(0.8, 1.2),
+                position=self._random.choice((0, POSITION_MAX)),
+            )
+        self.scenes = [
+            SimulatedScene(
+                scene_id=scene_id,
+                name=f"Scene {scene_id}",
+                targets={
+                    node.node_id: 0 if scene_id % 2 else POSITION_MAX
+                    for node in self.nodes.values()
+                    if node.node_id % max(scenes, 1) == scene_id
+                },
+            )
+            for scene_id in range(scenes)
+        ]
+
+    def add_client(self, client: SimulatedConnection) -> None:
+        """Add a connected client."""
+        self._clients.add(client)
+
+    def remove_client(self, client: SimulatedConnection) -> None:
+        """Remove a disconnected client."""
+        self._clients.discard(client)
+
+    async def send(self, client: SimulatedConnection, frame: FrameBase) -> None:
+        """Send a frame after the configured latency, unless it is lost."""
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.loss:
+            _LOGGER.debug("Dropped %s", frame)
+            return
+        client.write(frame)
+
+    async def broadcast(self, frame: FrameBase) -> None:
+        """Send a house status monitor frame to all clients."""
+        if self.house_status_monitor:
+            await asyncio.gather(*(self.send(client, frame) for client in self._clients))
+
+    async def handle(self, client: SimulatedConnection, command: Command, payload: bytes) -> None:
+        """Answer a request frame."""
+        # pylint: disable=too-many-branches
+        if command == Command.GW_PASSWORD_ENTER_REQ:
+            request = FramePasswordEnterRequest()
+            request.from_payload(payload)
+            status = (
+                PasswordEnterConfirmationStatus.SUCCESSFUL
+                if request.password == self.password
+                else PasswordEnterConfirmationStatus.FAILED
+            )
+            await self.send(client, FramePasswordEnterConfirmation(status=status))
+        elif command == Command.GW_GET_VERSION_REQ:
+            await self.send(
+                client,
+                FrameGetVersionConfirmation(
+                    software_version="0.2.0.0.71.0", hardware_version=6
+                ),
+            )
+        elif command == Command.GW_GET_PROTOCOL_VERSION_REQ:
+            await self.send(client, FrameGetProtocolVersionConfirmation(3, 14))
+        elif command == Command.GW_GET_STATE_REQ:
+            await self.send(
+                client,
+                FrameGetStateConfirmation(
+                    GatewayState.GATEWAY_MODE_WITH_ACTUATORS, GatewaySubState.IDLE
+                ),
+            )
+        elif command == Command.GW_SET_UTC_REQ:
+            await self.send(client, FrameSetUTCConfirmation())
+        elif command == Command.GW_GET_NETWORK_SETUP_REQ:
+            # Address, netmask, gateway and DHCP flag
+            await self.send(
+                client,
+                RawFrame(
+                    Command.GW_GET_NETWORK_SETUP_CFM,
+                    bytes([127, 0, 0, 1, 255, 0, 0, 0, 127, 0, 0, 1, 0]),
+                ),
+            )
+        elif command == Command.GW_HOUSE_STATUS_MONITOR_ENABLE_REQ:
+            self.house_status_monitor = True
+            await self.send(client, FrameHouseStatusMonitorEnableConfirmation())
+        elif command == Command.GW_HOUSE_STATUS_MONITOR_DISABLE_REQ:
+            self.house_status_monitor = False
+            await self.send(client, FrameHouseStatusMonitorDisableConfirmation())
+        elif command == Command.GW_GET_ALL_NODES_INFORMATION_REQ:
+            await self._get_all_nodes_information(client)
+        elif command == Command.GW_GET_SCENE_LIST_REQ:
+            await self._get_scene_list(client)
+        elif command == Command.GW_COMMAND_SEND_REQ:
+            await self._command_send(client, payload)
+        elif command == Command.GW_ACTIVATE_SCENE_REQ:
+            await self._activate_scene(client, payload)
+        elif command == Command.GW_STATUS_REQUEST_REQ:
+            await self._status_request(client, payload)
+        elif command == Command.GW_GET_LIMITATION_STATUS_REQ:
+            await self._get_limitation(client, payload)
+        elif command == Command.GW_REBOOT_REQ:
+            await self.send(client, FrameGatewayRebootConfirmation())
+            client.close()
+        else:
+            _LOGGER.warning("Command %s is not simulated", command)
+
+    async def _get_all_nodes_information(self, client: SimulatedConnection) -> None:
+        """Send the node table."""
+        await self.send(
+            client, FrameGetAllNodesInformationConfirmation(number_of_nodes=len(self.nodes))
+        )
+        for node in self.nodes.values():
+            frame = FrameGetAllNodesInformationNotification()
+            frame.node_id = node.node_id
+            frame.order = node.node_id
+            frame.name = node.name
+            frame.node_type = node.node_type
+            frame.serial_number = node.serial_number
+            frame.state = node.state
+            frame.current_position = _raw(node.position)
+            frame.target = _raw(node.target)
+            frame.remaining_time = node.remaining_time
+            frame.timestamp = int(time.time())
+            await self.send(client, frame)
+        await self.send(client, FrameGetAllNodesInformationFinishedNotification())
+
+    async def _get_scene_list(self, client: SimulatedConnection) -> None:
+        """Send the scene table in chunks of three scenes."""
+        await self.send(client, FrameGetSceneListConfirmation(count_scenes=len(self.scenes)))
+        for start in range(0, len(self.scenes), 3):
+            frame = FrameGetSceneListNotification()
+            frame.scenes = [
+                (scene.scene_id, scene.name) for scene in self.scenes[start : start + 3]
+            ]
+            frame.remaining_scenes = max(len(self.scenes) - start - 3, 0)
+            await self.send(client, frame)
+
+    async def _command_send(self, client: SimulatedConnection, payload: bytes) -> None:
+        """Move the nodes of a command to the main parameter."""
+        session_id = payload[0] * 256 + payload[1]
+        value = payload[7] * 256 + payload[8]
+        node_ids = list(payload[42 : 42 + payload[41]])
+        known = [node_id for node_id in node_ids if node_id in self.nodes]
+        status = (
+            CommandSendConfirmationStatus.ACCEPTED
+            if known
+            and len(known) == len(node_ids)
+            and not 0 < self.session_limit <= self.active_sessions
+            else CommandSendConfirmationStatus.REJECTED
+        )
+        await self.send(
+            client, FrameCommandSendConfirmation(session_id=session_id, status=status)
+        )
+        if status == CommandSendConfirmationStatus.ACCEPTED:
+            self._start_session(client, session_id, {node_id: value for node_id in known})
+
+    async def _activate_scene(self, client: SimulatedConnection, payload: bytes) -> None:
+        """Move the nodes of a scene."""
+        session_id = payload[0] * 256 + payload[1]
+        scene_id = payload[4]
+        scene = next((scene for scene in self.scenes if scene.scene_id == scene_id), None)
+        await self.send(
+            client,
+            FrameActivateSceneConfirmation(
+                session_id=session_id,
+                status=(
+                    ActivateSceneConfirmationStatus.ACCEPTED
+                    if scene is not None
+                    else ActivateSceneConfirmationStatus.ERROR_INVALID_PARAMETER
+                ),
+            ),
+        )
+        if scene is not None:
+            self._start_session(client, session_id, scene.targets)
+
+    def _start_session(
+        self, client: SimulatedConnection, session_id: int, targets: dict[int, int]
+    ) -> None:
+        """Apply the targets in order of arrival and follow the session."""
+        moves = []
+        reached = []
+        for node_id, value in targets.items():
+            node = self.nodes[node_id]
+            if node.task is not None:
+                node.task.cancel()
+                node.task = None
+            if value == POSITION_CURRENT:
+                node.target = node.position
+            elif value <= POSITION_MAX:
+                node.target = min(max(value, node.min_limit), node.max_limit)
+            if node.node_type in INSTANT_TYPES or node.target == node.position:
+                node.position = node.target
+                reached.append(node)
+            else:
+                node.task = asyncio.create_task(self._move(node))
+                moves.append(node.task)
+        self.active_sessions += 1
+        asyncio.create_task(self._run_session(client, session_id, targets, moves, reached))
+
+    async def _run_session(
+        self,
+        client: SimulatedConnection,
+        session_id: int,
+        targets: dict[int, int],
+        moves: list[asyncio.Task[None]],
+        reached: list[SimulatedNode],
+    ) -> None:
+        """Wait for the moves, report their run status and finish the session."""
+        for node in reached:
+            await self._report_position(node)
+        await asyncio.gather(*moves, return_exceptions=True)
+        self.active_sessions -= 1
+        for status_id, node_id in enumerate(targets):
+            await self.send(
+                client,
+                FrameCommandRunStatusNotification(
+                    session_id=session_id,
+                    status_id=status_id,
+                    index_id=node_id,
+                    node_parameter=0,
+                    parameter_value=self.nodes[node_id].position,
+                ),
+            )
+        await self.send(client, FrameSessionFinishedNotification(session_id=session_id))
+
+    async def _move(self, node: SimulatedNode) -> None:
+        """Move a node towards its target in REPORT_INTERVAL steps."""
+        step = round(POSITION_MAX * REPORT_INTERVAL / node.travel_time)
+        try:
+            await self._report_position(node)
+            while node.position != node.target:
+                await asyncio.sleep(REPORT_INTERVAL)
+                if abs(node.target - node.position) <= step:
+                    node.position = node.target
+                else:
+                    node.position += step if node.target > node.position else -step
+                if node.position != node.target:
+                    await self._report_position(node)
+        finally:
+            if node.task is asyncio.current_task():
+                node.task = None
+        await self._report_position(node)
+
+    async def _report_position(self, node: SimulatedNode) -> None:
+        """Send the house status monitor notification of a node."""
+        frame = FrameNodeStatePositionChangedNotification()
+        frame.node_id = node.node_id
+        frame.state = node.state
+        frame.current_position = _raw(node.position)
+        frame.target = _raw(node.target)
+        frame.current_position_fp1 = _raw(node.position)
+        frame.current_position_fp2 = _raw(node.position)
+        frame.current_position_fp3 = _raw(node.orientation)
+        frame.current_position_fp4 = _raw(POSITION_IGNORE)
+        frame.remaining_time = node.remaining_time
+        frame.timestamp = int(time.time())
+        await self.broadcast(frame)
+
+    async def _status_request(self, client: SimulatedConnection, payload: bytes) -> None:
+        """Report main and functional parameters of the requested nodes."""
+        session_id = payload[0] * 256 + payload[1]
+        node_ids = [node_id for node_id in payload[3 : 3 + payload[2]] if node_id in self.nodes]
+        await self.send(
+            client,
+            FrameStatusRequestConfirmation(
+                session_id=session_id, status=StatusRequestStatus.ACCEPTED
+            ),
+        )
+        for status_id, node_id in enumerate(node_ids):
+            node = self.nodes[node_id]
+            frame = FrameStatusRequestNotification()
+            frame.session_id = session_id
+            frame.status_id = status_id
+            frame.node_id = node_id
+            frame.run_status = RunStatus.EXECUTION_COMPLETED
+            frame.status_reply = StatusReply.COMMAND_COMPLETED_OK
+            frame.status_type = StatusType.REQUEST_CURRENT_POSITION
+            frame.parameter_data = {
+                NodeParameter(0): _raw(node.position),
+                NodeParameter(1): _raw(node.position),
+                NodeParameter(2): _raw(node.position),
+                NodeParameter(3): _raw(node.orientation),
+            }
+            frame.status_count = len(frame.parameter_data)
+            await self.send(client, frame)
+        await self.send(client, FrameSessionFinishedNotification(session_id=session_id))
+
+    async def _get_limitation(self, client: SimulatedConnection, payload: bytes) -> None:
+        """Report the limitation of the requested nodes."""
+        session_id = payload[0] * 256 + payload[1]
+        node_ids = [node_id for node_id in payload[3 : 3 + payload[2]] if node_id in self.nodes]
+        await self.send(
+            client, FrameGetLimitationStatusConfirmation(session_id=session_id, data=1)
+        )
+        for node_id in node_ids:
+            node = self.nodes[node_id]
+            frame = FrameGetLimitationStatusNotification()
+            frame.session_id = session_id
+            frame.node_id = node_id
+            frame.min_value = node.min_limit.to_bytes(2, "big")
+            frame.max_value = node.max_limit.to_bytes(2, "big")
+            frame.limit_originator = Originator.USER
+            frame.limit_time = 0
+            await self.send(client, frame)
+        await self.send(client, FrameSessionFinishedNotification(session_id=session_id))
+
+
+class SimulatedConnection(asyncio.Protocol):
+    """Connection of one client to the simulated gateway."""
+
+    def __init__(self, gateway: SimulatedGateway) -> None:
+        """Initialize the connection."""
+        self.gateway = gateway
+        self.transport: asyncio.Transport | None = None
+        self._buffer = b""
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Register the client."""
+        assert isinstance(transport, asyncio.Transport)
+        self.transport = transport
+        self.gateway.add_client(self)
+        _LOGGER.info("Client connected")
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """Unregister the client."""
+        self.gateway.remove_client(self)
+        self.transport = None
+        _LOGGER.info("Client disconnected")
+
+    def data_received(self, data: bytes) -> None:
+        """Split the SLIP stream into frames and answer them."""
+        self._buffer += data
+        while is_slip(self._buffer):
+            raw, self._buffer = get_next_slip(self._buffer)
+            if raw is None:
+                break
+            try:
+                command, payload = extract_from_frame(raw)
+            except (PyVLXException, ValueError) as err:
+                _LOGGER.warning("Invalid frame: %s", err)
+                continue
+            asyncio.create_task(self.gateway.handle(self, command, payload))
+
+    def write(self, frame: FrameBase) -> None:
+        """Send a frame to the client."""
+        if self.transport is not None and not self.transport.is_closing():
+            self.transport.write(slip_pack(bytes(frame)))
+
+    def close(self) -> None:
+        """Close the connection."""
+        if self.transport is not None:
+            self.transport.close()
+
+
+def _create_ssl_context(certfile: str | None, keyfile: str | None) -> ssl.SSLContext:
+    """Return the server context, with a self signed certificate by default."""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    if certfile is not None:
+        context.load_cert_chain(certfile, keyfile)
+        return context
+    # The certificate is loaded into the context, the files are not needed after
+    with tempfile.TemporaryDirectory(prefix="klf200_simulator") as directory:
+        certfile = str(Path(directory) / "cert.pem")
+        keyfile = str(Path(directory) / "key.pem")
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                "-keyout", keyfile, "-out", certfile, "-days", "1",
+                "-subj", "/CN=klf200-simulator",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        context.load_cert_chain(certfile, keyfile)
+    return context
+
+
+async def async_serve(
+    gateway: SimulatedGateway,
+    host: str = "0.0.0.0",
+    port: int = PORT,
+    ssl_context: ssl.SSLContext | None = None,
+) -> asyncio.Server:
+    """Start serving the simulated gateway."""
+    return await asyncio.get_running_loop().create_server(
+        lambda: SimulatedConnection(gateway),
+        host,
+        port,
+        ssl=ssl_context or _create_ssl_context(None, None),
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    """Run the simulator until it is interrupted."""
+    gateway = SimulatedGateway(
+        password=args.password,
+        nodes=args.nodes,
+        scenes=args.scenes,
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        travel_time=args.travel_time,
+        seed=args.seed,
+        session_limit=args.session_limit,
+    )
+    server = await async_serve(
+        gateway, args.host, args.port, _create_ssl_context(args.certfile, args.keyfile)
+    )
+    _LOGGER.info(
+        "Simulating %s nodes and %s scenes on %s:%s",
+        len(gateway.nodes),
+        len(gateway.scenes),
+        args.host,
+        args.port,
+    )
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--password", default="velux123")
+    parser.add_argument("--nodes", type=int, default=20, help=f"at most {MAX_NODES}")
+    parser.add_argument("--scenes", type=int, default=5)
+    parser.add_argument("--travel-time", type=float, default=20, help="seconds")
+    parser.add_argument("--latency", type=float, default=0, help="seconds per frame")
+    parser.add_argument("--jitter", type=float, default=0, help="seconds added at most")
+    parser.add_argument("--loss", type=float, default=0, help="share of lost frames")
+    parser.add_argument(
+        "--session-limit", type=int, default=0, help="concurrent sessions, 0 is unbounded"
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    parser.add_argument("--debug", action="store_true")
+    arguments = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if arguments.debug else logging.INFO)
+    asyncio.run(_main(arguments))
@@ -0,0 +1,32 @@
+"""Tests for the Velux integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import async_get_platforms
+
+from custom_components.velux.const import DOMAIN
+
+HOST = "127.0.0.1"
+PASSWORD = "test"
+
+
+def stored_node(node_id: int, node_type: str, **data: Any) -> dict[str, Any]:
+    """Return a node as stored in the snapshot."""
+    return {
+        "node_id": node_id,
+        "type": node_type,
+        "name": f"{node_type} {node_id}",
+        "serial_number": None,
+        **data,
+    }
+
+
+def get_entity(hass: HomeAssistant, entity_id: str) -> Entity:
+    """Return the entity object of entity_id."""
+    for platform in async_get_platforms(hass, DOMAIN):
+        if entity_id in platform.entities:
+            return platform.entities[entity_id]
+    raise KeyError(entity_id)
@@ -0,0 +1,117 @@
+"""Fixtures for the Velux tests."""
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator, Awaitable, Callable
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from homeassistant.const import CONF_HOST, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pyvlx import PyVLX
+
+from custom_components.velux.const import DOMAIN
+from custom_components.velux.pool import async_get_pool
+from custom_components.velux.snapshot import STORAGE_VERSION
+from script.klf200_simulator import SimulatedGateway, async_serve
+
+from . import HOST, PASSWORD
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add the option to save the benchmark results."""
+    parser.addoption(
+        "--benchmark-output", help="write the benchmark results to this JSON file"
+    )
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+async def pyvlx() -> AsyncGenerator[PyVLX]:
+    """Return an unconnected PyVLX."""
+    pyvlx = PyVLX(host=HOST, password=PASSWORD)
+    yield pyvlx
+    # Nodes register for the connection closed callback, which the connection
+    # runs once more when it is garbage collected after the loop is closed
+    pyvlx.connection.connection_closed_cbs.clear()
+
+
+@pytest.fixture
+async def setup_snapshot(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> AsyncGenerator[Callable[..., Awaitable[MockConfigEntry]]]:
+    """Return a function setting up an entry from a snapshot of nodes.
+
+    The gateway is unreachable, the tests update the nodes themselves.
+    """
+    loaded: list[tuple[MockConfigEntry, PyVLX]] = []
+
+    async def async_setup(
+        nodes: list[dict[str, Any]], options: dict[str, Any] | None = None
+    ) -> MockConfigEntry:
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_HOST: HOST, CONF_PASSWORD: PASSWORD},
+            options=options or {},
+            unique_id="KLF200",
+        )
+        entry.add_to_hass(hass)
+        hass_storage[f"{DOMAIN}.{entry.entry_id}"] = {
+            "version": STORAGE_VERSION,
+            "minor_version": 1,
+            "key": f"{DOMAIN}.{entry.entry_id}",
+            "data": {"nodes": nodes, "scenes": []},
+        }
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        loaded.append((entry, hass.data[DOMAIN][entry.entry_id].pyvlx))
+        return entry
+
+    with patch.object(PyVLX, "connect", side_effect=OSError("Connection refused")):
+        yield async_setup
+        for entry, entry_pyvlx in loaded:
+            # Tests fake the connection, there is no transport to close
+            entry_pyvlx.connection.connected = False
+            await hass.config_entries.async_unload(entry.entry_id)
+            entry_pyvlx.connection.connection_closed_cbs.clear()
+
+
+@pytest.fixture
+async def setup_klf200(
+    hass: HomeAssistant, socket_enabled: None
+) -> AsyncGenerator[Callable[[SimulatedGateway], Awaitable[MockConfigEntry]]]:
+    """Return a function serving a simulated gateway and setting up its entry."""
+    servers = []
+    loaded: list[tuple[MockConfigEntry, PyVLX]] = []
+
+    async def async_setup(gateway: SimulatedGateway) -> MockConfigEntry:
+        servers.append(await async_serve(gateway, HOST))
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            data={CONF_HOST: HOST, CONF_PASSWORD: PASSWORD},
+            unique_id="KLF200",
+        )
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        loaded.append((entry, hass.data[DOMAIN][entry.entry_id].pyvlx))
+        return entry
+
+    yield async_setup
+    for entry, entry_pyvlx in loaded:
+        await hass.config_entries.async_unload(entry.entry_id)
+        # Close the kept connection without the reboot of pyvlx disconnect,
+        # which waits for a second confirmation until it times out
+        entry_pyvlx.connection.connection_closed_cbs.clear()
+        entry_pyvlx.connection.disconnect()
+        async_get_pool(hass).async_discard(HOST)
+        await hass.async_block_till_done(wait_background_tasks=True)
+    for server in servers:
+        server.close()
+        await server.wait_closed()
@@ -0,0 +1,232 @@
+"""Scale benchmark of the Velux platforms with mocked nodes.
+
+Sets up a gateway of MAX_NODES nodes from a snapshot and measures the setup
+time, the entities per node, the memory per entity and the latency from a
+frame of the gateway to the state write while every node reports at once.
+
+    pytest tests/test_benchmark.py --benchmark-output=results.json
+
+Results are written as JSON so runs of different versions can be compared.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from collections.abc import Awaitable, Callable, Generator
+from importlib.metadata import version
+from pathlib import Path
+from typing import Any
+
+import pytest
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, EventStateChangedData, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.entity_platform import async_get_platforms
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pyvlx import Position
+from pyvlx.api.frames import FrameNodeStatePositionChangedNotification
+from pyvlx.const import OperatingState
+from pyvlx.opening_device import OpeningDevice
+
+from custom_components.velux.const import DOMAIN
+from custom_components.velux.node_entity import VeluxNodeEntity
+from custom_components.velux.snapshot import NODE_TYPES
+
+from . import stored_node
+
+# Node IDs are a single byte, the KLF200 supports 200 nodes
+MAX_NODES = 200
+NODE_MIX = (
+    "RollerShutter",
+    "Window",
+    "Blind",
+    "RollerShutter",
+    "DualRollerShutter",
+    "Awning",
+    "Light",
+    "OnOffSwitch",
+    "GarageDoor",
+)
+# Frames of every node sent at once, each moving all nodes to the other end
+STORM_ROUNDS = 5
+
+
+def _snapshot_nodes() -> list[dict[str, Any]]:
+    """Return MAX_NODES stored nodes of mixed types."""
+    nodes = []
+    for node_id in range(MAX_NODES):
+        node_type = NODE_MIX[node_id % len(NODE_MIX)]
+        data: dict[str, Any] = {}
+        if issubclass(NODE_TYPES[node_type], OpeningDevice):
+            data["position"] = Position(position_percent=0).raw.hex()
+        nodes.append(stored_node(node_id, node_type, **data))
+    return nodes
+
+
+def _percentiles(samples: list[float]) -> dict[str, float | None]:
+    """Return median, p90 and p99 of samples in milliseconds."""
+    if len(samples) < 2:
+        return {"p50": None, "p90": None, "p99": None}
+    cuts = statistics.quantiles(samples, n=100)
+    return {
+        "p50": round(cuts[49] * 1000, 3),
+        "p90": round(cuts[89] * 1000, 3),
+        "p99": round(cuts[98] * 1000, 3),
+    }
+
+
+def _report(
+    node_id: int, position_percent: int
+) -> FrameNodeStatePositionChangedNotification:
+    """Return the report of a node which stopped at position_percent."""
+    frame = FrameNodeStatePositionChangedNotification()
+    frame.node_id = node_id
+    frame.state = OperatingState.DONE
+    frame.current_position = Position(position_percent=position_percent)
+    frame.target = Position(position_percent=position_percent)
+    return frame
+
+
+@pytest.fixture(autouse=True)
+def no_loop_debug(hass: HomeAssistant) -> Generator[None]:
+    """Measure without the traceback asyncio debug mode records per task."""
+    hass.loop.set_debug(False)
+    yield
+    hass.loop.set_debug(True)
+
+
+@pytest.fixture(scope="module")
+def benchmark_results(request: pytest.FixtureRequest) -> Generator[dict[str, Any]]:
+    """Collect the results of the module and write them if requested."""
+    results: dict[str, Any] = {"nodes": MAX_NODES}
+    yield results
+    output = request.config.getoption("--benchmark-output")
+    if output is None:
+        return
+    Path(output).write_text(
+        json.dumps(
+            {
+                "pyvlx": version("pyvlx"),
+                "homeassistant": version("homeassistant"),
+                "python": platform.python_version(),
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+async def test_setup(
+    hass: HomeAssistant,
+    setup_snapshot: Callable[..., Awaitable[MockConfigEntry]],
+    benchmark_results: dict[str, Any],
+) -> None:
+    """Measure the setup time and count the entities per node type."""
+    start = time.perf_counter()
+    entry = await setup_snapshot(_snapshot_nodes())
+    benchmark_results["setup_s"] = round(time.perf_counter() - start, 3)
+    benchmark_results["setup_phases_s"] = {
+        phase: round(duration, 3)
+        for phase, duration in hass.data[DOMAIN][entry.entry_id].setup_timings.items()
+    }
+
+    device_registry = dr.async_get(hass)
+    per_device: dict[str, int] = {}
+    for entity in er.async_entries_for_config_entry(
+        er.async_get(hass), entry.entry_id
+    ):
+        if entity.device_id is not None:
+            per_device[entity.device_id] = per_device.get(entity.device_id, 0) + 1
+    pyvlx = hass.data[DOMAIN][entry.entry_id].pyvlx
+    entities_per_node: dict[str, int] = {}
+    for node in pyvlx.nodes:
+        device = device_registry.async_get_device(
+            identifiers={(DOMAIN, str(node.node_id))}
+        )
+        assert device is not None
+        entities_per_node[type(node).__name__] = per_device[device.id]
+    benchmark_results["entities_per_node"] = entities_per_node
+    benchmark_results["entities"] = sum(per_device.values())
+
+    assert len(pyvlx.nodes) == MAX_NODES
+    assert all(entities_per_node.values())
+
+
+async def test_memory_per_entity(
+    hass: HomeAssistant,
+    setup_snapshot: Callable[..., Awaitable[MockConfigEntry]],
+    benchmark_results: dict[str, Any],
+) -> None:
+    """Measure the memory allocated by the setup per entity."""
+    tracemalloc.start()
+    try:
+        entry = await setup_snapshot(_snapshot_nodes())
+        memory, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    entities = len(
+        er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+    )
+    benchmark_results["memory_per_entity_bytes"] = round(memory / entities)
+
+    assert entities > MAX_NODES
+
+
+async def test_frame_storm_latency(
+    hass: HomeAssistant,
+    setup_snapshot: Callable[..., Awaitable[MockConfigEntry]],
+    benchmark_results: dict[str, Any],
+) -> None:
+    """Measure the latency from frame to state write while all nodes report."""
+    entry = await setup_snapshot(_snapshot_nodes())
+    pyvlx = hass.data[DOMAIN][entry.entry_id].pyvlx
+    pyvlx.connection.connected = True
+    node_ids = {
+        entity.entity_id: entity.node.node_id
+        for platform in async_get_platforms(hass, DOMAIN)
+        for entity in platform.entities.values()
+        if isinstance(entity, VeluxNodeEntity)
+    }
+    received: dict[int, float] = {}
+    latencies: list[float] = []
+    written: list[set[int]] = []
+
+    @callback
+    def async_state_written(event: Event[EventStateChangedData]) -> None:
+        """Record the delay since the frame of the node was received."""
+        node_id = node_ids.get(event.data["entity_id"])
+        if node_id is not None and node_id in received:
+            latencies.append(time.perf_counter() - received[node_id])
+            written[-1].add(node_id)
+
+    unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, async_state_written)
+    # Connected nodes become available and lights and switches known with
+    # their first report
+    for node in pyvlx.nodes:
+        pyvlx.connection.frame_received_cb(_report(node.node_id, 0))
+    await asyncio.gather(*pyvlx.connection.tasks)
+    await hass.async_block_till_done()
+
+    start = time.perf_counter()
+    for storm in range(STORM_ROUNDS):
+        position_percent = 100 if storm % 2 == 0 else 0
+        written.append(set())
+        for node in pyvlx.nodes:
+            received[node.node_id] = time.perf_counter()
+            pyvlx.connection.frame_received_cb(
+                _report(node.node_id, position_percent)
+            )
+        await asyncio.gather(*pyvlx.connection.tasks)
+        await hass.async_block_till_done()
+    benchmark_results["storm_s"] = round(time.perf_counter() - start, 3)
+    unsub()
+    benchmark_results["storm_writes"] = len(latencies)
+    benchmark_results["write_latency_ms"] = _percentiles(latencies)
+
+    # Every node is written in every round
+    assert all(len(nodes) == MAX_NODES for nodes in written)
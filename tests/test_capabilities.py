@@ -0,0 +1,48 @@
+"""Tests for the node capabilities."""
+from __future__ import annotations
+
+from pyvlx import Blind, Light, OnOffSwitch, PyVLX, RollerShutter, Window
+from pyvlx.opening_device import DualRollerShutter
+
+from custom_components.velux.capabilities import (
+    _get_type_capabilities,
+    get_node_capabilities,
+)
+
+
+def _nodes(pyvlx: PyVLX) -> list:
+    """Return a node of each class."""
+    return [
+        Window(pyvlx, 1, "Window", None),
+        Blind(pyvlx, 2, "Blind", None),
+        RollerShutter(pyvlx, 3, "Shutter", None),
+        DualRollerShutter(pyvlx, 4, "Dual", None),
+        Light(pyvlx, 5, "Light", None),
+        OnOffSwitch(pyvlx, 6, "Switch", None),
+    ]
+
+
+async def test_cached_capabilities_match_inspection(pyvlx: PyVLX) -> None:
+    """Test cached lookups return what inspecting the class returns."""
+    inspect_type = _get_type_capabilities.__wrapped__
+    for node in _nodes(pyvlx):
+        assert get_node_capabilities(node) == inspect_type(type(node))
+    window, blind, shutter, dual = _nodes(pyvlx)[:4]
+    assert get_node_capabilities(window).coalesce
+    assert not get_node_capabilities(blind).coalesce
+    assert get_node_capabilities(shutter).velocity_parameter == "fp1"
+    assert not get_node_capabilities(shutter).curtains
+    assert get_node_capabilities(dual).velocity_parameter == "fp3"
+    assert get_node_capabilities(dual).curtains
+    assert not get_node_capabilities(dual).coalesce
+
+
+async def test_lookup_inspects_each_class_once(pyvlx: PyVLX) -> None:
+    """Test lookups of nodes of the same class hit the cache."""
+    _get_type_capabilities.cache_clear()
+    nodes = _nodes(pyvlx) + _nodes(pyvlx)
+    for node in nodes:
+        get_node_capabilities(node)
+    info = _get_type_capabilities.cache_info()
+    assert info.misses == len(nodes) // 2
+    assert info.hits == len(nodes) // 2
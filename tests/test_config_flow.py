@@ -0,0 +1,77 @@
+"""Tests for the Velux config flow."""
+from __future__ import annotations
+
+from collections.abc import Generator
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from homeassistant.config_entries import SOURCE_USER
+from homeassistant.const import CONF_HOST, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from pyvlx import PyVLX
+from pyvlx.exception import PyVLXException
+
+from custom_components.velux.const import DOMAIN
+from custom_components.velux.discovery import VeluxDiscoveryCache
+from custom_components.velux.pool import async_get_pool
+
+from . import HOST, PASSWORD
+
+
+@pytest.fixture(autouse=True)
+def no_gateways() -> Generator[None]:
+    """Let the scan find no gateway."""
+    with patch.object(VeluxDiscoveryCache, "async_get_hosts", return_value=[]):
+        yield
+
+
+async def test_entry_adopts_connection_of_flow(hass: HomeAssistant) -> None:
+    """Test the setup after the flow reuses the connection the flow opened."""
+    connected: list[PyVLX] = []
+
+    async def async_connect(pyvlx: PyVLX) -> None:
+        pyvlx.connection.connected = True
+        connected.append(pyvlx)
+
+    with (
+        patch.object(PyVLX, "connect", autospec=True, side_effect=async_connect),
+        patch.object(PyVLX, "disconnect", AsyncMock()),
+        patch.object(PyVLX, "load_nodes", AsyncMock()),
+        patch.object(PyVLX, "load_scenes", AsyncMock()),
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_HOST: HOST, CONF_PASSWORD: PASSWORD}
+        )
+        await hass.async_block_till_done()
+
+        assert result["type"] is FlowResultType.CREATE_ENTRY
+        entry = result["result"]
+        pyvlx = hass.data[DOMAIN][entry.entry_id].pyvlx
+        assert connected == [pyvlx]
+        # The node and scene tables are loaded on the adopted connection
+        assert PyVLX.load_nodes.await_count == 1
+
+        await hass.config_entries.async_unload(entry.entry_id)
+        async_get_pool(hass).async_discard(HOST)
+        await hass.async_block_till_done(wait_background_tasks=True)
+    pyvlx.connection.connection_closed_cbs.clear()
+
+
+async def test_failed_disconnect_keeps_error(hass: HomeAssistant) -> None:
+    """Test a failing disconnect does not hide why the connection failed."""
+    with patch.object(
+        PyVLX, "connect", side_effect=PyVLXException("Login to KLF 200 failed")
+    ), patch.object(PyVLX, "disconnect", side_effect=OSError("Broken pipe")):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_HOST: HOST, CONF_PASSWORD: PASSWORD}
+        )
+
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "cannot_connect"}
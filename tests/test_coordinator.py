@@ -0,0 +1,136 @@
+"""Tests for the limitation coordinator."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator
+from unittest.mock import Mock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pyvlx import Position, PyVLX, Window
+from pyvlx.api.frames import FrameNodeStatePositionChangedNotification
+from pyvlx.const import OperatingState
+
+from custom_components.velux import coordinator as coordinator_module
+from custom_components.velux.const import DOMAIN
+from custom_components.velux.coordinator import (
+    DEFAULT_SCAN_INTERVAL,
+    MAX_SCAN_INTERVAL,
+    VeluxLimitation,
+    VeluxLimitationCoordinator,
+)
+from custom_components.velux.node_index import VeluxNodeIndex
+
+WINDOWS = (1, 2)
+
+
+@pytest.fixture
+async def coordinator(
+    hass: HomeAssistant, pyvlx: PyVLX, monkeypatch: pytest.MonkeyPatch
+) -> AsyncGenerator[VeluxLimitationCoordinator]:
+    """Return the coordinator of a connected gateway with two windows."""
+    monkeypatch.setattr(coordinator_module, "LIMITATION_REQUEST_SPACING", 0)
+    monkeypatch.setattr(coordinator_module, "LIMITATION_EVENT_DELAY", 0)
+    entry = MockConfigEntry(domain=DOMAIN, unique_id="KLF200")
+    entry.add_to_hass(hass)
+    pyvlx.connection.connected = True
+    node_index = VeluxNodeIndex()
+    node_index.add_nodes(
+        Window(pyvlx, node_id, f"Window {node_id}", None) for node_id in WINDOWS
+    )
+    coordinator = VeluxLimitationCoordinator(hass, entry, pyvlx, node_index)
+    yield coordinator
+    pyvlx.connection.connected = False
+
+
+def _limitation(min_value: int, max_value: int = 100) -> Mock:
+    """Return the answer of the gateway to a limitation request."""
+    return Mock(min_value=min_value, max_value=max_value)
+
+
+def _report(
+    node_id: int, state: OperatingState
+) -> FrameNodeStatePositionChangedNotification:
+    """Return the report of a window moving to 50 %."""
+    frame = FrameNodeStatePositionChangedNotification()
+    frame.node_id = node_id
+    frame.state = state
+    frame.current_position = Position(position_percent=50)
+    frame.target = Position(position_percent=50)
+    frame.remaining_time = 0
+    return frame
+
+
+async def test_sweep_backs_off_while_unchanged(
+    coordinator: VeluxLimitationCoordinator,
+) -> None:
+    """Test the sweep fetches every window and slows down without changes."""
+    with patch.object(
+        Window, "get_limitation", autospec=True, return_value=_limitation(0)
+    ) as get_limitation:
+        await coordinator.async_refresh()
+        assert coordinator.data == {
+            node_id: VeluxLimitation(min_value=0, max_value=100)
+            for node_id in WINDOWS
+        }
+        assert get_limitation.await_count == len(WINDOWS)
+        assert coordinator.update_interval == DEFAULT_SCAN_INTERVAL
+
+        await coordinator.async_refresh()
+        assert coordinator.update_interval == DEFAULT_SCAN_INTERVAL * 2
+
+        for _ in range(10):
+            await coordinator.async_refresh()
+        assert coordinator.update_interval == MAX_SCAN_INTERVAL
+
+        get_limitation.return_value = _limitation(20)
+        await coordinator.async_refresh()
+        assert coordinator.update_interval == DEFAULT_SCAN_INTERVAL
+
+
+async def test_finished_move_refreshes_window(
+    hass: HomeAssistant, coordinator: VeluxLimitationCoordinator
+) -> None:
+    """Test a window which finished moving is refreshed alone."""
+    coordinator.async_set_updated_data(
+        {node_id: VeluxLimitation(min_value=0, max_value=100) for node_id in WINDOWS}
+    )
+    coordinator.start_event_updates()
+    with patch.object(
+        Window, "get_limitation", autospec=True, return_value=_limitation(20)
+    ) as get_limitation:
+        await coordinator._async_frame_received(_report(1, OperatingState.EXECUTING))
+        await coordinator._async_frame_received(_report(1, OperatingState.DONE))
+        await asyncio.sleep(0)
+        await hass.async_block_till_done()
+    coordinator.stop_event_updates()
+
+    assert [call.args[0].node_id for call in get_limitation.await_args_list] == [1]
+    assert coordinator.data[1] == VeluxLimitation(min_value=20, max_value=100)
+    assert coordinator.data[2] == VeluxLimitation(min_value=0, max_value=100)
+
+
+async def test_stop_cancels_event_refresh(
+    hass: HomeAssistant, coordinator: VeluxLimitationCoordinator
+) -> None:
+    """Test a running event refresh does not outlive the entry."""
+    requested = asyncio.Event()
+
+    async def async_get_limitation(node: Window) -> Mock:
+        requested.set()
+        await asyncio.Event().wait()
+
+    coordinator.start_event_updates()
+    with patch.object(
+        Window, "get_limitation", autospec=True, side_effect=async_get_limitation
+    ):
+        await coordinator._async_frame_received(_report(1, OperatingState.EXECUTING))
+        await coordinator._async_frame_received(_report(1, OperatingState.DONE))
+        await requested.wait()
+        tasks = set(coordinator.config_entry._background_tasks)
+        coordinator.stop_event_updates()
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert tasks
+    assert all(task.cancelled() for task in tasks)
@@ -0,0 +1,119 @@
+"""Tests for the Velux covers."""
+from __future__ import annotations
+
+from datetime import datetime
+from unittest.mock import AsyncMock
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pyvlx import Position, PyVLX, RollerShutter
+from pyvlx.opening_device import DualRollerShutter
+
+from custom_components.velux.const import (
+    ATTR_ETA,
+    DOMAIN,
+    DUAL_COVER,
+    LOWER_COVER,
+    UPPER_COVER,
+)
+from custom_components.velux.cover import (
+    VeluxCover,
+    VeluxCoverState,
+    VeluxDualRollerShutterListener,
+)
+
+
+class _Curtain:
+    """Cover of a dual roller shutter recording its updates."""
+
+    def __init__(self, subtype: str) -> None:
+        """Initialize the cover."""
+        self.subtype = subtype
+        self.updates = 0
+
+    async def after_update_callback(self, device: DualRollerShutter) -> None:
+        """Count an update."""
+        self.updates += 1
+
+
+def _listener(
+    pyvlx: PyVLX,
+) -> tuple[DualRollerShutter, dict[str, _Curtain], VeluxDualRollerShutterListener]:
+    """Return a node with a listener and the covers of its curtains."""
+    node = DualRollerShutter(pyvlx, 1, "Shutter", None)
+    listener = VeluxDualRollerShutterListener(node)
+    covers = {
+        subtype: _Curtain(subtype)
+        for subtype in (DUAL_COVER, UPPER_COVER, LOWER_COVER)
+    }
+    listener.entities.extend(covers.values())
+    return node, covers, listener
+
+
+async def test_dual_roller_shutter_updates_changed_curtain(pyvlx: PyVLX) -> None:
+    """Test only the cover of the changed curtain is updated."""
+    node, covers, listener = _listener(pyvlx)
+
+    node.position_upper_curtain = Position(position_percent=50)
+    await listener.after_update_callback(node)
+    assert [cover.updates for cover in covers.values()] == [0, 1, 0]
+
+    node.position_lower_curtain = Position(position_percent=30)
+    await listener.after_update_callback(node)
+    assert [cover.updates for cover in covers.values()] == [0, 1, 1]
+
+    # Periodic updates of a moving node without changes reach nobody
+    await listener.after_update_callback(node)
+    assert [cover.updates for cover in covers.values()] == [0, 1, 1]
+
+
+async def test_dual_roller_shutter_moving_per_curtain(pyvlx: PyVLX) -> None:
+    """Test the direction of each curtain follows its own position."""
+    node, covers, listener = _listener(pyvlx)
+    node.is_closing = True
+
+    node.position_upper_curtain = Position(position_percent=40)
+    await listener.after_update_callback(node)
+    assert listener.closing == {UPPER_COVER}
+    assert not listener.opening
+
+    node.position_upper_curtain = Position(position_percent=20)
+    await listener.after_update_callback(node)
+    assert listener.opening == {UPPER_COVER}
+    assert not listener.closing
+
+    # The stop of the node reaches the cover which was moving only
+    node.is_closing = False
+    await listener.after_update_callback(node)
+    assert not listener.opening
+    assert [cover.updates for cover in covers.values()] == [0, 3, 0]
+
+
+async def test_eta_only_while_predicted(pyvlx: PyVLX) -> None:
+    """Test the eta attribute is left out without a travel prediction."""
+    cover = VeluxCover(
+        RollerShutter(pyvlx, 1, "Shutter", None), MockConfigEntry(domain=DOMAIN), None
+    )
+    state = VeluxCoverState(
+        position=0, closed=True, opening=False, closing=False, available=True
+    )
+    cover._state_snapshot = state  # pylint: disable=protected-access
+    assert ATTR_ETA not in cover.extra_state_attributes
+
+    eta = datetime(2026, 1, 1, 12, 0)
+    cover._state_snapshot = VeluxCoverState(  # pylint: disable=protected-access
+        position=50, closed=False, opening=True, closing=False, available=True, eta=eta
+    )
+    assert cover.extra_state_attributes == {ATTR_ETA: eta}
+
+
+async def test_set_cover_position_passes_position(pyvlx: PyVLX) -> None:
+    """Test the position of the service call is not passed twice."""
+    dispatcher = AsyncMock()
+    dispatcher.async_set_position.return_value = None
+    node = RollerShutter(pyvlx, 1, "Shutter", None)
+    cover = VeluxCover(node, MockConfigEntry(domain=DOMAIN), dispatcher)
+
+    await cover.async_set_cover_position(position=30)
+    dispatcher.async_set_position.assert_awaited_once_with(
+        node, Position(position_percent=70), None
+    )
@@ -0,0 +1,29 @@
+"""Tests for the Velux diagnostics."""
+from __future__ import annotations
+
+import json
+from collections.abc import Awaitable, Callable
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.velux.diagnostics import async_get_config_entry_diagnostics
+
+from . import HOST, PASSWORD, stored_node
+
+
+async def test_password_is_redacted(
+    hass: HomeAssistant, setup_snapshot: Callable[..., Awaitable[MockConfigEntry]]
+) -> None:
+    """Test the diagnostics keep the host and the nodes but not the password."""
+    entry = await setup_snapshot([stored_node(1, "RollerShutter")])
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["entry"]["data"] == {
+        "host": HOST,
+        "password": "**REDACTED**",
+    }
+    assert PASSWORD not in json.dumps(diagnostics, default=str)
+    assert [node["node_id"] for node in diagnostics["nodes"]] == [1]
+    assert diagnostics["gateway"]["connected"] is False
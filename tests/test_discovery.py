@@ -0,0 +1,75 @@
+"""Tests for the discovery cache."""
+from __future__ import annotations
+
+from collections.abc import Generator
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pyvlx.discovery import VeluxHost
+
+from custom_components.velux.discovery import DISCOVERY_TTL, VeluxDiscoveryCache
+
+from . import HOST
+
+
+@pytest.fixture
+def discovery() -> Generator[Mock]:
+    """Return the discovery of pyvlx, answered by no gateway."""
+    discovery = Mock(hosts=[], async_discover_hosts=AsyncMock(return_value=False))
+    with (
+        patch(
+            "custom_components.velux.discovery.zeroconf.async_get_async_instance"
+        ),
+        patch(
+            "custom_components.velux.discovery.VeluxDiscovery",
+            return_value=discovery,
+        ),
+    ):
+        yield discovery
+
+
+def _answer(discovery: Mock) -> None:
+    """Let a gateway answer the next scans."""
+    discovery.hosts = [VeluxHost(hostname="VELUX_KLF_1234", ip_address=HOST)]
+    discovery.async_discover_hosts.return_value = True
+
+
+async def test_found_gateways_are_reused(
+    hass: HomeAssistant, discovery: Mock
+) -> None:
+    """Test a scan finding gateways is reused until DISCOVERY_TTL expired."""
+    _answer(discovery)
+    cache = VeluxDiscoveryCache(hass)
+    with patch("custom_components.velux.discovery.time.monotonic") as monotonic:
+        monotonic.return_value = 1000.0
+        assert [host.ip_address for host in await cache.async_get_hosts()] == [HOST]
+        monotonic.return_value += DISCOVERY_TTL
+        assert [host.ip_address for host in await cache.async_get_hosts()] == [HOST]
+        assert discovery.async_discover_hosts.await_count == 1
+
+        monotonic.return_value += 1
+        await cache.async_get_hosts()
+        assert discovery.async_discover_hosts.await_count == 2
+
+
+async def test_empty_scan_is_repeated(hass: HomeAssistant, discovery: Mock) -> None:
+    """Test a scan without answers is not cached."""
+    cache = VeluxDiscoveryCache(hass)
+    assert await cache.async_get_hosts() == []
+
+    _answer(discovery)
+    assert [host.ip_address for host in await cache.async_get_hosts()] == [HOST]
+    assert discovery.async_discover_hosts.await_count == 2
+
+
+async def test_gateways_of_flows_expire(hass: HomeAssistant, discovery: Mock) -> None:
+    """Test gateways seen by discovery flows are dropped after DISCOVERY_TTL."""
+    cache = VeluxDiscoveryCache(hass)
+    with patch("custom_components.velux.discovery.time.monotonic") as monotonic:
+        monotonic.return_value = 1000.0
+        cache.async_add_host("VELUX_KLF_1234", HOST)
+        assert [host.ip_address for host in await cache.async_get_hosts()] == [HOST]
+
+        monotonic.return_value += DISCOVERY_TTL + 1
+        assert await cache.async_get_hosts() == []
@@ -0,0 +1,170 @@
+"""Tests for the command dispatcher."""
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import Mock, patch
+
+from homeassistant.core import HomeAssistant
+from pyvlx import Position, PyVLX
+from pyvlx.opening_device import RollerShutter
+
+from custom_components.velux.dispatcher import (
+    MAX_NODES_PER_COMMAND,
+    MultiNodeCommandSend,
+    VeluxCommandDispatcher,
+)
+from custom_components.velux.scheduler import VeluxCommandScheduler
+from custom_components.velux.sessions import VeluxCommandSession, VeluxSessionTracker
+
+
+def _dispatcher(hass: HomeAssistant, pyvlx: PyVLX) -> VeluxCommandDispatcher:
+    """Return a dispatcher of pyvlx."""
+    return VeluxCommandDispatcher(
+        hass,
+        pyvlx,
+        VeluxCommandScheduler(hass),
+        VeluxSessionTracker(hass, pyvlx),
+    )
+
+
+async def test_stop_before_flush_reaches_scheduler(
+    hass: HomeAssistant, pyvlx: PyVLX
+) -> None:
+    """Test a stop drops a command whose flush task has not run yet."""
+    dispatcher = _dispatcher(hass, pyvlx)
+    node = RollerShutter(pyvlx, 1, "Shutter")
+    with patch(
+        "custom_components.velux.dispatcher.MultiNodeCommandSend.send"
+    ) as send:
+        task = hass.async_create_task(
+            dispatcher.async_set_position(node, Position(position_percent=100))
+        )
+        await asyncio.sleep(0)
+        # The coalesce window closes, the flush task is created but not run
+        dispatcher._flush_handle.cancel()  # pylint: disable=protected-access
+        dispatcher._async_schedule_flush()  # pylint: disable=protected-access
+        dispatcher.async_cancel(node)
+        async with asyncio.timeout(1):
+            assert await task is None
+        await hass.async_block_till_done()
+    send.assert_not_called()
+
+
+async def test_stop_while_flush_waits_for_session(
+    hass: HomeAssistant, pyvlx: PyVLX
+) -> None:
+    """Test a stop drops a command queued behind a running one."""
+    scheduler = VeluxCommandScheduler(hass, session_limit=1)
+    dispatcher = VeluxCommandDispatcher(
+        hass, pyvlx, scheduler, VeluxSessionTracker(hass, pyvlx)
+    )
+    node = RollerShutter(pyvlx, 1, "Shutter")
+    release = asyncio.Event()
+    busy = hass.async_create_task(scheduler.async_run(release.wait, node_ids=(2,)))
+    with patch(
+        "custom_components.velux.dispatcher.MultiNodeCommandSend.send"
+    ) as send:
+        task = hass.async_create_task(
+            dispatcher.async_set_position(node, Position(position_percent=100))
+        )
+        while scheduler.queue_depth == 0:
+            await asyncio.sleep(0.01)
+        dispatcher.async_cancel(node)
+        async with asyncio.timeout(1):
+            assert await task is None
+        release.set()
+        await busy
+        await hass.async_block_till_done()
+    send.assert_not_called()
+
+
+async def _async_dispatch(
+    dispatcher: VeluxCommandDispatcher,
+    hass: HomeAssistant,
+    commands: list[tuple[RollerShutter, int]],
+) -> list[asyncio.Task[VeluxCommandSession | None]]:
+    """Queue a position command per node within one coalesce window."""
+    tasks = [
+        hass.async_create_task(
+            dispatcher.async_set_position(
+                node, Position(position_percent=position_percent)
+            )
+        )
+        for node, position_percent in commands
+    ]
+    await asyncio.sleep(0)
+    return tasks
+
+
+def _sent(send: Mock) -> list[list[int]]:
+    """Return the node ids of every sent frame."""
+    return [call.args[0].node_ids for call in send.call_args_list]
+
+
+async def test_window_is_sent_as_one_frame(hass: HomeAssistant, pyvlx: PyVLX) -> None:
+    """Test commands with one target within the window share a frame."""
+    dispatcher = _dispatcher(hass, pyvlx)
+    nodes = [RollerShutter(pyvlx, node_id, "Shutter") for node_id in (1, 2, 3)]
+    with patch.object(MultiNodeCommandSend, "send", autospec=True) as send:
+        tasks = await _async_dispatch(dispatcher, hass, [(node, 100) for node in nodes])
+        await asyncio.gather(*tasks)
+    assert _sent(send) == [[1, 2, 3]]
+
+
+async def test_different_targets_are_sent_separately(
+    hass: HomeAssistant, pyvlx: PyVLX
+) -> None:
+    """Test commands with different targets fall back to one frame each."""
+    dispatcher = _dispatcher(hass, pyvlx)
+    nodes = [RollerShutter(pyvlx, node_id, "Shutter") for node_id in (1, 2, 3)]
+    with patch.object(MultiNodeCommandSend, "send", autospec=True) as send:
+        tasks = await _async_dispatch(
+            dispatcher, hass, [(nodes[0], 100), (nodes[1], 0), (nodes[2], 100)]
+        )
+        await asyncio.gather(*tasks)
+    assert sorted(_sent(send)) == [[1, 3], [2]]
+
+
+async def test_frames_are_split_at_node_limit(
+    hass: HomeAssistant, pyvlx: PyVLX
+) -> None:
+    """Test more nodes than one frame can address are split across frames."""
+    dispatcher = _dispatcher(hass, pyvlx)
+    nodes = [
+        RollerShutter(pyvlx, node_id, "Shutter")
+        for node_id in range(MAX_NODES_PER_COMMAND + 5)
+    ]
+    with patch.object(MultiNodeCommandSend, "send", autospec=True) as send:
+        tasks = await _async_dispatch(dispatcher, hass, [(node, 100) for node in nodes])
+        await asyncio.gather(*tasks)
+    assert _sent(send) == [
+        list(range(MAX_NODES_PER_COMMAND)),
+        list(range(MAX_NODES_PER_COMMAND, MAX_NODES_PER_COMMAND + 5)),
+    ]
+
+
+async def test_newer_command_drops_node_from_queued_frame(
+    hass: HomeAssistant, pyvlx: PyVLX
+) -> None:
+    """Test a queued frame does not send the stale target of a node."""
+    scheduler = VeluxCommandScheduler(hass, session_limit=1)
+    dispatcher = VeluxCommandDispatcher(
+        hass, pyvlx, scheduler, VeluxSessionTracker(hass, pyvlx)
+    )
+    nodes = [RollerShutter(pyvlx, node_id, "Shutter") for node_id in (1, 2, 3)]
+    release = asyncio.Event()
+    busy = hass.async_create_task(scheduler.async_run(release.wait, node_ids=(4,)))
+    with patch.object(MultiNodeCommandSend, "send", autospec=True) as send:
+        first = await _async_dispatch(dispatcher, hass, [(node, 100) for node in nodes])
+        while scheduler.queue_depth == 0:
+            await asyncio.sleep(0.01)
+        second = await _async_dispatch(dispatcher, hass, [(nodes[1], 0)])
+        while scheduler.queue_depth == 1:
+            await asyncio.sleep(0.01)
+        # The newer command of node 2 replaces its target in the first frame
+        async with asyncio.timeout(1):
+            assert await first[1] is None
+        release.set()
+        await asyncio.gather(busy, *first, *second)
+    assert _sent(send) == [[1, 3], [2]]
+    assert send.call_args_list[1].args[0].parameter == Position(position_percent=0)
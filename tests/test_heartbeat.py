@@ -0,0 +1,153 @@
+"""Tests for the incremental heartbeat."""
+from __future__ import annotations
+
+from collections.abc import Generator
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from pyvlx import Blind, PyVLX, RollerShutter, Window
+from pyvlx.api.frames import (
+    FrameNodeStatePositionChangedNotification,
+    FrameSessionFinishedNotification,
+    FrameStatusRequestNotification,
+)
+
+from custom_components.velux import heartbeat as heartbeat_module
+from custom_components.velux.heartbeat import (
+    ADAPTIVE_MAX_INTERVAL,
+    ADAPTIVE_MIN_INTERVAL,
+    QUIET_PERIOD,
+    REASON_ACTIVE,
+    REASON_ERROR,
+    REASON_QUIET,
+    REASON_RECONNECT,
+    REASON_STEADY,
+    MultiNodeStatusRequest,
+    VeluxIncrementalHeartbeat,
+)
+
+
+@pytest.fixture
+def monotonic() -> Generator[Mock]:
+    """Return the clock of the heartbeat."""
+    with patch("custom_components.velux.heartbeat.time.monotonic") as monotonic:
+        monotonic.return_value = 1000.0
+        yield monotonic
+
+
+@pytest.fixture
+def requested(monkeypatch: pytest.MonkeyPatch) -> Generator[list[list[int]]]:
+    """Return the node ids of the status requests sent by the pulses."""
+    monkeypatch.setattr(heartbeat_module, "STATUS_REQUEST_PAUSE", 0)
+    requested: list[list[int]] = []
+
+    async def async_request(status_request: MultiNodeStatusRequest) -> None:
+        requested.append(status_request.node_ids)
+        status_request.success = True
+
+    with (
+        patch.object(
+            heartbeat_module,
+            "GetState",
+            return_value=Mock(success=True, do_api_call=AsyncMock()),
+        ),
+        patch.object(
+            MultiNodeStatusRequest,
+            "do_api_call",
+            autospec=True,
+            side_effect=async_request,
+        ),
+    ):
+        yield requested
+
+
+def _report(node_id: int) -> FrameNodeStatePositionChangedNotification:
+    """Return a position report pushed by the house status monitor."""
+    frame = FrameNodeStatePositionChangedNotification()
+    frame.node_id = node_id
+    return frame
+
+
+async def test_pulse_refreshes_stale_nodes(
+    pyvlx: PyVLX, monotonic: Mock, requested: list[list[int]]
+) -> None:
+    """Test a pulse asks blinds and nodes quiet for stale_age, oldest first."""
+    for node in (
+        Window(pyvlx, 1, "Window", None),
+        RollerShutter(pyvlx, 2, "Shutter", None),
+        Blind(pyvlx, 3, "Blind", None),
+        RollerShutter(pyvlx, 4, "Shutter", None),
+    ):
+        pyvlx.nodes.add(node)
+    heartbeat = VeluxIncrementalHeartbeat(pyvlx, load_all_states=False, stale_age=60)
+    monotonic.return_value = 900
+    await heartbeat._frame_received(_report(4))
+    monotonic.return_value = 950
+    await heartbeat._frame_received(_report(1))
+
+    # Node 2 never reported, node 4 longest ago, node 1 is recent
+    monotonic.return_value = 1000
+    await heartbeat.pulse()
+    assert requested == [[3, 2, 4]]
+    assert heartbeat.refreshed_nodes == 3
+    assert heartbeat.stale_nodes == 2
+
+    heartbeat.load_all_states = True
+    await heartbeat.pulse()
+    assert requested[-1] == [1, 2, 3, 4]
+    assert heartbeat.stale_nodes is None
+
+
+async def test_status_request_collects_every_node(pyvlx: PyVLX) -> None:
+    """Test one status request collects the notifications of all its nodes."""
+    status_request = MultiNodeStatusRequest(pyvlx, [1, 2])
+    frame = status_request.request_frame()
+    assert frame.node_ids == [1, 2]
+
+    notifications = []
+    for node_id in (1, 2):
+        notification = FrameStatusRequestNotification()
+        notification.session_id = status_request.session_id
+        notification.node_id = node_id
+        notifications.append(notification)
+        assert not await status_request.handle_frame(notification)
+    other_session = FrameSessionFinishedNotification(status_request.session_id + 1)
+    assert not await status_request.handle_frame(other_session)
+    assert await status_request.handle_frame(
+        FrameSessionFinishedNotification(status_request.session_id)
+    )
+    assert status_request.success
+    assert status_request.notification_frames == notifications
+
+
+async def test_adaptive_interval(pyvlx: PyVLX, monotonic: Mock) -> None:
+    """Test the interval stretches while frames are pushed and falls back."""
+    pyvlx.klf200.house_status_monitor_enabled = True
+    heartbeat = VeluxIncrementalHeartbeat(pyvlx, interval=60, adaptive=True)
+
+    def adapt(now: float) -> tuple[float, str]:
+        monotonic.return_value = now
+        heartbeat._adapt_interval()
+        return heartbeat.current_interval, heartbeat.interval_reason
+
+    assert adapt(1000) == (60, REASON_QUIET)
+    monotonic.return_value = 1010
+    await heartbeat._frame_received(_report(1))
+    assert adapt(1060) == (120, REASON_ACTIVE)
+    # Without new pushes the interval is kept
+    assert adapt(1180) == (120, REASON_STEADY)
+    monotonic.return_value = 1200
+    await heartbeat._frame_received(_report(1))
+    assert adapt(1300) == (240, REASON_ACTIVE)
+    for now in (1400, 1500, 1600):
+        monotonic.return_value = now - 1
+        await heartbeat._frame_received(_report(1))
+        adapt(now)
+    assert heartbeat.current_interval == ADAPTIVE_MAX_INTERVAL
+
+    heartbeat._pulse_failed = True
+    assert adapt(1700) == (ADAPTIVE_MIN_INTERVAL, REASON_ERROR)
+    heartbeat._pulse_failed = False
+    heartbeat._connection_changed()
+    assert adapt(1800) == (ADAPTIVE_MIN_INTERVAL, REASON_RECONNECT)
+    assert adapt(1599 + QUIET_PERIOD + 1) == (60, REASON_QUIET)
@@ -0,0 +1,89 @@
+"""Tests for the setup and unload of the Velux integration."""
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from unittest.mock import AsyncMock, patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import CONF_HOST, CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pyvlx import PyVLX
+from pyvlx.exception import PyVLXException
+
+from custom_components.velux import async_unload_entry
+from custom_components.velux.const import DOMAIN
+
+from . import HOST, PASSWORD, stored_node
+
+
+async def test_setup_records_phase_timings(
+    hass: HomeAssistant, setup_snapshot: Callable[..., Awaitable[MockConfigEntry]]
+) -> None:
+    """Test the duration of every phase of the setup is recorded."""
+    entry = await setup_snapshot([stored_node(1, "RollerShutter")])
+    timings = hass.data[DOMAIN][entry.entry_id].setup_timings
+
+    assert {
+        "restore_snapshot",
+        "gateway_platforms",
+        "node_platforms",
+        "scene_platforms",
+        "total",
+    } <= set(timings)
+    assert all(duration >= 0 for duration in timings.values())
+    assert timings["total"] >= timings["node_platforms"]
+
+
+async def test_failed_phase_undoes_setup(hass: HomeAssistant) -> None:
+    """Test a failing phase unloads the other phases and retries the setup."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={CONF_HOST: HOST, CONF_PASSWORD: PASSWORD},
+        unique_id="KLF200",
+    )
+    entry.add_to_hass(hass)
+
+    with patch.object(PyVLX, "connect", AsyncMock()), patch.object(
+        PyVLX, "load_nodes", side_effect=PyVLXException("Unable to load nodes")
+    ), patch.object(PyVLX, "load_scenes", AsyncMock()):
+        assert not await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert entry.entry_id not in hass.data[DOMAIN]
+    # The gateway and scene platforms set up meanwhile were unloaded
+    entities = er.async_entries_for_config_entry(er.async_get(hass), entry.entry_id)
+    assert entities
+    assert all(
+        hass.states.get(entity.entity_id).attributes.get("restored")
+        for entity in entities
+    )
+    await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_failed_platform_unload_keeps_entry_running(
+    hass: HomeAssistant, setup_snapshot: Callable[..., Awaitable[MockConfigEntry]]
+) -> None:
+    """Test the shared objects keep running if a platform fails to unload."""
+    entry = await setup_snapshot([stored_node(1, "RollerShutter")])
+    data = hass.data[DOMAIN][entry.entry_id]
+    frame_received_cbs = list(data.pyvlx.connection.frame_received_cbs)
+
+    with patch.object(
+        hass.config_entries, "async_unload_platforms", return_value=False
+    ):
+        assert not await async_unload_entry(hass, entry)
+
+    assert hass.data[DOMAIN][entry.entry_id] is data
+    # Session tracker, telemetry and trace still follow the frames
+    assert data.pyvlx.connection.frame_received_cbs == frame_received_cbs
+    ran = []
+
+    async def async_job() -> None:
+        ran.append(True)
+
+    data.scheduler.async_resume()
+    await data.scheduler.async_run(async_job, node_ids=(1,))
+    assert ran
@@ -0,0 +1,122 @@
+"""Tests for the Velux lights."""
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from unittest.mock import patch
+
+from homeassistant.components.light import ATTR_BRIGHTNESS, DOMAIN as LIGHT_DOMAIN
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    SERVICE_TURN_ON,
+    STATE_OFF,
+    STATE_UNAVAILABLE,
+)
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pyvlx import Intensity, Light
+from pyvlx.api.frames import (
+    FrameCommandRunStatusNotification,
+    FrameSessionFinishedNotification,
+)
+
+from custom_components.velux.const import DOMAIN
+from custom_components.velux.sessions import TrackedCommandSend
+
+from . import stored_node
+
+ENTITY_ID = "light.light_1"
+
+
+async def _accept(command: TrackedCommandSend) -> None:
+    """Accept the command like the gateway, the session stays open."""
+    command.session = command.tracker.async_track(
+        1, (command.node_id,), command.target
+    )
+
+
+async def _async_setup_light(
+    hass: HomeAssistant, setup_snapshot: Callable[..., Awaitable[MockConfigEntry]]
+) -> Light:
+    """Set up a connected light which is off and return its node."""
+    entry = await setup_snapshot([stored_node(1, "Light")])
+    data = hass.data[DOMAIN][entry.entry_id]
+    data.scheduler.async_resume()
+    data.pyvlx.connection.connected = True
+    node = data.pyvlx.nodes[1]
+    node.intensity = Intensity(intensity_percent=100)
+    await node.after_update()
+    assert hass.states.get(ENTITY_ID).state == STATE_OFF
+    return node
+
+
+async def _async_turn_on(hass: HomeAssistant) -> None:
+    """Turn the light on to full brightness."""
+    with patch.object(TrackedCommandSend, "send", _accept):
+        await hass.services.async_call(
+            LIGHT_DOMAIN,
+            SERVICE_TURN_ON,
+            {ATTR_ENTITY_ID: ENTITY_ID, ATTR_BRIGHTNESS: 255},
+            blocking=True,
+        )
+
+
+async def test_updates_towards_target_keep_optimistic_state(
+    hass: HomeAssistant, setup_snapshot: Callable[..., Awaitable[MockConfigEntry]]
+) -> None:
+    """Test the light ramping up does not replace the optimistic state."""
+    node = await _async_setup_light(hass, setup_snapshot)
+    await _async_turn_on(hass)
+    assert hass.states.get(ENTITY_ID).attributes[ATTR_BRIGHTNESS] == 255
+
+    for intensity_percent in (80, 50):
+        node.intensity = Intensity(intensity_percent=intensity_percent)
+        await node.after_update()
+        assert hass.states.get(ENTITY_ID).attributes[ATTR_BRIGHTNESS] == 255
+
+
+async def test_update_away_from_target_replaces_optimistic_state(
+    hass: HomeAssistant, setup_snapshot: Callable[..., Awaitable[MockConfigEntry]]
+) -> None:
+    """Test the light dimming down again is shown at once."""
+    node = await _async_setup_light(hass, setup_snapshot)
+    await _async_turn_on(hass)
+
+    node.intensity = Intensity(intensity_percent=50)
+    await node.after_update()
+    node.intensity = Intensity(intensity_percent=100)
+    await node.after_update()
+    assert hass.states.get(ENTITY_ID).state == STATE_OFF
+
+
+async def test_availability_change_replaces_optimistic_state(
+    hass: HomeAssistant, setup_snapshot: Callable[..., Awaitable[MockConfigEntry]]
+) -> None:
+    """Test a lost connection is shown while the session is open."""
+    node = await _async_setup_light(hass, setup_snapshot)
+    await _async_turn_on(hass)
+
+    node.pyvlx.connection.connected = False
+    await node.after_update()
+    assert hass.states.get(ENTITY_ID).state == STATE_UNAVAILABLE
+
+
+async def test_failed_session_reverts_optimistic_state(
+    hass: HomeAssistant, setup_snapshot: Callable[..., Awaitable[MockConfigEntry]]
+) -> None:
+    """Test the reported state is shown if the light did not reach its target."""
+    node = await _async_setup_light(hass, setup_snapshot)
+    await _async_turn_on(hass)
+    assert hass.states.get(ENTITY_ID).attributes[ATTR_BRIGHTNESS] == 255
+
+    # The light reports it stayed off before the session finishes
+    off = int.from_bytes(Intensity(intensity_percent=100).raw, "big")
+    for frame in (
+        FrameCommandRunStatusNotification(
+            session_id=1, index_id=1, node_parameter=0, parameter_value=off
+        ),
+        FrameSessionFinishedNotification(session_id=1),
+    ):
+        for frame_received_cb in list(node.pyvlx.connection.frame_received_cbs):
+            await frame_received_cb(frame)
+    await hass.async_block_till_done()
+    assert hass.states.get(ENTITY_ID).state == STATE_OFF
@@ -0,0 +1,133 @@
+"""Tests for the Velux node entities."""
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_fire_time_changed_exact,
+)
+from pyvlx import Position
+from pyvlx.api.frames import FrameNodeStatePositionChangedNotification
+from pyvlx.const import OperatingState
+
+from custom_components.velux.const import CONF_STATE_WRITE_INTERVAL, DOMAIN
+from custom_components.velux.telemetry import PUBLISH_INTERVAL
+
+from . import stored_node
+
+# House status monitor reports of a roller shutter closing within 5 s, as
+# seconds since the previous report, position and remaining seconds
+RECORDED_MOVE = [
+    (0.0, 0, 5),
+    (0.3, 6, 5),
+    (0.3, 12, 4),
+    (0.4, 20, 4),
+    (0.3, 26, 4),
+    (0.3, 32, 3),
+    (0.4, 40, 3),
+    (0.3, 46, 3),
+    (0.3, 52, 2),
+    (0.4, 60, 2),
+    (0.3, 66, 2),
+    (0.3, 72, 1),
+    (0.4, 80, 1),
+    (0.3, 86, 1),
+    (0.3, 92, 1),
+    (0.4, 100, 0),
+]
+
+
+def _report(
+    position_percent: int, remaining_time: int
+) -> FrameNodeStatePositionChangedNotification:
+    """Return the report of node 1 closing."""
+    frame = FrameNodeStatePositionChangedNotification()
+    frame.node_id = 1
+    frame.state = (
+        OperatingState.EXECUTING if position_percent < 100 else OperatingState.DONE
+    )
+    frame.current_position = Position(position_percent=position_percent)
+    frame.target = Position(position_percent=100)
+    frame.remaining_time = remaining_time
+    return frame
+
+
+@pytest.mark.parametrize(("state_write_interval", "writes"), [(0, 16), (1.0, 7)])
+async def test_replay_state_writes(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    setup_snapshot: Callable[..., Awaitable[MockConfigEntry]],
+    state_write_interval: float,
+    writes: int,
+) -> None:
+    """Test the throttle thins out the state writes of a recorded move."""
+    open_position = Position(position_percent=0).raw.hex()
+    entry = await setup_snapshot(
+        [stored_node(1, "RollerShutter", position=open_position)],
+        {CONF_STATE_WRITE_INTERVAL: state_write_interval},
+    )
+    pyvlx = hass.data[DOMAIN][entry.entry_id].pyvlx
+    pyvlx.connection.connected = True
+    events = async_capture_events(hass, EVENT_STATE_CHANGED)
+
+    for delay, position_percent, remaining_time in RECORDED_MOVE:
+        freezer.tick(timedelta(seconds=delay))
+        async_fire_time_changed_exact(hass)
+        await pyvlx.node_updater.process_frame(
+            _report(position_percent, remaining_time)
+        )
+        await hass.async_block_till_done()
+    # Let the delayed write and the interpolation of pyvlx run out
+    freezer.tick(timedelta(seconds=1))
+    async_fire_time_changed_exact(hass)
+    await hass.async_block_till_done()
+
+    assert len(events) == writes
+    assert hass.states.get("cover.rollershutter_1").attributes["current_position"] == 0
+
+
+async def test_counters_are_pushed(
+    hass: HomeAssistant,
+    entity_registry: er.EntityRegistry,
+    freezer: FrozenDateTimeFactory,
+    setup_snapshot: Callable[..., Awaitable[MockConfigEntry]],
+) -> None:
+    """Test the skipped writes are published with the telemetry."""
+    open_position = Position(position_percent=0).raw.hex()
+    entry = await setup_snapshot(
+        [stored_node(1, "RollerShutter", position=open_position)],
+        {CONF_STATE_WRITE_INTERVAL: 1.0},
+    )
+    pyvlx = hass.data[DOMAIN][entry.entry_id].pyvlx
+    pyvlx.connection.connected = True
+    suppressed = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, "KLF200_suppressed_state_writes"
+    )
+    unchanged = entity_registry.async_get_entity_id(
+        "sensor", DOMAIN, "KLF200_unchanged_state_updates"
+    )
+    assert hass.states.get(suppressed).state == "0"
+
+    for delay, position_percent, remaining_time in RECORDED_MOVE:
+        freezer.tick(timedelta(seconds=delay))
+        async_fire_time_changed_exact(hass)
+        await pyvlx.node_updater.process_frame(
+            _report(position_percent, remaining_time)
+        )
+        await hass.async_block_till_done()
+    assert hass.states.get(suppressed).state == "0"
+    assert hass.states.get(unchanged).state == "0"
+
+    freezer.tick(timedelta(seconds=PUBLISH_INTERVAL))
+    async_fire_time_changed_exact(hass)
+    await hass.async_block_till_done()
+    assert int(hass.states.get(suppressed).state) > 0
+    assert int(hass.states.get(unchanged).state) > 0
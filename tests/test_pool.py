@@ -0,0 +1,23 @@
+"""Tests for the connection pool."""
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.core import HomeAssistant
+from pyvlx import PyVLX
+
+from custom_components.velux.pool import async_get_pool
+
+from . import HOST, PASSWORD
+
+
+async def test_release_stops_heartbeat(hass: HomeAssistant, pyvlx: PyVLX) -> None:
+    """Test a kept connection has no heartbeat until it is adopted."""
+    pyvlx.connection.connected = True
+    pyvlx.heartbeat.task = asyncio.create_task(asyncio.sleep(3600))
+    pool = async_get_pool(hass)
+
+    await pool.async_release(HOST, PASSWORD, pyvlx)
+    assert pyvlx.heartbeat.stopped
+
+    assert pool.async_adopt(HOST, PASSWORD) is pyvlx
@@ -0,0 +1,37 @@
+"""Tests for the callback profiler."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.velux.profiler import (
+    KIND_COMMAND,
+    KIND_UPDATE_CALLBACK,
+    SLOW_WARNING_INTERVAL,
+    VeluxProfiler,
+)
+
+
+def test_slow_warnings_are_rate_limited(caplog: pytest.LogCaptureFixture) -> None:
+    """Test slow callbacks are counted but warned about once per interval."""
+    profiler = VeluxProfiler("KLF200")
+    with (
+        patch("custom_components.velux.profiler.time.perf_counter") as perf_counter,
+        patch("custom_components.velux.profiler.time.monotonic") as monotonic,
+    ):
+        perf_counter.return_value = 10.2
+        for now in (1000, 1001, 1000 + SLOW_WARNING_INTERVAL):
+            monotonic.return_value = now
+            profiler.record(KIND_UPDATE_CALLBACK, "VeluxCover", 10.0)
+        # Fast calls and commands, which may take long, are not warned about
+        profiler.record(KIND_UPDATE_CALLBACK, "VeluxCover", 10.19)
+        profiler.record(KIND_COMMAND, "VeluxCover", 5.0)
+
+    warnings = [record for record in caplog.records if record.levelname == "WARNING"]
+    assert len(warnings) == 2
+    assert "3 of 3 calls" in warnings[-1].getMessage()
+    profile = profiler.as_dict()
+    assert profile[KIND_UPDATE_CALLBACK]["VeluxCover"]["calls"] == 4
+    assert profile[KIND_UPDATE_CALLBACK]["VeluxCover"]["slow_calls"] == 3
+    assert profile[KIND_COMMAND]["VeluxCover"]["slow_calls"] == 0
@@ -0,0 +1,218 @@
+"""Tests for the command scheduler."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from pyvlx import Position
+
+from custom_components.velux import scheduler as scheduler_module
+from custom_components.velux.scheduler import (
+    ALL_CHANNELS,
+    CHANNEL_FP1,
+    CHANNEL_FP2,
+    CHANNEL_FP3,
+    CHANNEL_MAIN,
+    PRIORITY_COMMAND,
+    PRIORITY_STOP,
+    VeluxCommandScheduler,
+)
+from custom_components.velux.sessions import SESSION_TIMEOUT, VeluxCommandSession
+
+NODE_ID = 1
+
+
+class _Recorder:
+    """Jobs which record their name, the first one blocks the session."""
+
+    def __init__(self) -> None:
+        """Initialize the recorder."""
+        self.ran: list[str] = []
+        self.release = asyncio.Event()
+
+    def job(self, name: str, block: bool = False):
+        """Return a job recording name."""
+
+        async def run() -> None:
+            self.ran.append(name)
+            if block:
+                await self.release.wait()
+
+        return run
+
+
+async def _run_queued(
+    hass: HomeAssistant, commands: list[tuple[str, tuple[int, ...], int]]
+) -> tuple[VeluxCommandScheduler, list[str]]:
+    """Queue commands for NODE_ID behind a running one and return what ran."""
+    scheduler = VeluxCommandScheduler(hass)
+    recorder = _Recorder()
+    tasks = [
+        hass.async_create_task(
+            scheduler.async_run(
+                recorder.job("running", block=True), node_ids=(NODE_ID,)
+            )
+        )
+    ]
+    await asyncio.sleep(0)
+    for name, channels, priority in commands:
+        tasks.append(
+            hass.async_create_task(
+                scheduler.async_run(
+                    recorder.job(name),
+                    node_ids=(NODE_ID,),
+                    priority=priority,
+                    channels=channels,
+                )
+            )
+        )
+        await asyncio.sleep(0)
+    recorder.release.set()
+    await asyncio.gather(*tasks)
+    return scheduler, recorder.ran
+
+
+async def test_curtains_do_not_supersede_each_other(hass: HomeAssistant) -> None:
+    """Test commands for the upper and the lower curtain both run."""
+    scheduler, ran = await _run_queued(
+        hass,
+        [
+            ("upper", (CHANNEL_FP1,), PRIORITY_COMMAND),
+            ("lower", (CHANNEL_FP2,), PRIORITY_COMMAND),
+        ],
+    )
+    assert ran == ["running", "upper", "lower"]
+    assert scheduler.superseded_commands == 0
+
+
+async def test_tilt_and_position_do_not_supersede_each_other(
+    hass: HomeAssistant,
+) -> None:
+    """Test a tilt and a position command for a blind both run."""
+    scheduler, ran = await _run_queued(
+        hass,
+        [
+            ("tilt", (CHANNEL_FP3,), PRIORITY_COMMAND),
+            ("position", (CHANNEL_MAIN,), PRIORITY_COMMAND),
+        ],
+    )
+    assert ran == ["running", "tilt", "position"]
+    assert scheduler.superseded_commands == 0
+
+
+async def test_same_channel_supersedes(hass: HomeAssistant) -> None:
+    """Test a newer command for the same channel drops the queued one."""
+    scheduler, ran = await _run_queued(
+        hass,
+        [
+            ("upper", (CHANNEL_FP1,), PRIORITY_COMMAND),
+            ("both", (CHANNEL_MAIN, CHANNEL_FP1, CHANNEL_FP2), PRIORITY_COMMAND),
+        ],
+    )
+    assert ran == ["running", "both"]
+    assert scheduler.superseded_commands == 1
+
+
+async def test_stop_drops_moves_but_not_the_reverse(hass: HomeAssistant) -> None:
+    """Test a stop drops queued moves and a later move keeps the stop."""
+    scheduler, ran = await _run_queued(
+        hass,
+        [
+            ("tilt", (CHANNEL_FP3,), PRIORITY_COMMAND),
+            ("stop", ALL_CHANNELS, PRIORITY_STOP),
+            ("position", (CHANNEL_MAIN,), PRIORITY_COMMAND),
+        ],
+    )
+    assert ran == ["running", "stop", "position"]
+    assert scheduler.superseded_commands == 1
+
+
+async def test_held_commands_run_on_resume(hass: HomeAssistant) -> None:
+    """Test commands wait while held and the newest one runs on resume."""
+    scheduler = VeluxCommandScheduler(hass)
+    recorder = _Recorder()
+    scheduler.async_hold()
+    tasks = [
+        hass.async_create_task(
+            scheduler.async_run(recorder.job(name), node_ids=(NODE_ID,))
+        )
+        for name in ("first", "second")
+    ]
+    await asyncio.sleep(0)
+    assert not recorder.ran
+    assert scheduler.queue_depth == 1
+
+    scheduler.async_resume()
+    await asyncio.gather(*tasks)
+    assert recorder.ran == ["second"]
+
+
+async def test_held_command_fails_after_timeout(
+    hass: HomeAssistant, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Test a command held while the gateway stays unreachable fails."""
+    monkeypatch.setattr(scheduler_module, "HOLD_TIMEOUT", 0.01)
+    scheduler = VeluxCommandScheduler(hass)
+    recorder = _Recorder()
+    scheduler.async_hold()
+
+    with pytest.raises(HomeAssistantError):
+        await scheduler.async_run(recorder.job("held"), node_ids=(NODE_ID,))
+    assert scheduler.queue_depth == 0
+
+    scheduler.async_resume()
+    await hass.async_block_till_done()
+    assert not recorder.ran
+
+
+async def test_command_does_not_overtake_waiting_command(hass: HomeAssistant) -> None:
+    """Test a command waits for an earlier command of its node to run."""
+    scheduler = VeluxCommandScheduler(hass)
+    recorder = _Recorder()
+    tasks = [
+        hass.async_create_task(
+            scheduler.async_run(recorder.job(name, block), node_ids=node_ids)
+        )
+        for name, node_ids, block in (
+            ("running", (2,), True),
+            ("both", (NODE_ID, 2), False),
+            ("single", (NODE_ID,), False),
+        )
+    ]
+    await asyncio.sleep(0)
+    assert recorder.ran == ["running"]
+
+    recorder.release.set()
+    await asyncio.gather(*tasks)
+    assert recorder.ran == ["running", "both", "single"]
+
+
+async def test_open_session_keeps_its_slot(hass: HomeAssistant) -> None:
+    """Test a command waits until a session of the gateway is finished."""
+    scheduler = VeluxCommandScheduler(hass, session_limit=1)
+    recorder = _Recorder()
+    session = VeluxCommandSession(
+        session_id=1,
+        node_ids=(2,),
+        target=Position(position_percent=0),
+        future=hass.loop.create_future(),
+        timeout=SESSION_TIMEOUT,
+    )
+
+    async def async_move() -> VeluxCommandSession:
+        return session
+
+    await scheduler.async_run(async_move, node_ids=(2,))
+    task = hass.async_create_task(
+        scheduler.async_run(recorder.job("next"), node_ids=(NODE_ID,))
+    )
+    await asyncio.sleep(0)
+    assert not recorder.ran
+    assert scheduler.open_sessions == 1
+
+    session.future.set_result(True)
+    await task
+    assert recorder.ran == ["next"]
+    assert scheduler.open_sessions == 0
@@ -0,0 +1,125 @@
+"""Tests for the command session tracker."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import async_capture_events
+from pyvlx import Position, PyVLX
+from pyvlx.api.frames import (
+    FrameCommandRunStatusNotification,
+    FrameCommandSendConfirmation,
+    FrameSessionFinishedNotification,
+)
+from pyvlx.parameter import DualRollerShutterPosition
+
+from custom_components.velux.const import EVENT_COMMAND_COMPLETED
+from custom_components.velux.scheduler import CHANNEL_FP1, CHANNEL_FP2, CHANNEL_MAIN
+from custom_components.velux.sessions import (
+    STATUS_COMPLETED,
+    STATUS_FAILED,
+    VeluxSessionTracker,
+)
+
+NODE_ID = 3
+
+
+def _value(parameter: Position) -> int:
+    """Return the raw value of parameter as reported by the gateway."""
+    return int.from_bytes(parameter.raw, "big")
+
+
+async def _report(
+    tracker: VeluxSessionTracker,
+    session_id: int,
+    node_parameter: int,
+    value: int,
+) -> None:
+    """Feed a run status notification for NODE_ID."""
+    await tracker._async_frame_received(  # pylint: disable=protected-access
+        FrameCommandRunStatusNotification(
+            session_id=session_id,
+            status_id=0,
+            index_id=NODE_ID,
+            node_parameter=node_parameter,
+            parameter_value=value,
+        )
+    )
+
+
+async def _finish(tracker: VeluxSessionTracker, session_id: int) -> None:
+    """Feed a session finished notification."""
+    await tracker._async_frame_received(  # pylint: disable=protected-access
+        FrameSessionFinishedNotification(session_id=session_id)
+    )
+
+
+async def test_curtain_sessions_are_independent(
+    hass: HomeAssistant, pyvlx: PyVLX
+) -> None:
+    """Test a lower curtain command keeps the session of the upper one."""
+    tracker = VeluxSessionTracker(hass, pyvlx)
+    events = async_capture_events(hass, EVENT_COMMAND_COMPLETED)
+    upper_target = Position(position_percent=20)
+    lower_target = Position(position_percent=80)
+    upper = tracker.async_track(1, (NODE_ID,), upper_target, parameter_id=CHANNEL_FP1)
+    lower = tracker.async_track(2, (NODE_ID,), lower_target, parameter_id=CHANNEL_FP2)
+
+    await _report(tracker, 1, CHANNEL_MAIN, _value(DualRollerShutterPosition()))
+    await _report(tracker, 1, CHANNEL_FP1, _value(upper_target))
+    await _report(tracker, 2, CHANNEL_FP2, _value(lower_target))
+    await _finish(tracker, 1)
+    await _finish(tracker, 2)
+    await hass.async_block_till_done()
+
+    assert upper.future.result() and lower.future.result()
+    assert [event.data["status"] for event in events] == [
+        STATUS_COMPLETED,
+        STATUS_COMPLETED,
+    ]
+    assert [event.data["target"] for event in events] == [80, 20]
+
+
+async def test_other_sessions_are_not_credited(
+    hass: HomeAssistant, pyvlx: PyVLX
+) -> None:
+    """Test notifications of an untracked session leave the tracked one alone."""
+    tracker = VeluxSessionTracker(hass, pyvlx)
+    events = async_capture_events(hass, EVENT_COMMAND_COMPLETED)
+    target = Position(position_percent=0)
+    session = tracker.async_track(5, (NODE_ID,), target)
+
+    # A stop sent by another client ends somewhere on the way
+    await _report(tracker, 6, CHANNEL_MAIN, _value(Position(position_percent=40)))
+    await _finish(tracker, 6)
+    assert not session.future.done()
+
+    await _report(tracker, 5, CHANNEL_MAIN, _value(Position(position_percent=10)))
+    await _finish(tracker, 5)
+    await hass.async_block_till_done()
+
+    assert not session.reached_target(NODE_ID)
+    assert [event.data["status"] for event in events] == [STATUS_FAILED]
+    assert events[0].data["session_id"] == 5
+
+
+async def test_confirmation_latency_excludes_travel(
+    hass: HomeAssistant, pyvlx: PyVLX
+) -> None:
+    """Test the latency ends with the confirmation and not with the move."""
+    tracker = VeluxSessionTracker(hass, pyvlx)
+    session = tracker.async_track(7, (NODE_ID,), Position(position_percent=0))
+    session.started = 100.0
+
+    with patch(
+        "custom_components.velux.sessions.time.monotonic", side_effect=[100.2, 130.0]
+    ):
+        await tracker._async_frame_received(  # pylint: disable=protected-access
+            FrameCommandSendConfirmation(session_id=7)
+        )
+        await _finish(tracker, 7)
+
+    assert session.confirmation_latency == pytest.approx(0.2)
+    assert session.run_time == pytest.approx(29.8)
+    assert tracker.confirmation_latency[NODE_ID] == pytest.approx(0.2)
@@ -0,0 +1,47 @@
+"""Tests for the snapshot of the gateway tables."""
+from __future__ import annotations
+
+from unittest.mock import AsyncMock, Mock, patch
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pyvlx import PyVLX, RollerShutter
+
+from custom_components.velux.const import DOMAIN
+from custom_components.velux.snapshot import VeluxSnapshot
+
+
+def _api_call(**attributes) -> Mock:
+    """Return a mocked API call class whose instances answer with attributes."""
+    return Mock(
+        return_value=Mock(success=True, do_api_call=AsyncMock(), **attributes)
+    )
+
+
+async def test_reconcile_unregisters_replaced_nodes(
+    hass: HomeAssistant, pyvlx: PyVLX
+) -> None:
+    """Test restored nodes replaced by the gateway tables drop their callbacks."""
+    snapshot = VeluxSnapshot(hass, MockConfigEntry(domain=DOMAIN), pyvlx)
+    restored = RollerShutter(pyvlx, 1, "Shutter")
+    pyvlx.nodes.add(restored)
+    renamed = RollerShutter(pyvlx, 1, "Living room")
+
+    with patch(
+        "custom_components.velux.snapshot.GetAllNodesInformation",
+        _api_call(notification_frames=[object()]),
+    ), patch(
+        "custom_components.velux.snapshot.convert_frame_to_node",
+        return_value=renamed,
+    ), patch(
+        "custom_components.velux.snapshot.GetSceneList", _api_call(scenes=[])
+    ):
+        assert await snapshot.async_reconcile()
+
+    assert pyvlx.nodes[1] is renamed
+    for callbacks in (
+        pyvlx.connection.connection_opened_cbs,
+        pyvlx.connection.connection_closed_cbs,
+    ):
+        assert restored.after_update not in callbacks
+        assert renamed.after_update in callbacks
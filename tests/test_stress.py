@@ -0,0 +1,211 @@
+"""Concurrency stress test of the Velux entities against the KLF200 simulator.
+
+Overlaps a "close everything" burst with random service calls for single
+entities, like an automation colliding with dashboard presses. The simulated
+gateway enforces a session limit and answers with a delay.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import pytest
+from homeassistant.components.cover import (
+    ATTR_CURRENT_POSITION,
+    ATTR_POSITION,
+    DOMAIN as COVER_DOMAIN,
+)
+from homeassistant.components.light import DOMAIN as LIGHT_DOMAIN
+from homeassistant.components.switch import DOMAIN as SWITCH_DOMAIN
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    SERVICE_CLOSE_COVER,
+    SERVICE_OPEN_COVER,
+    SERVICE_SET_COVER_POSITION,
+    SERVICE_TURN_OFF,
+    SERVICE_TURN_ON,
+    STATE_OFF,
+    STATE_ON,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import async_get_platforms
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pyvlx import Parameter, Position
+
+from custom_components.velux.const import DOMAIN
+from custom_components.velux.cover import VeluxBlind, VeluxCover, VeluxWindow
+from custom_components.velux.light import VeluxLight
+from custom_components.velux.node_entity import VeluxNodeEntity
+from custom_components.velux.switch import VeluxSwitch
+from script import klf200_simulator
+from script.klf200_simulator import (
+    POSITION_MAX,
+    SimulatedConnection,
+    SimulatedGateway,
+)
+
+from . import PASSWORD
+
+COMMANDS = 300
+SESSION_LIMIT = 4
+# Entity types driven by the test, the curtains of dual roller shutters are
+# moved by functional parameters the simulator does not know
+DRIVEN_TYPES = (VeluxCover, VeluxWindow, VeluxBlind, VeluxLight, VeluxSwitch)
+# Raw values of the main parameter, on is 0 for lights and switches
+RAW_OFF = POSITION_MAX
+# Domain, service, service data and the raw value sent to the node
+ServiceCall = tuple[str, str, dict[str, Any], int]
+
+
+class RecordingGateway(SimulatedGateway):
+    """Simulated gateway which records the commands in order of arrival."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the gateway."""
+        super().__init__(*args, **kwargs)
+        # Main parameter values per node and whether they were accepted
+        self.received: dict[int, list[tuple[int, bool]]] = {}
+
+    async def _command_send(self, client: SimulatedConnection, payload: bytes) -> None:
+        """Record the value per node before the command is handled."""
+        value = payload[7] * 256 + payload[8]
+        accepted = not 0 < self.session_limit <= self.active_sessions
+        for node_id in payload[42 : 42 + payload[41]]:
+            self.received.setdefault(node_id, []).append((value, accepted))
+        await super()._command_send(client, payload)
+
+
+def _is_subsequence(values: list[int], issued: list[int]) -> bool:
+    """Return True if values appear in issued in the same order."""
+    remaining = iter(issued)
+    return all(value in remaining for value in values)
+
+
+def _call(entity: VeluxNodeEntity, rand: random.Random) -> ServiceCall:
+    """Return a random service call for entity and the raw value it sends."""
+    data: dict[str, Any] = {ATTR_ENTITY_ID: entity.entity_id}
+    if isinstance(entity, VeluxCover):
+        service = rand.choice(
+            (SERVICE_OPEN_COVER, SERVICE_CLOSE_COVER, SERVICE_SET_COVER_POSITION)
+        )
+        if service == SERVICE_OPEN_COVER:
+            position = 100
+        elif service == SERVICE_CLOSE_COVER:
+            position = 0
+        else:
+            position = data[ATTR_POSITION] = rand.choice((25, 50, 75))
+        raw = int.from_bytes(Position(position_percent=100 - position).raw, "big")
+        return COVER_DOMAIN, service, data, raw
+    domain = LIGHT_DOMAIN if isinstance(entity, VeluxLight) else SWITCH_DOMAIN
+    if rand.random() < 0.5:
+        return domain, SERVICE_TURN_ON, data, 0
+    return domain, SERVICE_TURN_OFF, data, RAW_OFF
+
+
+def _close(entity: VeluxNodeEntity) -> ServiceCall:
+    """Return the service call closing or turning off entity."""
+    data = {ATTR_ENTITY_ID: entity.entity_id}
+    if isinstance(entity, VeluxCover):
+        return COVER_DOMAIN, SERVICE_CLOSE_COVER, data, POSITION_MAX
+    domain = LIGHT_DOMAIN if isinstance(entity, VeluxLight) else SWITCH_DOMAIN
+    return domain, SERVICE_TURN_OFF, data, RAW_OFF
+
+
+def _assert_state(hass: HomeAssistant, entity: VeluxNodeEntity, raw: int) -> None:
+    """Assert the state of entity shows the raw value of its node."""
+    state = hass.states.get(entity.entity_id)
+    if isinstance(entity, VeluxCover):
+        position = Position(Parameter(raw.to_bytes(2, "big"))).position_percent
+        assert state.attributes[ATTR_CURRENT_POSITION] == 100 - position, entity
+    else:
+        assert state.state == (STATE_OFF if raw == RAW_OFF else STATE_ON), entity
+
+
+async def test_concurrent_service_calls(
+    hass: HomeAssistant,
+    monkeypatch: pytest.MonkeyPatch,
+    record_property: Callable[[str, Any], None],
+    setup_klf200: Callable[[SimulatedGateway], Awaitable[MockConfigEntry]],
+) -> None:
+    """Test overlapping service calls end every node at its last command."""
+    monkeypatch.setattr(klf200_simulator, "REPORT_INTERVAL", 0.05)
+    rand = random.Random(0)
+    gateway = RecordingGateway(
+        password=PASSWORD,
+        nodes=45,
+        scenes=0,
+        latency=0.002,
+        jitter=0.003,
+        loss=0,
+        travel_time=0.3,
+        seed=0,
+        session_limit=SESSION_LIMIT,
+    )
+    entry = await setup_klf200(gateway)
+    entities = [
+        entity
+        for platform in async_get_platforms(hass, DOMAIN)
+        for entity in platform.entities.values()
+        if type(entity) in DRIVEN_TYPES
+    ]
+
+    # Close everything, overlapped by random presses on single entities
+    calls = [(entity, _close(entity)) for entity in entities]
+    for _ in range(len(calls), COMMANDS):
+        entity = rand.choice(entities)
+        calls.append((entity, _call(entity, rand)))
+    latencies: list[float] = []
+
+    async def async_call(domain: str, service: str, data: dict[str, Any]) -> None:
+        start = time.perf_counter()
+        try:
+            await hass.services.async_call(domain, service, data, blocking=True)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    issued: dict[int, list[int]] = {}
+    tasks = []
+    for entity, (domain, service, data, raw) in calls:
+        issued.setdefault(entity.node.node_id, []).append(raw)
+        tasks.append(hass.async_create_task(async_call(domain, service, data)))
+        if rand.random() < 0.1:
+            await asyncio.sleep(rand.uniform(0, 0.01))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Wait for the moves, the sessions of the accepted commands and the
+    # position updates pyvlx runs while a node moves
+    data = hass.data[DOMAIN][entry.entry_id]
+    async with asyncio.timeout(10):
+        while (
+            gateway.active_sessions
+            or any(node.task is not None for node in gateway.nodes.values())
+            or data.session_tracker._sessions  # pylint: disable=protected-access
+            or any(
+                getattr(node, "_update_task", None) is not None
+                for node in data.pyvlx.nodes
+            )
+        ):
+            await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+
+    cuts = statistics.quantiles(latencies, n=100)
+    record_property(
+        "latency_ms", {"p50": round(cuts[49] * 1000), "p99": round(cuts[98] * 1000)}
+    )
+    # The scheduler keeps within the session limit, no command is rejected
+    rejected = [result for result in results if isinstance(result, Exception)]
+    record_property("rejected", len(rejected))
+    assert not rejected
+    for entity in entities:
+        node_id = entity.node.node_id
+        received = gateway.received.get(node_id, [])
+        # Superseded commands are dropped, the others arrive in order
+        assert _is_subsequence([value for value, _ in received], issued[node_id])
+        # Every node ends at its last command
+        assert received[-1] == (issued[node_id][-1], True), entity
+        assert gateway.nodes[node_id].position == issued[node_id][-1], entity
+        _assert_state(hass, entity, issued[node_id][-1])
@@ -0,0 +1,112 @@
+"""Tests for the learned travel times."""
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator
+from datetime import timedelta
+from typing import Any
+from unittest.mock import Mock, patch
+
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+from pyvlx import Position, PyVLX, RollerShutter
+
+from custom_components.velux.const import DOMAIN
+from custom_components.velux.travel import SAVE_DELAY, VeluxTravelTimes
+
+
+@pytest.fixture
+async def node(pyvlx: PyVLX) -> RollerShutter:
+    """Return an open roller shutter."""
+    return RollerShutter(
+        pyvlx, 1, "Shutter", None, position_parameter=Position(position_percent=0)
+    )
+
+
+@pytest.fixture
+async def travel_times(
+    hass: HomeAssistant, node: RollerShutter
+) -> AsyncGenerator[VeluxTravelTimes]:
+    """Return travel times learning from node."""
+    entry = MockConfigEntry(domain=DOMAIN, unique_id="KLF200")
+    entry.add_to_hass(hass)
+    travel_times = VeluxTravelTimes(hass, entry)
+    travel_times.async_track_nodes([node])
+    yield travel_times
+    travel_times.async_untrack_nodes()
+
+
+async def _report(
+    node: RollerShutter, monotonic: Mock, now: float, percent: int, target: int
+) -> None:
+    """Let node report percent at now, moving towards target."""
+    monotonic.return_value = now
+    node.position = Position(position_percent=percent)
+    node.target = Position(position_percent=target)
+    node.is_closing = percent < target
+    node.is_opening = percent > target
+    await node.after_update()
+
+
+async def test_learn_travel_time(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    freezer: FrozenDateTimeFactory,
+    node: RollerShutter,
+    travel_times: VeluxTravelTimes,
+) -> None:
+    """Test full moves are learned, smoothed and stored."""
+    with patch("custom_components.velux.travel.time.monotonic") as monotonic:
+        await _report(node, monotonic, 100, 0, 100)
+        await _report(node, monotonic, 110, 50, 100)
+        await _report(node, monotonic, 120, 100, 100)
+        assert travel_times.travel_times == {1: 20}
+
+        # The next move takes 30 s, the learned time follows it partially
+        await _report(node, monotonic, 200, 100, 0)
+        await _report(node, monotonic, 230, 0, 0)
+        assert travel_times.travel_times == {1: pytest.approx(23)}
+
+        # Short moves are not learned
+        await _report(node, monotonic, 300, 0, 10)
+        await _report(node, monotonic, 360, 10, 10)
+        assert travel_times.travel_times == {1: pytest.approx(23)}
+
+    freezer.tick(timedelta(seconds=SAVE_DELAY))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    stored = hass_storage[travel_times._store.key]
+    assert stored["data"]["travel_times"] == {"1": pytest.approx(23)}
+
+
+async def test_predict_position_and_eta(
+    freezer: FrozenDateTimeFactory,
+    node: RollerShutter,
+    travel_times: VeluxTravelTimes,
+) -> None:
+    """Test the position of a moving node is interpolated from its last report."""
+    travel_times.travel_times[1] = 20
+    with patch("custom_components.velux.travel.time.monotonic") as monotonic:
+        await _report(node, monotonic, 100, 0, 100)
+        prediction = travel_times.async_predict(node)
+        assert prediction.position_percent == 0
+        assert prediction.eta == dt_util.utcnow() + timedelta(seconds=20)
+
+        monotonic.return_value = 105
+        assert travel_times.async_predict(node).position_percent == 25
+
+        # Predictions start from the latest reported position
+        await _report(node, monotonic, 110, 40, 100)
+        monotonic.return_value = 114
+        assert travel_times.async_predict(node).position_percent == 60
+
+        monotonic.return_value = 200
+        assert travel_times.async_predict(node).position_percent == 100
+
+        await _report(node, monotonic, 201, 100, 100)
+        assert travel_times.async_predict(node) is None